@@ -0,0 +1,175 @@
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import unittest
+
+from tracebook.async_writer import AsyncWriter
+from tracebook.config import AsyncConfig, Config, LogLevel, WebUIConfig
+from tracebook.logger import Logger
+from tracebook.records import read_records
+from tracebook.render import Renderer
+
+
+class TestAsyncWriter(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+
+    def make_writer(self, **kwargs):
+        kwargs.setdefault("flush_interval", 60)
+        return AsyncWriter(self.batches.append, **kwargs)
+
+    def written(self):
+        return [record for batch in self.batches for record in batch]
+
+    def test_flush_writes_queued_records(self):
+        writer = self.make_writer()
+        for i in range(10):
+            writer.put(i)
+        writer.flush()
+        self.assertEqual(self.written(), list(range(10)))
+        writer.close()
+
+    def test_batch_size_wakes_writer(self):
+        written = threading.Event()
+        writer = AsyncWriter(lambda batch: written.set(), batch_size=4, flush_interval=60)
+        for i in range(4):
+            writer.put(i)
+        self.assertTrue(written.wait(5))
+        writer.close()
+
+    def test_drop_newest(self):
+        writer = self.make_writer(queue_size=3, overflow_policy="drop_newest")
+        with writer._write_lock:
+            for i in range(5):
+                writer.put(i)
+        writer.flush()
+        self.assertEqual(self.written(), [0, 1, 2])
+        self.assertEqual(writer.dropped, 2)
+        writer.close()
+
+    def test_drop_oldest(self):
+        writer = self.make_writer(queue_size=3, overflow_policy="drop_oldest")
+        with writer._write_lock:
+            for i in range(5):
+                writer.put(i)
+        writer.flush()
+        self.assertEqual(self.written(), [2, 3, 4])
+        self.assertEqual(writer.dropped, 2)
+        writer.close()
+
+    def test_block_keeps_every_record(self):
+        writer = self.make_writer(queue_size=2, batch_size=2, flush_interval=0.01)
+        for i in range(50):
+            writer.put(i)
+        writer.close()
+        self.assertEqual(self.written(), list(range(50)))
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            AsyncWriter(self.batches.append, overflow_policy="explode")
+
+
+class TestLoggerBatches(unittest.TestCase):
+    def test_unrenderable_record_keeps_batch(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "test.log")
+            record_path = os.path.join(directory, "test.tbr")
+            logger = Logger(
+                Config(
+                    output="file",
+                    log_level=LogLevel.INFO,
+                    file_path=path,
+                    web_config=WebUIConfig(is_active=False),
+                    async_config=AsyncConfig(use=True, flush_interval=60),
+                    record_file_path=record_path,
+                )
+            )
+
+            @logger.trace(log_outputs=False)
+            def good(value):
+                return value
+
+            @logger.trace(log_outputs=False, renderer=Renderer(formatters={bytes: lambda value: 1 / 0}))
+            def bad(value):
+                return value
+
+            good(1)
+            bad(b"x")
+            good(2)
+            logger.logger.flush()
+            with open(path) as file:
+                lines = file.read().splitlines()[1:]
+            logger.logger.close()
+
+            self.assertEqual(len(lines), 3)
+            self.assertTrue(lines[0].endswith("> good (1,) {}"))
+            self.assertIn("> bad <unrenderable: ZeroDivisionError(", lines[1])
+            self.assertTrue(lines[2].endswith("> good (2,) {}"))
+            messages = [record.message for record in read_records(record_path)]
+            self.assertEqual(messages[0], "(1,) {}")
+            self.assertTrue(messages[1].startswith("<unrenderable: ZeroDivisionError("))
+            self.assertEqual(messages[2], "(2,) {}")
+
+
+class TestLoggerClose(unittest.TestCase):
+    def test_records_after_close_are_dropped(self):
+        for use_async in (False, True):
+            with tempfile.TemporaryDirectory() as directory:
+                logger = Logger(
+                    Config(
+                        output="file",
+                        log_level=LogLevel.INFO,
+                        file_path=os.path.join(directory, "test.log"),
+                        web_config=WebUIConfig(is_active=False),
+                        async_config=AsyncConfig(use=use_async),
+                        record_file_path=os.path.join(directory, "test.tbr"),
+                    )
+                )
+
+                @logger.trace()
+                def add(a, b):
+                    return a + b
+
+                logger.close()
+                self.assertEqual(add(1, 2), 3)
+                logger.info("after close")
+                logger.logger.flush()
+                logger.close()
+
+                core = logger.logger
+                if use_async:
+                    self.assertEqual(core.writer.dropped, 3)
+                else:
+                    self.assertEqual((core.store.dropped, core.records.dropped), (3, 3))
+
+    def test_exit_after_close_is_quiet(self):
+        with tempfile.TemporaryDirectory() as directory:
+            script = textwrap.dedent(
+                f"""
+                from tracebook.config import AsyncConfig, Config, WebUIConfig
+                from tracebook.logger import Logger
+                logger = Logger(
+                    Config(
+                        output="file",
+                        file_path={os.path.join(directory, "test.log")!r},
+                        web_config=WebUIConfig(is_active=False),
+                        async_config=AsyncConfig(use=True),
+                        record_file_path={os.path.join(directory, "test.tbr")!r},
+                    )
+                )
+                logger.close()
+                logger.info("after close")
+                """
+            )
+            package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            result = subprocess.run(
+                [sys.executable, "-c", script], capture_output=True, text=True, cwd=package_root, timeout=30
+            )
+            self.assertEqual((result.returncode, result.stderr), (0, ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
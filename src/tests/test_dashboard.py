@@ -0,0 +1,78 @@
+import unittest
+
+from dash import Patch, no_update
+
+from tracebook.config import Config, LogLevel, WebUIConfig
+from tracebook.dashboard import LOG_WINDOW_SIZE, RealTimeDashboard
+from tracebook.event_bus import EventBus, LogEvent
+from tracebook.resource_probe import ResourceSample
+
+
+class TestLogWindowUpdates(unittest.TestCase):
+    def setUp(self):
+        self.bus = EventBus()
+        self.dashboard = RealTimeDashboard(Config(web_config=WebUIConfig(is_active=False)), self.bus)
+
+    def publish(self, count):
+        for i in range(count):
+            self.bus.publish(LogEvent(LogLevel.INFO, "2024-08-13 14:21:50", "|", None, f"message {i}"))
+
+    def operations(self, patch):
+        return [operation["operation"] for operation in patch.to_plotly_json()["operations"]]
+
+    def test_sends_only_new_rows(self):
+        self.publish(3)
+        rows, state = self.dashboard.update_log_window(0, None)
+        self.assertEqual(len(rows), 3)
+
+        self.assertEqual(self.dashboard.update_log_window(1, state), (no_update, no_update))
+
+        self.publish(2)
+        patch, state = self.dashboard.update_log_window(2, state)
+        self.assertIsInstance(patch, Patch)
+        self.assertEqual(self.operations(patch), ["Extend"])
+        self.assertEqual(len(patch.to_plotly_json()["operations"][0]["params"]["value"]), 2)
+        self.assertEqual(state, {"seq": 5, "rows": 5})
+
+    def test_trims_to_window(self):
+        self.publish(LOG_WINDOW_SIZE - 1)
+        _, state = self.dashboard.update_log_window(0, None)
+        self.publish(3)
+        patch, state = self.dashboard.update_log_window(1, state)
+        self.assertEqual(self.operations(patch), ["Extend", "Delete", "Delete"])
+        self.assertEqual(state["rows"], LOG_WINDOW_SIZE)
+
+    def test_client_that_fell_behind_gets_full_window(self):
+        self.publish(1)
+        _, state = self.dashboard.update_log_window(0, None)
+        self.publish(LOG_WINDOW_SIZE + 5)
+        rows, state = self.dashboard.update_log_window(1, state)
+        self.assertIsInstance(rows, list)
+        self.assertEqual(len(rows), LOG_WINDOW_SIZE)
+        self.assertEqual(state, {"seq": LOG_WINDOW_SIZE + 6, "rows": LOG_WINDOW_SIZE})
+
+    def test_rows_are_rendered_once(self):
+        self.publish(2)
+        first, _ = self.dashboard.update_log_window(0, None)
+        second, _ = self.dashboard.update_log_window(1, None)
+        self.assertIs(first[0], second[0])
+
+
+class TestResourceGraphs(unittest.TestCase):
+    def test_graphs_are_capped_and_downsampled(self):
+        dashboard = RealTimeDashboard(
+            Config(web_config=WebUIConfig(is_active=False, max_data_points=500, max_plot_points=100)),
+            EventBus(),
+        )
+        for i in range(600):
+            dashboard.add_resource_sample(ResourceSample(float(i), 50.0, 1024 ** 2, 1, 0.0))
+
+        self.assertEqual(len(dashboard.cpu_usage_data), 500)
+        scatter = dashboard.make_cpu_figure()["data"][0]
+        self.assertEqual(len(scatter.x), 100)
+        self.assertEqual((scatter.x[0], scatter.x[-1]), (100.0, 599.0))
+        self.assertEqual(set(dashboard.make_memory_figure()["data"][0].y), {1.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
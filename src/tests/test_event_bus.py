@@ -0,0 +1,118 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from tracebook.config import Config, LogLevel, WebUIConfig
+from tracebook.event_bus import EventBus, LogEvent
+from tracebook.logger import Logger
+from tracebook.render import FunctionMessage, LazyArguments, LazyResult, Renderer
+
+
+class TestEventBus(unittest.TestCase):
+    def test_read_by_cursor(self):
+        bus = EventBus(capacity=10)
+        for i in range(3):
+            bus.publish(i)
+        events, cursor = bus.read(0)
+        self.assertEqual((events, cursor), ([0, 1, 2], 3))
+        self.assertEqual(bus.read(cursor), ([], 3))
+        self.assertEqual(bus.read(1, limit=1), ([1], 2))
+
+    def test_slow_subscriber_loses_oldest(self):
+        bus = EventBus(capacity=4)
+        for i in range(10):
+            bus.publish(i)
+        events, cursor = bus.read(2)
+        self.assertEqual(events, [6, 7, 8, 9])
+        self.assertEqual(cursor, 10)
+
+    def test_wait(self):
+        bus = EventBus()
+        self.assertFalse(bus.wait(0, timeout=0.01))
+        timer = threading.Timer(0.05, bus.publish, args=("event",))
+        timer.start()
+        self.assertTrue(bus.wait(0, timeout=5))
+        timer.join()
+
+
+class TestLogEvent(unittest.TestCase):
+    def test_from_record(self):
+        renderer = Renderer()
+        stamp = "2024-08-13 14:21:50"
+        event = LogEvent.from_record(LogLevel.INFO, stamp, ">", LazyArguments("fact", (5,), {"k": 1}, renderer))
+        self.assertEqual((event.function_name, event.args, event.kwargs), ("fact", "(5,)", "{'k': 1}"))
+        self.assertEqual(event.text(), f"[INFO] {stamp} > fact (5,) {{'k': 1}}")
+
+        event = LogEvent.from_record(LogLevel.INFO, stamp, "<", LazyResult("fact", 120, renderer, 1000, 500))
+        self.assertEqual(event.message, "120 [duration=0.001000ms cpu_time=0.000500ms]")
+
+        event = LogEvent.from_record(LogLevel.ERROR, stamp, "*", FunctionMessage("fact", "boom"))
+        self.assertEqual((event.function_name, event.message), ("fact", "boom"))
+
+        event = LogEvent.from_record(LogLevel.WARNING, stamp, "|", "plain text")
+        self.assertEqual(event.text(), f"[WARNING] {stamp} | plain text")
+
+    def test_from_line(self):
+        line = "[INFO] 2024-08-13 14:21:50 > fact (5,) {}"
+        event = LogEvent.from_line(line)
+        self.assertEqual((event.function_name, event.args, event.kwargs), ("fact", "(5,)", "{}"))
+        self.assertEqual(event.text(), line)
+        self.assertIsNone(LogEvent.from_line("=== Starting TraceBook at 2024-08-13 14:21:50 ==="))
+
+
+class TestPublishing(unittest.TestCase):
+    def test_logger_publishes_what_it_writes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            logger = Logger(
+                Config(
+                    output="file",
+                    log_level=LogLevel.INFO,
+                    file_path=os.path.join(directory, "test.log"),
+                    web_config=WebUIConfig(is_active=False),
+                )
+            )
+            bus = logger.logger.events = EventBus()
+
+            @logger.trace()
+            def fact(n):
+                return 1 if n <= 1 else n * fact(n - 1)
+
+            @logger.trace()
+            def fail():
+                raise ValueError("boom")
+
+            fact(3)
+            fail()
+            lines = logger.logger.store.tail()[1:]
+            logger.logger.close()
+
+        events, _ = bus.read(0)
+        self.assertEqual([event.text() for event in events], lines)
+        self.assertEqual([event.function_name for event in events[:2]], ["fact", "fact"])
+        self.assertEqual(events[0].args, "(3,)")
+        self.assertEqual((events[-2].operation, events[-2].message), ("*", "boom"))
+
+
+class TestDashboardEvents(unittest.TestCase):
+    def test_dashboard_reads_events(self):
+        from tracebook.dashboard import RealTimeDashboard
+
+        bus = EventBus()
+        dashboard = RealTimeDashboard(Config(web_config=WebUIConfig(is_active=False)), bus)
+        renderer = Renderer()
+        stamp = "2024-08-13 14:21:50.123"
+        bus.publish(LogEvent.from_record(LogLevel.INFO, stamp, ">", LazyArguments("fact", (5,), {}, renderer)))
+        bus.publish(LogEvent.from_record(LogLevel.INFO, stamp, "<", LazyResult("fact", 120, renderer)))
+        bus.publish(LogEvent.from_record(LogLevel.ERROR, stamp, "*", FunctionMessage("fact", "boom")))
+
+        entries, state = dashboard.update_log_window(0, None)
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(state, {"seq": 3, "rows": 3})
+        self.assertEqual(dashboard.cursor, 3)
+        self.assertIn("14:21:50.123", str(entries[0]))
+        self.assertIn("Returns: 120", str(entries[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
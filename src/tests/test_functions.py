@@ -0,0 +1,45 @@
+import functools
+import unittest
+
+from tracebook.functions import FunctionRegistry
+
+
+class Reader:
+    def read(self):
+        pass
+
+
+class Writer:
+    def read(self):
+        pass
+
+
+class TestFunctionRegistry(unittest.TestCase):
+    def test_same_names_get_different_ids(self):
+        registry = FunctionRegistry()
+        reader = registry.register(Reader.read)
+        writer = registry.register(Writer.read)
+
+        self.assertNotEqual(reader.id, writer.id)
+        self.assertEqual((reader.name, reader.qualname), ("read", "Reader.read"))
+        self.assertEqual(reader.module, __name__)
+        self.assertEqual(reader.file, __file__)
+        self.assertEqual(reader.line, Reader.read.__code__.co_firstlineno)
+        self.assertIs(registry.get(writer.id), writer)
+        self.assertIsNone(registry.get(0))
+
+    def test_registration_is_idempotent(self):
+        registry = FunctionRegistry()
+
+        @functools.wraps(Reader.read)
+        def wrapper(*args):
+            pass
+
+        self.assertIs(registry.register(Reader.read), registry.register(Reader.read))
+        self.assertIs(registry.register(wrapper), registry.register(Reader.read))
+        self.assertIs(registry.register_name("read"), registry.register_name("read"))
+        self.assertEqual(len(registry.functions), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
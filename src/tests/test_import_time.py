@@ -0,0 +1,93 @@
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+HEAVY_MODULES = ["dash", "flask", "plotly", "requests"]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestImportTime(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "test.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def imports(self, web_config, wait_for=None):
+        # A fresh interpreter, so that nothing is imported already. A finder
+        # notes the thread that executes each heavy module; looking a module
+        # up with importlib.util.find_spec does not count.
+        script = textwrap.dedent(
+            f"""
+            import importlib.machinery, json, sys, threading, time
+
+            heavy = {HEAVY_MODULES!r}
+            threads = {{}}
+
+            class Watch:
+                def find_spec(self, name, path=None, target=None):
+                    spec = importlib.machinery.PathFinder.find_spec(name, path) if name in heavy else None
+                    if spec is None:
+                        return None
+                    exec_module = spec.loader.exec_module
+
+                    def watched(module):
+                        threads.setdefault(name, threading.current_thread().name)
+                        exec_module(module)
+
+                    spec.loader.exec_module = watched
+                    return spec
+
+            sys.meta_path.insert(0, Watch())
+            import tracebook
+            after_import = [name for name in heavy if name in sys.modules]
+            from tracebook.config import Config, WebUIConfig
+            logger = tracebook.Logger(
+                Config(output="file", file_path={self.path!r}, web_config=WebUIConfig({web_config}))
+            )
+            after_logger = [name for name in heavy if name in sys.modules]
+            deadline = time.monotonic() + 60
+            while {wait_for!r} is not None and {wait_for!r} not in threads and time.monotonic() < deadline:
+                time.sleep(0.05)
+            print(json.dumps({{"after_import": after_import, "after_logger": after_logger, "threads": threads}}))
+            """
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout
+        return json.loads(output.splitlines()[-1])
+
+    def test_import_does_not_load_heavy_dependencies(self):
+        result = self.imports("is_active=False")
+        self.assertEqual(result["after_import"], [])
+
+    def test_headless_logger_does_not_load_heavy_dependencies(self):
+        result = self.imports("is_active=False")
+        self.assertEqual(result["after_logger"], [])
+        self.assertEqual(result["threads"], {})
+
+    @unittest.skipUnless(importlib.util.find_spec("dash"), "requires the dashboard extra")
+    def test_dashboard_is_imported_off_the_calling_thread(self):
+        result = self.imports(f"port={free_port()}", wait_for="dash")
+        self.assertEqual(result["threads"].get("dash"), "tracebook-dashboard")
+        self.assertNotIn("MainThread", result["threads"].values())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from tracebook.config import RotationConfig
+from tracebook.log_collector import CollectorClient, LogCollector, collector_address
+from tracebook.log_store import RingLogStore
+from tracebook.rotation import RotatingLogStore
+
+
+class TestRingLogStoreThreads(unittest.TestCase):
+    def test_concurrent_appends(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "test.log")
+            store = RingLogStore(path, max_entries=50)
+
+            def write(name):
+                for i in range(200):
+                    store.append(f"{name} {i}")
+
+            threads = [threading.Thread(target=write, args=(f"t{n}",)) for n in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            store.close()
+
+            with open(path) as file:
+                lines = file.read().splitlines()
+            self.assertGreaterEqual(len(lines), 50)
+            self.assertEqual(lines[-50:], store.tail())
+            for line in lines:
+                name, index = line.split()
+                self.assertIn(name, {"t0", "t1", "t2", "t3"})
+                self.assertTrue(index.isdigit())
+
+
+class TestLogCollector(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "test.log")
+        self.collector = LogCollector(self.path, max_entries=1000, idle_timeout=0.5)
+        self.assertTrue(self.collector.bind())
+        self.thread = threading.Thread(target=self.collector.serve, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.thread.join(5)
+        self.directory.cleanup()
+
+    def read_lines(self):
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+        with open(self.path) as file:
+            return file.read().splitlines()
+
+    def test_second_collector_does_not_bind(self):
+        self.assertFalse(LogCollector(self.path).bind())
+
+    def test_lines_from_several_clients(self):
+        def write(name):
+            client = CollectorClient(self.path)
+            for i in range(100):
+                client.append(f"{name} {i}")
+            client.extend([f"{name} batch-a", f"{name} batch-b"])
+            client.close()
+
+        threads = [threading.Thread(target=write, args=(f"c{n}",)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 4 * 102)
+        for n in range(4):
+            own = [line for line in lines if line.startswith(f"c{n} ")]
+            expected = [f"c{n} {i}" for i in range(100)] + [f"c{n} batch-a", f"c{n} batch-b"]
+            self.assertEqual(own, expected)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires os.fork")
+    def test_forked_child_reconnects(self):
+        client = CollectorClient(self.path)
+        client.append("parent before")
+        pid = os.fork()
+        if pid == 0:
+            try:
+                client.append("child")
+                client.close()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        client.append("parent after")
+        client.close()
+
+        lines = self.read_lines()
+        self.assertEqual(sorted(lines), ["child", "parent after", "parent before"])
+
+
+class TestCollectorClientFailures(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "test.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def serve(self):
+        collector = LogCollector(self.path, max_entries=1000, idle_timeout=0.2)
+        self.assertTrue(collector.bind())
+        thread = threading.Thread(target=collector.serve, daemon=True)
+        thread.start()
+        return thread
+
+    def test_unreachable_collector_drops_lines(self):
+        thread = self.serve()
+        client = CollectorClient(self.path, connect_timeout=0.1, retry_interval=60)
+        client._spawn_collector = lambda: None
+        client.append("one")
+        # Without clients the collector stops; the next send finds no collector.
+        client._socket.close()
+        thread.join(5)
+
+        client.append("two")
+        start = time.monotonic()
+        client.extend(["three", "four"])
+        self.assertLess(time.monotonic() - start, 0.05)
+        self.assertEqual(client.dropped, 3)
+
+        thread = self.serve()
+        client._retry_at = 0.0
+        client.append("five")
+        client.close()
+        thread.join(5)
+        with open(self.path) as file:
+            self.assertEqual(file.read().splitlines(), ["one", "five"])
+
+    def test_client_without_collector_drops_lines(self):
+        with patch.object(CollectorClient, "_spawn_collector", lambda client: None):
+            client = CollectorClient(self.path, connect_timeout=0.1, retry_interval=60)
+            client.extend(["one", "two"])
+            client.close()
+        self.assertEqual(client.dropped, 2)
+
+    def test_socket_directory_is_private(self):
+        address = collector_address(self.path)
+        info = os.stat(os.path.dirname(address))
+        self.assertEqual((info.st_uid, info.st_mode & 0o777), (os.getuid(), 0o700))
+
+        target = os.path.join(self.directory.name, "target")
+        open(target, "w").close()
+        os.symlink(target, address + ".lock")
+        try:
+            with self.assertRaises(OSError):
+                LogCollector(self.path).bind()
+        finally:
+            os.remove(address + ".lock")
+
+    def test_collector_rotates(self):
+        collector = LogCollector(self.path, rotation_config=RotationConfig(use=True, max_bytes=100))
+        self.assertTrue(collector.bind())
+        self.assertIsInstance(collector.store, RotatingLogStore)
+        collector.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+from tracebook.log_store import RingLogStore
+
+
+class TestRingLogStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "test.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_lines(self):
+        with open(self.file_path, "r") as file:
+            return file.read().splitlines()
+
+    def test_append_writes_to_file(self):
+        store = RingLogStore(self.file_path, max_entries=5)
+        store.append("line 1")
+        store.append("line 2")
+        store.close()
+        self.assertEqual(self.read_lines(), ["line 1", "line 2"])
+
+    def test_keeps_last_entries(self):
+        store = RingLogStore(self.file_path, max_entries=5)
+        for i in range(23):
+            store.append(f"line {i}")
+        store.close()
+
+        self.assertEqual(store.tail(), [f"line {i}" for i in range(18, 23)])
+        lines = self.read_lines()
+        self.assertLess(len(lines), 10)
+        self.assertEqual(lines[-5:], store.tail())
+
+    def test_compact_trims_file(self):
+        store = RingLogStore(self.file_path, max_entries=3)
+        store.extend(["a", "b", "c", "d"])
+        store.compact()
+        store.close()
+        self.assertEqual(self.read_lines(), ["b", "c", "d"])
+
+    def test_loads_existing_file(self):
+        with open(self.file_path, "w") as file:
+            file.write("old 1\nold 2\nold 3\n")
+
+        store = RingLogStore(self.file_path, max_entries=2)
+        store.append("new")
+        store.close()
+        self.assertEqual(store.tail(), ["old 3", "new"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,10 @@
+import os
+import tempfile
 import unittest
 from unittest.mock import mock_open, patch, ANY
 
-from tracebook.config import Config, LogLevel, RemoteConfig
+from tracebook.config import Config, LogLevel, RemoteConfig, WebUIConfig
+from tracebook.logger import Logger
 from tracebook.logger_core import LoggerCore
 
 
@@ -121,5 +124,54 @@ class TestLoggerDecorators(unittest.TestCase):
                 # called functin times
 
 
+class TestLogLevel(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.config = Config(
+            output="file",
+            log_level=LogLevel.WARNING,
+            file_path=os.path.join(self.directory.name, "test.log"),
+            web_config=WebUIConfig(is_active=False),
+        )
+        self.logger = Logger(self.config)
+
+    def tearDown(self):
+        self.logger.logger.close()
+        self.directory.cleanup()
+
+    def logged(self):
+        return self.logger.logger.store.tail()[1:]
+
+    def test_disabled_levels_are_not_logged(self):
+        self.logger.debug("debug message")
+        self.logger.info("info message")
+        self.logger.warning("warning message")
+        logs = self.logged()
+        self.assertEqual(len(logs), 1)
+        self.assertTrue(logs[0].startswith("[WARNING]"))
+
+    def test_trace_skips_rendering_when_disabled(self):
+        class Result:
+            def __str__(self):
+                raise AssertionError("result should not be rendered")
+
+        @self.logger.trace()
+        def test_func():
+            return Result()
+
+        test_func()
+        self.assertEqual(self.logged(), [])
+
+    def test_set_log_level_at_runtime(self):
+        self.logger.debug("hidden")
+        self.logger.set_log_level(LogLevel.DEBUG)
+        self.logger.debug("shown")
+        self.logger.set_log_level(LogLevel.ERROR)
+        self.logger.warning("hidden")
+        logs = self.logged()
+        self.assertEqual(len(logs), 1)
+        self.assertTrue(logs[0].endswith("| shown"))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,296 @@
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from tracebook.config import Config, LogLevel, WebUIConfig
+from tracebook.logger import Logger
+from tracebook.records import MAGIC, RecordBatcher, RecordWriter, convert_to_text, read_batch, read_records
+from tracebook.render import LazyArguments, LazyResult, Renderer
+from tracebook import utils
+from tracebook.utils import clock_anchor, current_timestamp
+
+
+class TestRecordFormat(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "test.tbr")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        renderer = Renderer()
+        now = time.monotonic_ns()
+        writer = RecordWriter(self.path)
+        writer.write(LogLevel.INFO, now, ">", LazyArguments("fact", (5,), {}, renderer), 7)
+        writer.write_many(
+            [
+                (LogLevel.INFO, now + 2000, "<", LazyResult("fact", 120, renderer, 1_500_000, 250_000), 7),
+                (LogLevel.ERROR, now + 1000, "*", "fact boom", 8),
+            ]
+        )
+        writer.close()
+
+        enter, exit, error = read_records(self.path)
+        self.assertEqual((enter.level, enter.operation, enter.function_name), (LogLevel.INFO, ">", "fact"))
+        self.assertEqual((enter.thread_id, enter.timestamp_ns, enter.message), (7, now, "(5,) {}"))
+        self.assertEqual((exit.duration_ns, exit.cpu_ns, exit.message), (1_500_000, 250_000, "120"))
+        self.assertEqual(error.timestamp_ns, now + 1000)
+        self.assertEqual((error.thread_id, error.function_name, error.message), (8, None, "fact boom"))
+
+        stamp = current_timestamp(enter.timestamp)
+        self.assertAlmostEqual(enter.timestamp, time.time(), delta=5)
+        self.assertEqual(enter.text(), f"[INFO] {stamp} > fact (5,) {{}}")
+        self.assertTrue(exit.text().endswith("< fact 120 [duration=1.500000ms cpu_time=0.250000ms]"))
+        self.assertRegex(enter.text("ms"), r"^\[INFO\] \S+ \d\d:\d\d:\d\d\.\d{3} > fact")
+
+    def test_sessions_and_truncated_tail(self):
+        for session in range(2):
+            writer = RecordWriter(self.path)
+            writer.write(LogLevel.INFO, time.monotonic_ns(), "|", f"session {session}", 1)
+            writer.close()
+        with open(self.path, "ab") as file:
+            file.write(b"\x40\x10")
+
+        self.assertEqual([record.message for record in read_records(self.path)], ["session 0", "session 1"])
+
+    def test_one_file_per_process(self):
+        script = textwrap.dedent(
+            f"""
+            import time
+            from tracebook.config import LogLevel
+            from tracebook.records import RecordWriter
+            writer = RecordWriter({self.path!r}, buffer_size=64, per_process=True)
+            for index in range(500):
+                writer.write(LogLevel.INFO, time.monotonic_ns(), "|", f"record {{index}}", 1)
+            writer.close()
+            """
+        )
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        processes = [subprocess.Popen([sys.executable, "-c", script], cwd=package_root) for _ in range(2)]
+        for process in processes:
+            self.assertEqual(process.wait(30), 0)
+
+        self.assertFalse(os.path.exists(self.path))
+        for process in processes:
+            records = list(read_records(f"{self.path}.{process.pid}"))
+            self.assertEqual([record.message for record in records], [f"record {index}" for index in range(500)])
+
+    def test_refreshed_anchor(self):
+        writer = RecordWriter(self.path)
+        now = time.monotonic_ns()
+        writer.write(LogLevel.INFO, now, "|", "before", 1)
+        wall_ns, monotonic_ns = clock_anchor()
+        # The wall clock was stepped forward by a second.
+        with patch.object(utils, "_anchor", (wall_ns + 10**9, monotonic_ns)):
+            writer.write(LogLevel.INFO, now, "|", "after", 1)
+        writer.close()
+
+        before, after = read_records(self.path)
+        self.assertEqual(before.wall_ns, wall_ns + now - monotonic_ns)
+        self.assertEqual(after.wall_ns, before.wall_ns + 10**9)
+
+    def test_smaller_than_text(self):
+        renderer = Renderer()
+        writer = RecordWriter(self.path)
+        for i in range(1000):
+            writer.write(LogLevel.INFO, time.monotonic_ns(), ">", LazyArguments("fact", (i,), {}, renderer), 1)
+        writer.close()
+
+        text_path = os.path.join(self.directory.name, "test.log")
+        self.assertEqual(convert_to_text(self.path, text_path), 1000)
+        self.assertLess(os.path.getsize(self.path) * 2, os.path.getsize(text_path))
+
+
+class TestRecordBatcher(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "test.tbr")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def batches(self, size):
+        with open(self.path, "rb") as file:
+            data = file.read()[len(MAGIC) :]
+        batcher = RecordBatcher()
+        batches = []
+        while data:
+            end = RecordBatcher.cut(data[:size]) or RecordBatcher.cut(data)
+            batches.append(batcher.encode(data[:end]))
+            batcher.consume(data[:end])
+            data = data[end:]
+        return batches
+
+    def test_batches_hold_the_same_records(self):
+        renderer = Renderer()
+        now = time.monotonic_ns()
+        for session in range(2):
+            writer = RecordWriter(self.path)
+            for i in range(20):
+                writer.write(LogLevel.INFO, now + i * 1000, ">", LazyArguments(f"f{i % 3}", (i,), {}, renderer), i % 2)
+                writer.write(
+                    LogLevel.INFO, now + i * 1500, "<", LazyResult(f"f{i % 3}", i, renderer, 2000 + i, 1000), i % 2
+                )
+            writer.close()
+
+        expected = list(read_records(self.path))
+        for size in (1, 40, 1 << 20):
+            batches = self.batches(size)
+            records = [record for batch in batches for record in read_batch(batch)]
+            self.assertEqual(records, expected)
+        self.assertEqual(len(self.batches(1 << 20)), 1)
+        with self.assertRaises(ValueError):
+            read_batch(b"nope")
+
+    def test_json(self):
+        renderer = Renderer()
+        writer = RecordWriter(self.path)
+        writer.write(LogLevel.INFO, time.monotonic_ns(), ">", LazyArguments("fact", (5,), {}, renderer), 7)
+        writer.write(LogLevel.INFO, time.monotonic_ns(), "<", LazyResult("fact", 120, renderer, 1_500_000, 250_000), 7)
+        writer.close()
+
+        enter, exit = [record.to_json() for record in read_batch(self.batches(1 << 20)[0])]
+        self.assertEqual((enter["function"], enter["args"], enter["kwargs"]), ("fact", "(5,)", "{}"))
+        self.assertEqual((exit["message"], exit["duration_ns"], exit["cpu_ns"]), ("120", 1_500_000, 250_000))
+        self.assertRegex(exit["timestamp"], r"\.\d{6}$")
+
+    def test_smaller_than_text(self):
+        renderer = Renderer()
+        writer = RecordWriter(self.path)
+        lines = []
+        for i in range(2000):
+            arguments = LazyArguments("fetch_user", (i,), {}, renderer)
+            result = LazyResult("fetch_user", {"id": i}, renderer, i * 7919 % 10**7, i * 104729 % 10**6)
+            for operation, message in ((">", arguments), ("<", result)):
+                writer.write(LogLevel.DEBUG, time.monotonic_ns(), operation, message, 1)
+                lines.append(f"[DEBUG] {current_timestamp()} {operation} {message}")
+        writer.close()
+
+        text = "\n".join(lines).encode()
+        batch = self.batches(1 << 24)[0]
+        self.assertLess(len(batch), len(text) / 2)
+
+
+class TestRecordSink(unittest.TestCase):
+    def test_logger_writes_records(self):
+        with tempfile.TemporaryDirectory() as directory:
+            record_path = os.path.join(directory, "test.tbr")
+            logger = Logger(
+                Config(
+                    output="file",
+                    log_level=LogLevel.INFO,
+                    file_path=os.path.join(directory, "test.log"),
+                    web_config=WebUIConfig(is_active=False),
+                    record_file_path=record_path,
+                )
+            )
+
+            @logger.trace()
+            def add(a, b):
+                return a + b
+
+            class Other:
+                @logger.trace()
+                def add(self, a, b):
+                    return a - b
+
+            add(1, 2)
+            Other().add(1, 2)
+            thread = threading.Thread(target=add, args=(3, 4))
+            thread.start()
+            thread.join()
+            logger.logger.close()
+
+            records = list(read_records(record_path))
+            self.assertEqual([record.operation for record in records], [">", "<"] * 3)
+            self.assertEqual(records[1].message, "3")
+            self.assertIsNotNone(records[1].duration_ns)
+            self.assertEqual(records[4].thread_id, thread.ident)
+            self.assertNotEqual(records[0].thread_id, records[4].thread_id)
+
+            add_function, other_function = records[0].function, records[2].function
+            self.assertEqual(add_function.qualname, "TestRecordSink.test_logger_writes_records.<locals>.add")
+            self.assertEqual(other_function.name, "add")
+            self.assertNotEqual(add_function.id, other_function.id)
+            self.assertEqual(records[4].function, add_function)
+            self.assertEqual(add_function.file, __file__)
+
+    def test_exception_records_keep_function_id(self):
+        with tempfile.TemporaryDirectory() as directory:
+            record_path = os.path.join(directory, "test.tbr")
+            logger = Logger(
+                Config(
+                    output="file",
+                    log_level=LogLevel.INFO,
+                    file_path=os.path.join(directory, "test.log"),
+                    web_config=WebUIConfig(is_active=False),
+                    record_file_path=record_path,
+                )
+            )
+
+            class A:
+                @logger.trace()
+                def run(self):
+                    raise KeyError("a")
+
+            class B:
+                @logger.trace_exceptions()
+                def run(self):
+                    raise KeyError("b")
+
+            A().run()
+            with self.assertRaises(KeyError):
+                B().run()
+            logger.logger.close()
+
+            records = list(read_records(record_path))
+            self.assertEqual([record.operation for record in records], [">", "*", "<", "*"])
+            a_function, b_function = records[0].function, records[3].function
+            self.assertEqual(records[1].function, a_function)
+            self.assertEqual(records[2].function, a_function)
+            self.assertEqual(b_function.qualname, B.run.__qualname__)
+            self.assertNotEqual(a_function.id, b_function.id)
+
+    def test_converted_records_match_log(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "test.log")
+            record_path = os.path.join(directory, "test.tbr")
+            logger = Logger(
+                Config(
+                    output="file",
+                    log_level=LogLevel.INFO,
+                    file_path=path,
+                    web_config=WebUIConfig(is_active=False),
+                    max_log_entries=5000,
+                    record_file_path=record_path,
+                    timestamp_precision="us",
+                )
+            )
+
+            @logger.trace()
+            def add(a, b):
+                return a + b
+
+            for i in range(1000):
+                add(i, 1)
+            logger.info("done")
+            logger.logger.close()
+
+            text_path = os.path.join(directory, "converted.log")
+            self.assertEqual(convert_to_text(record_path, text_path, "us"), 2001)
+            with open(path) as file:
+                logged = file.read().splitlines()[1:]
+            with open(text_path) as file:
+                converted = file.read().splitlines()
+            self.assertEqual(converted, logged)
+
+
+if __name__ == "__main__":
+    unittest.main()
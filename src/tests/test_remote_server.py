@@ -0,0 +1,105 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+import requests
+
+from tracebook.config import Config, LogLevel, RemoteConfig, WebUIConfig
+from tracebook.load_test import run_load_test
+from tracebook.records import RecordWriter
+from tracebook.remote_handler import RemoteShipper
+from tracebook.render import FunctionMessage, LazyArguments, Renderer
+from tracebook.remote_server import CollectorServer
+
+
+class TestCollectorServer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.collector = CollectorServer(os.path.join(self.directory.name, "collected"), port=0)
+        self.collector.start()
+
+    def tearDown(self):
+        self.collector.close()
+        self.directory.cleanup()
+
+    def stored(self):
+        self.collector.flush()
+        records = []
+        for path in self.collector.segments():
+            with open(path) as file:
+                records.extend(json.loads(line) for line in file)
+        return records
+
+    def test_stores_every_payload(self):
+        lines = ["[INFO] 2024-08-13 14:21:50 > fact (5,) {}", "[ERROR] 2024-08-13 14:21:50 * fact boom"]
+        for index, (payload, compression) in enumerate([("text", "gzip"), ("ndjson", None), ("binary", "gzip")]):
+            path = os.path.join(self.directory.name, f"{payload}.log")
+            with open(path, "w") as file:
+                file.write("\n".join(lines) + "\n")
+            record_path = os.path.join(self.directory.name, f"{payload}.tbr")
+            writer = RecordWriter(record_path)
+            writer.write(LogLevel.INFO, 0, ">", LazyArguments("fact", (5,), {}, Renderer()), 1)
+            writer.write(LogLevel.ERROR, 0, "*", FunctionMessage("fact", "boom"), 1)
+            writer.close()
+            config = Config(
+                file_path=path,
+                record_file_path=record_path,
+                remote_config=RemoteConfig(self.collector.url, {}, payload=payload, compression=compression),
+                web_config=WebUIConfig(is_active=False),
+            )
+            shipper = RemoteShipper(config)
+            self.assertEqual(shipper.ship(), 1)
+            shipper.close()
+
+        records = self.stored()
+        self.assertEqual(len(records), 6)
+        self.assertEqual(len({record["source"] for record in records}), 3)
+        for first, second in zip(records[::2], records[1::2]):
+            self.assertEqual((first["function"], first["args"]), ("fact", "(5,)"))
+            self.assertEqual((second["operation"], second["message"]), ("*", "boom"))
+        self.assertEqual(self.collector.stats()["batches"], 3)
+
+    def test_duplicate_batches_are_stored_once(self):
+        headers = {"Content-Type": "application/x-ndjson", "Idempotency-Key": "abc-0"}
+        for _ in range(2):
+            response = requests.post(self.collector.url, data=b'{"text": "once"}\n', headers=headers)
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual([record["text"] for record in self.stored()], ["once"])
+        stats = requests.get(self.collector.url + "stats").json()
+        self.assertEqual((stats["batches"], stats["records"], stats["duplicates"]), (1, 1, 1))
+
+    def test_rejects_bad_batches(self):
+        response = requests.post(self.collector.url, data=b"x", headers={"Content-Type": "application/xml"})
+        self.assertEqual(response.status_code, 415)
+        response = requests.post(
+            self.collector.url, data=b"not gzip", headers={"Content-Type": "text/plain", "Content-Encoding": "gzip"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stored(), [])
+
+    def test_segments_roll_over(self):
+        self.collector.segment_bytes = 100
+        for sequence in range(5):
+            body = gzip.compress(b"a line that is long enough to fill a segment\n" * 3)
+            headers = {"Content-Type": "text/plain", "Content-Encoding": "gzip", "Idempotency-Key": f"abc-{sequence}"}
+            requests.post(self.collector.url, data=body, headers=headers)
+
+        self.assertEqual(len(self.collector.segments()), 5)
+        self.assertEqual(len(self.stored()), 15)
+
+
+class TestLoadTest(unittest.TestCase):
+    def test_every_record_arrives(self):
+        # Enough records for the log files to be compacted while shipping.
+        result = run_load_test(loggers=2, records=1500, payload="binary", max_latency=0.01)
+        self.assertEqual((result["sent"], result["received"]), (3000, 3000))
+        self.assertGreater(result["records_per_second"], 0)
+        self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        self.assertLessEqual(result["p99_ms"], result["max_ms"])
+
+
+if __name__ == "__main__":
+    unittest.main()
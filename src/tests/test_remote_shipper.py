@@ -0,0 +1,400 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tracebook.config import AsyncConfig, Config, LogLevel, RemoteConfig, WebUIConfig
+from tracebook.log_collector import CollectorClient, LogCollector
+from tracebook.log_store import RingLogStore
+from tracebook.logger import Logger
+from tracebook.records import RecordWriter, read_batch, read_records
+from tracebook.remote_handler import RemoteShipper
+from tracebook.render import FunctionMessage
+
+
+class CollectorStub:
+    """
+    Local HTTP server recording the requests it receives.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.clients = []
+        self.status = 200
+        self.delay = 0.0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                time.sleep(stub.delay)
+                stub.requests.append((dict(self.headers), body))
+                stub.clients.append(self.client_address)
+                self.send_response(stub.status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/upload"
+        threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True).start()
+
+    def bodies(self):
+        return [gzip.decompress(body).decode() for _, body in self.requests]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestRemoteShipper(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "test.log")
+        self.collector = CollectorStub()
+        self.config = Config(
+            file_path=self.path,
+            remote_config=RemoteConfig(self.collector.url, {"Authorization": "token"}),
+            web_config=WebUIConfig(is_active=False),
+        )
+
+    def tearDown(self):
+        self.collector.close()
+        self.directory.cleanup()
+
+    def configure(self, **options):
+        self.config.remote_config = RemoteConfig(self.collector.url, {"Authorization": "token"}, **options)
+        return self.config
+
+    def write(self, text):
+        with open(self.path, "a") as file:
+            file.write(text)
+
+    def test_ships_only_new_lines(self):
+        self.write("one\ntwo\npartial")
+        shipper = RemoteShipper(self.config)
+        self.assertEqual(shipper.ship(), 1)
+        self.write(" line\nthree\n")
+        shipper.ship()
+        self.assertEqual(shipper.ship(), 0)
+        shipper.close()
+
+        self.assertEqual(self.collector.bodies(), ["one\ntwo\n", "partial line\nthree\n"])
+        headers = self.collector.requests[1][0]
+        self.assertEqual((headers["Content-Encoding"], headers["Authorization"]), ("gzip", "token"))
+        self.assertEqual((headers["X-TraceBook-Sequence"], headers["X-TraceBook-Offset"]), ("1", "8"))
+
+    def test_resumes_after_restart(self):
+        self.write("one\n")
+        shipper = RemoteShipper(self.config)
+        shipper.ship()
+        shipper.close()
+        self.write("two\n")
+        shipper = RemoteShipper(self.config)
+        shipper.ship()
+        shipper.close()
+        self.assertEqual(self.collector.bodies(), ["one\n", "two\n"])
+        self.assertEqual(shipper.sequence, 2)
+
+    def test_batches_are_bounded(self):
+        self.write("".join(f"line {i}\n" for i in range(100)))
+        shipper = RemoteShipper(self.configure(max_batch_bytes=64))
+        shipper.ship()
+        shipper.close()
+        bodies = self.collector.bodies()
+        self.assertGreater(len(bodies), 10)
+        self.assertTrue(all(len(body) <= 64 for body in bodies))
+        self.assertEqual("".join(bodies), "".join(f"line {i}\n" for i in range(100)))
+
+    def test_failed_batch_is_retried_after_backoff(self):
+        self.write("one\n")
+        self.collector.status = 500
+        shipper = RemoteShipper(self.config, min_backoff=60)
+        self.assertEqual(shipper.ship(), 0)
+        self.collector.status = 200
+        self.assertEqual(shipper.ship(), 0)
+        self.assertEqual(len(self.collector.requests), 1)
+
+        shipper._retry_at = 0
+        self.assertEqual(shipper.ship(), 1)
+        shipper.close()
+        self.assertEqual(self.collector.bodies(), ["one\n", "one\n"])
+        keys = [headers["Idempotency-Key"] for headers, _ in self.collector.requests]
+        self.assertEqual(keys[0], keys[1])
+        self.assertEqual(keys[0], f"{shipper.source}-0")
+
+    def test_rejected_batch_is_dropped(self):
+        self.write("one\n")
+        self.collector.status = 413
+        shipper = RemoteShipper(self.configure(max_batch_bytes=4), min_backoff=60)
+        self.write("two\n")
+        self.assertEqual(shipper.ship(), 0)
+        self.assertEqual(len(self.collector.requests), 2)
+        self.assertEqual(shipper.dropped, 2)
+
+        self.collector.status = 429
+        self.write("three\n")
+        self.assertEqual(shipper.ship(), 0)
+        self.assertEqual(shipper.dropped, 2)
+        self.collector.status = 200
+        shipper._retry_at = 0
+        self.assertEqual(shipper.ship(), 1)
+        shipper.close()
+        self.assertEqual(self.collector.bodies(), ["one\n", "two\n", "three\n", "three\n"])
+
+    def test_compacted_file_is_not_shipped_again(self):
+        store = RingLogStore(self.path, max_entries=3)
+        store.extend(["a", "b", "c", "d"])
+        shipper = RemoteShipper(self.config)
+        shipper.ship()
+        store.extend(["e", "f"])
+        store.flush()
+        self.assertEqual(store.tail(), ["d", "e", "f"])
+        shipper.ship()
+        shipper.close()
+        store.close()
+        self.assertEqual("".join(self.collector.bodies()), "a\nb\nc\nd\ne\nf\n")
+
+    def test_repeated_lines_after_compaction_are_shipped(self):
+        store = RingLogStore(self.path, max_entries=2)
+        store.extend(["a", "tick"])
+        shipper = RemoteShipper(self.config)
+        shipper.ship()
+        store.extend(["b", "tick"])
+        store.extend(["new1", "tick"])
+        shipper.ship()
+        shipper.close()
+        store.close()
+        self.assertEqual("".join(self.collector.bodies()), "a\ntick\nb\ntick\nnew1\ntick\n")
+
+    def test_logger_ships_on_exception(self):
+        self.write("before\n")
+        logger = Logger(
+            Config(
+                output="file",
+                log_level=LogLevel.INFO,
+                file_path=self.path,
+                remote_config=RemoteConfig(self.collector.url, {}),
+                web_config=WebUIConfig(is_active=False),
+            )
+        )
+
+        @logger.trace()
+        def fail():
+            raise KeyError("boom")
+
+        for _ in range(3):
+            fail()
+        logger.logger.close()
+
+        text = "".join(self.collector.bodies())
+        self.assertTrue(text.startswith("before\n=== Starting TraceBook"))
+        self.assertEqual(text.count("boom"), 3)
+        self.assertLess(len(self.collector.requests), 4)
+
+    def test_exception_only_requests_a_push(self):
+        logger = Logger(
+            Config(
+                output="file",
+                log_level=LogLevel.INFO,
+                file_path=self.path,
+                remote_config=RemoteConfig(self.collector.url, {}),
+                web_config=WebUIConfig(is_active=False),
+                async_config=AsyncConfig(use=True, flush_interval=60),
+            )
+        )
+
+        @logger.trace()
+        def fail():
+            raise KeyError("boom")
+
+        fail()
+        # Still queued: the raising thread does not write the records itself.
+        self.assertGreater(len(logger.logger.writer._queue), 0)
+        deadline = time.monotonic() + 10
+        while "boom" not in "".join(self.collector.bodies()) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        text = "".join(self.collector.bodies())
+        logger.logger.close()
+        self.assertIn("fail remote push requested", text)
+
+    def test_lines_are_shipped_at_exit(self):
+        script = textwrap.dedent(
+            f"""
+            from tracebook.config import Config, LogLevel, RemoteConfig, WebUIConfig
+            from tracebook.logger import Logger
+
+            logger = Logger(
+                Config(
+                    output="file",
+                    log_level=LogLevel.INFO,
+                    file_path={self.path!r},
+                    remote_config=RemoteConfig({self.collector.url!r}, {{}}),
+                    web_config=WebUIConfig(is_active=False),
+                )
+            )
+            logger.info("last words")
+            """
+        )
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, "-c", script], check=True, cwd=package_root, timeout=30)
+        self.assertIn("last words", "".join(self.collector.bodies()))
+
+    def test_spool_survives_outage_and_restart(self):
+        self.write("one\n")
+        self.collector.status = 500
+        shipper = RemoteShipper(self.config, min_backoff=60)
+        shipper.ship()
+        shipper.close()
+        self.assertEqual(len(os.listdir(shipper.spool)), 1)
+
+        self.collector.status = 200
+        self.write("two\n")
+        shipper = RemoteShipper(self.config)
+        self.assertEqual(shipper.ship(), 2)
+        shipper.close()
+        self.assertEqual(self.collector.bodies()[-2:], ["one\n", "two\n"])
+        self.assertEqual(self.collector.requests[-2][0]["X-TraceBook-Sequence"], "0")
+        self.assertEqual(os.listdir(shipper.spool), [])
+
+    def test_spool_is_bounded(self):
+        self.write("".join(f"line {i}\n" for i in range(100)))
+        self.collector.status = 500
+        shipper = RemoteShipper(self.configure(max_batch_bytes=64), max_spool_bytes=500, min_backoff=60)
+        shipper.ship()
+        shipper.close()
+        sizes = [os.path.getsize(os.path.join(shipper.spool, name)) for name in os.listdir(shipper.spool)]
+        self.assertLessEqual(sum(sizes), 500)
+        self.assertGreater(shipper.dropped, 0)
+
+    def test_background_delivery_does_not_block(self):
+        self.collector.delay = 0.2
+        shipper = RemoteShipper(self.configure(max_latency=0.05))
+        shipper.start()
+        start = time.monotonic()
+        for i in range(20):
+            self.write(f"line {i}\n")
+            shipper.request()
+        self.assertLess(time.monotonic() - start, 0.1)
+
+        deadline = time.monotonic() + 5
+        while os.path.getsize(self.path) > shipper.offset and time.monotonic() < deadline:
+            time.sleep(0.01)
+        shipper.close()
+        self.assertEqual("".join(self.collector.bodies()), "".join(f"line {i}\n" for i in range(20)))
+        self.assertLessEqual(len(self.collector.requests), 3)
+
+    def test_connection_is_reused(self):
+        shipper = RemoteShipper(self.config)
+        for i in range(3):
+            self.write(f"line {i}\n")
+            shipper.ship()
+        shipper.close()
+        self.assertEqual(len(self.collector.clients), 3)
+        self.assertEqual(len(set(self.collector.clients)), 1)
+
+
+    def test_ndjson_payload(self):
+        self.write("[INFO] 2024-08-13 14:21:50 > fact (5,) {}\nnot a record\n")
+        shipper = RemoteShipper(self.configure(payload="ndjson", compression=None))
+        shipper.ship()
+        shipper.close()
+
+        headers, body = self.collector.requests[0]
+        self.assertEqual(headers["Content-Type"], "application/x-ndjson")
+        self.assertNotIn("Content-Encoding", headers)
+        first, second = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual((first["level"], first["function"], first["args"]), ("INFO", "fact", "(5,)"))
+        self.assertEqual(second, {"text": "not a record"})
+
+    def test_binary_payload(self):
+        self.config.record_file_path = os.path.join(self.directory.name, "test.tbr")
+        shipper = RemoteShipper(self.configure(payload="binary", max_batch_bytes=200))
+        writer = RecordWriter(self.config.record_file_path)
+        for i in range(50):
+            writer.write(LogLevel.ERROR, time.monotonic_ns(), "*", FunctionMessage(f"f{i % 3}", f"boom {i}"), i % 2)
+            if i == 25:
+                writer.flush()
+                shipper.ship()
+        writer.close()
+        shipper.ship()
+        shipper.close()
+
+        self.assertGreater(len(self.collector.requests), 2)
+        records = []
+        for headers, body in self.collector.requests:
+            self.assertEqual(headers["Content-Type"], "application/vnd.tracebook.records")
+            records.extend(read_batch(gzip.decompress(body)))
+        self.assertEqual(records, list(read_records(self.config.record_file_path)))
+
+    def test_binary_payload_needs_a_record_file(self):
+        with self.assertRaises(ValueError):
+            RemoteShipper(self.configure(payload="binary"))
+
+    def test_max_latency_ships_without_requests(self):
+        shipper = RemoteShipper(self.configure(max_latency=0.02))
+        shipper.start()
+        self.write("one\n")
+        deadline = time.monotonic() + 5
+        while not self.collector.requests and time.monotonic() < deadline:
+            time.sleep(0.01)
+        shipper.close()
+        self.assertEqual(self.collector.bodies(), ["one\n"])
+
+    def test_background_thread_survives_errors(self):
+        shipper = RemoteShipper(self.configure(max_latency=0.02), min_backoff=0.01, max_backoff=0.05)
+        shipper.start()
+        # A file in place of the spool directory makes collecting fail.
+        os.rmdir(shipper.spool)
+        with open(shipper.spool, "w"):
+            pass
+        self.write("one\n")
+        shipper.request()
+        time.sleep(0.2)
+        self.assertTrue(shipper._thread.is_alive())
+
+        os.remove(shipper.spool)
+        os.mkdir(shipper.spool)
+        deadline = time.monotonic() + 5
+        while not self.collector.requests and time.monotonic() < deadline:
+            time.sleep(0.01)
+        shipper.close()
+        self.assertEqual(self.collector.bodies(), ["one\n"])
+
+    def test_collector_is_the_only_shipper(self):
+        collector = LogCollector(self.path, idle_timeout=0.2, remote_config=RemoteConfig(self.collector.url, {}))
+        self.assertTrue(collector.bind())
+        thread = threading.Thread(target=collector.serve, daemon=True)
+        thread.start()
+        clients = [CollectorClient(self.path) for _ in range(3)]
+        for index, client in enumerate(clients):
+            client.append(f"client {index}")
+        clients[0].append("[ERROR] 2024-08-13 14:21:50 * fact boom")
+        for client in clients:
+            client.close()
+        thread.join(5)
+
+        lines = "".join(self.collector.bodies()).splitlines()
+        self.assertEqual(
+            sorted(lines), ["[ERROR] 2024-08-13 14:21:50 * fact boom", "client 0", "client 1", "client 2"]
+        )
+        self.assertEqual(len({headers["X-TraceBook-Source"] for headers, _ in self.collector.requests}), 1)
+
+    def test_unknown_payload(self):
+        with self.assertRaises(ValueError):
+            RemoteShipper(self.configure(payload="xml"))
+
+
+if __name__ == "__main__":
+    unittest.main()
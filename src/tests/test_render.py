@@ -0,0 +1,78 @@
+import unittest
+
+from tracebook.render import FunctionMessage, LazyArguments, LazyResult, Renderer, render_message
+
+
+class TestRenderer(unittest.TestCase):
+    def test_matches_plain_format_for_small_values(self):
+        renderer = Renderer()
+        self.assertEqual(renderer.render_arguments((5,), {}), "(5,) {}")
+        self.assertEqual(
+            renderer.render_arguments(("arg1",), {"kwarg1": "value1"}),
+            "('arg1',) {'kwarg1': 'value1'}",
+        )
+        self.assertEqual(renderer.render_result(120), "120")
+        self.assertEqual(renderer.render_result("text"), "text")
+
+    def test_limits_items_and_depth(self):
+        renderer = Renderer(max_items=3, max_depth=2)
+        self.assertEqual(renderer.render(list(range(100))), "[0, 1, 2, ...]")
+        self.assertEqual(renderer.render([[[1]]]), "[[[...]]]")
+
+    def test_limits_chars(self):
+        renderer = Renderer(max_chars=20)
+        self.assertLessEqual(len(renderer.render_result("x" * 1000)), 20)
+        self.assertLessEqual(len(renderer.render({"key": "y" * 1000})), 20)
+        rendered = renderer.render(b"z" * 1000)
+        self.assertIn("<1000 bytes>", rendered)
+
+    def test_formatters(self):
+        class Frame:
+            pass
+
+        class SubFrame(Frame):
+            pass
+
+        renderer = Renderer(formatters={Frame: lambda frame: "<frame>"})
+        self.assertEqual(renderer.render([SubFrame()]), "[<frame>]")
+        renderer.register(int, lambda value: "<int>")
+        self.assertEqual(renderer.render((1,)), "(<int>,)")
+
+
+class TestLazyRendering(unittest.TestCase):
+    def test_rendering_is_deferred(self):
+        calls = []
+        renderer = Renderer(formatters={int: lambda value: calls.append(value) or str(value)})
+
+        arguments = LazyArguments("add", (1, 2), {}, renderer)
+        result = LazyResult("add", 3, renderer)
+        self.assertEqual(calls, [])
+
+        self.assertEqual(str(arguments), "add (1, 2) {}")
+        self.assertEqual(str(result), "add 3")
+        self.assertEqual(calls, [1, 2, 3])
+
+    def test_result_timing(self):
+        result = LazyResult("add", 3, Renderer(), duration_ns=1_500_000, cpu_ns=250_000)
+        self.assertEqual(result.duration_ns, 1_500_000)
+        self.assertEqual(str(result), "add 3 [duration=1.500000ms cpu_time=0.250000ms]")
+
+    def test_render_message(self):
+        renderer = Renderer()
+        arguments = render_message(LazyArguments("add", (1, 2), {}, renderer, function_id=4))
+        self.assertEqual((str(arguments), arguments.args, arguments.function_id), ("add (1, 2) {}", "(1, 2)", 4))
+        result = render_message(LazyResult("add", 3, renderer, duration_ns=1_500_000, cpu_ns=250_000))
+        self.assertEqual(result.render_payload(), "3")
+        self.assertEqual(str(result), "add 3 [duration=1.500000ms cpu_time=0.250000ms]")
+        self.assertEqual(str(render_message(FunctionMessage("add", "boom"))), "add boom")
+        self.assertEqual(render_message("plain"), "plain")
+
+    def test_unrenderable_message(self):
+        renderer = Renderer(formatters={int: lambda value: 1 / 0})
+        rendered = render_message(LazyResult("add", 3, renderer, function_id=2))
+        self.assertEqual(str(rendered), "add <unrenderable: ZeroDivisionError('division by zero')>")
+        self.assertEqual(rendered.function_id, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import time
+import unittest
+
+from tracebook.config import Config, LogLevel, WebUIConfig
+from tracebook.logger import Logger
+from tracebook.resource_probe import ResourceDetails, get_process, read_sample
+from tracebook.resource_sampler import ResourceSampler
+
+
+class TestResourceProbe(unittest.TestCase):
+    def test_process_handle_is_cached(self):
+        self.assertIs(get_process(), get_process())
+        self.assertEqual(get_process().pid, os.getpid())
+
+    def test_read_sample(self):
+        sample = read_sample()
+        self.assertGreaterEqual(sample.cpu_percent, 0.0)
+        self.assertGreater(sample.rss, 0)
+        self.assertGreaterEqual(sample.num_threads, 1)
+        self.assertGreater(sample.cpu_time, 0.0)
+        self.assertAlmostEqual(sample.rss_mb, sample.rss / 1024 ** 2)
+
+    def test_resource_details(self):
+        sample = read_sample()._replace(cpu_percent=7.4, rss=47 * 1024 ** 2, num_threads=3)
+        self.assertEqual(
+            str(ResourceDetails(sample, 500_000_000)),
+            "7.40% 47.00 MB threads=3 cpu_time=0.500000s",
+        )
+
+
+class TestResourceSampler(unittest.TestCase):
+    def test_latest_sample(self):
+        sampler = ResourceSampler(interval=0.01)
+        sample = sampler.latest()
+        sampler.stop()
+        self.assertGreater(sample.rss, 0)
+        self.assertGreaterEqual(sample.num_threads, 1)
+
+    def test_trace_resources_does_not_block(self):
+        with tempfile.TemporaryDirectory() as directory:
+            logger = Logger(
+                Config(
+                    output="file",
+                    log_level=LogLevel.INFO,
+                    file_path=os.path.join(directory, "test.log"),
+                    web_config=WebUIConfig(is_active=False),
+                )
+            )
+
+            @logger.trace(log_resources=True)
+            def fibonacci(n):
+                return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)
+
+            start = time.perf_counter()
+            self.assertEqual(fibonacci(8), 21)
+            self.assertLess(time.perf_counter() - start, 1.0)
+
+            details = [line for line in logger.logger.store.tail() if " | " in line]
+            self.assertRegex(details[-1], r"\| \d+\.\d+% \d+\.\d+ MB threads=\d+ cpu_time=")
+            logger.logger.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
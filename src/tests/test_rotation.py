@@ -0,0 +1,119 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from tracebook.config import Config, LogLevel, RotationConfig, WebUIConfig
+from tracebook.logger import Logger
+from tracebook.rotation import RotatingLogStore, find_segments, index_path, read_segment
+
+
+class TestRotatingLogStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "test.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def segments(self):
+        with open(index_path(self.file_path)) as file:
+            return json.load(file)["segments"]
+
+    def test_rotates_by_size_and_compresses(self):
+        store = RotatingLogStore(self.file_path, max_entries=5, max_bytes=100, retention=10)
+        lines = [f"line {i:03d} " + "x" * 10 for i in range(30)]
+        for line in lines:
+            store.append(line)
+        store.close()
+
+        segments = self.segments()
+        self.assertGreater(len(segments), 1)
+        self.assertTrue(all(segment["file"].endswith(".gz") for segment in segments))
+        self.assertFalse(any(name.endswith((".tmp", "0")) for name in os.listdir(self.directory.name)))
+
+        read = []
+        for path in find_segments(self.file_path):
+            read.extend(read_segment(path))
+        self.assertEqual(read, lines)
+        self.assertEqual(store.tail(), lines[-5:])
+
+    def test_size_counts_bytes(self):
+        store = RotatingLogStore(self.file_path, max_bytes=100, compression=None)
+        for _ in range(6):
+            store.append("é" * 20)
+        store.close()
+
+        for segment in self.segments():
+            path = os.path.join(self.directory.name, segment["file"])
+            self.assertEqual(segment["bytes"], os.path.getsize(path))
+            self.assertLessEqual(segment["bytes"], 100 + 41)
+
+    def test_retention(self):
+        store = RotatingLogStore(self.file_path, max_bytes=10, retention=2, compression=None)
+        for i in range(6):
+            store.append(f"segment {i}")
+        store.close()
+
+        segments = self.segments()
+        self.assertEqual([segment["file"] for segment in segments], ["test.log.000004", "test.log.000005"])
+        self.assertEqual(len(os.listdir(self.directory.name)), 4)
+
+    def test_rotates_by_age_and_finds_time_range(self):
+        store = RotatingLogStore(self.file_path, max_age=60, compression=None)
+        with patch("tracebook.rotation.time.time", return_value=1000.0):
+            store.append("first")
+        with patch("tracebook.rotation.time.time", return_value=1030.0):
+            store.append("second")
+        with patch("tracebook.rotation.time.time", return_value=1100.0):
+            store.append("third")
+        store.close()
+
+        self.assertEqual(self.segments()[0]["start"], 1000.0)
+        self.assertEqual(self.segments()[0]["end"], 1030.0)
+        old, = find_segments(self.file_path, start=900, end=1050)
+        self.assertEqual(read_segment(old), ["first", "second"])
+        self.assertEqual(find_segments(self.file_path, start=1090), [self.file_path])
+
+    def test_continues_active_segment(self):
+        store = RotatingLogStore(self.file_path, max_bytes=1000)
+        store.append("before restart")
+        store.close()
+        store = RotatingLogStore(self.file_path, max_bytes=1000)
+        store.append("after restart")
+        store.close()
+        self.assertEqual(read_segment(self.file_path), ["before restart", "after restart"])
+        self.assertEqual(store.tail(), ["before restart", "after restart"])
+
+
+class TestRotationConfig(unittest.TestCase):
+    def test_off_by_default(self):
+        self.assertFalse(RotationConfig().use)
+        self.assertFalse(Config(web_config=WebUIConfig(is_active=False)).rotation_config.use)
+
+    def test_logger_keeps_rotated_history(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "test.log")
+            logger = Logger(
+                Config(
+                    output="file",
+                    log_level=LogLevel.INFO,
+                    file_path=file_path,
+                    max_log_entries=5,
+                    web_config=WebUIConfig(is_active=False),
+                    rotation_config=RotationConfig(use=True, max_bytes=500),
+                )
+            )
+            for i in range(100):
+                logger.info(f"message {i}")
+            logger.logger.close()
+
+            lines = [line for path in find_segments(file_path, end=time.time()) for line in read_segment(path)]
+            self.assertEqual(len(lines), 101)
+            self.assertTrue(lines[-1].endswith("message 99"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from tracebook.config import Config, LogLevel, WebUIConfig
+from tracebook.logger import Logger
+from tracebook.sampling import OneInN, Probability, TokenBucket
+
+
+class TestSamplingPolicies(unittest.TestCase):
+    def test_one_in_n(self):
+        policy = OneInN(3).bind()
+        decisions = [policy.sample() for _ in range(7)]
+        self.assertEqual(decisions, [True, False, False, True, False, False, True])
+        self.assertEqual(policy.counts(), {"sampled": 3, "skipped": 4})
+
+    def test_probability(self):
+        policy = Probability(0.25).bind()
+        with patch("tracebook.sampling.random.random", side_effect=[0.1, 0.5, 0.2, 0.9]):
+            decisions = [policy.sample() for _ in range(4)]
+        self.assertEqual(decisions, [True, False, True, False])
+
+    def test_token_bucket(self):
+        with patch("tracebook.sampling.monotonic", return_value=100.0):
+            policy = TokenBucket(rate=2, burst=2).bind()
+            decisions = [policy.sample() for _ in range(3)]
+        self.assertEqual(decisions, [True, True, False])
+        with patch("tracebook.sampling.monotonic", return_value=100.5):
+            self.assertTrue(policy.sample())
+            self.assertFalse(policy.sample())
+
+    def test_bind_resets_state(self):
+        template = OneInN(2)
+        first = template.bind()
+        first.sample()
+        second = template.bind()
+        self.assertEqual(second.counts(), {"sampled": 0, "skipped": 0})
+        self.assertTrue(second.sample())
+        self.assertIsNot(first._lock, second._lock)
+
+    def test_counts_from_many_threads(self):
+        policies = [OneInN(4).bind(), Probability(0.5).bind(), TokenBucket(rate=1000).bind()]
+
+        def run(policy):
+            for _ in range(5000):
+                policy.sample()
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for policy in policies:
+                threads = [threading.Thread(target=run, args=(policy,)) for _ in range(8)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        for policy in policies:
+            counts = policy.counts()
+            self.assertEqual(counts["sampled"] + counts["skipped"], 40000)
+        self.assertEqual(policies[0].counts(), {"sampled": 10000, "skipped": 30000})
+
+
+class TestSampledTrace(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.logger = Logger(
+            Config(
+                output="file",
+                log_level=LogLevel.INFO,
+                file_path=os.path.join(self.directory.name, "test.log"),
+                web_config=WebUIConfig(is_active=False),
+            )
+        )
+
+    def tearDown(self):
+        self.logger.logger.close()
+        self.directory.cleanup()
+
+    def logged(self):
+        return self.logger.logger.store.tail()[1:]
+
+    def test_skipped_calls_are_not_logged(self):
+        @self.logger.trace(sampling=OneInN(10))
+        def add(a, b):
+            return a + b
+
+        for i in range(20):
+            self.assertEqual(add(i, 1), i + 1)
+
+        self.assertEqual(len(self.logged()), 4)
+        self.assertEqual(
+            self.logger.sampling_stats(), {f"{__name__}.{add.__qualname__}": {"sampled": 2, "skipped": 18}}
+        )
+
+    def test_functions_with_the_same_name(self):
+        class C:
+            @self.logger.trace(sampling=OneInN(2))
+            def go(self):
+                pass
+
+        class D:
+            @self.logger.trace(sampling=OneInN(2))
+            def go(self):
+                pass
+
+        for _ in range(4):
+            C().go()
+        D().go()
+
+        self.assertEqual(
+            self.logger.sampling_stats(),
+            {
+                f"{__name__}.{C.go.__qualname__}": {"sampled": 2, "skipped": 2},
+                f"{__name__}.{D.go.__qualname__}": {"sampled": 1, "skipped": 0},
+            },
+        )
+
+    def test_exceptions_of_skipped_calls(self):
+        @self.logger.trace(sampling=Probability(0.0))
+        def fail():
+            raise ValueError("boom")
+
+        @self.logger.trace(sampling=Probability(0.0, always_on_error=False), blocking=True)
+        def fail_quietly():
+            raise ValueError("quiet")
+
+        self.assertIsNone(fail())
+        with self.assertRaises(ValueError):
+            fail_quietly()
+
+        logs = self.logged()
+        self.assertEqual(len(logs), 1)
+        self.assertIn("* fail boom", logs[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import math
+import unittest
+
+from tracebook.config import WebUIConfig
+from tracebook.series import TimeSeries, lttb
+
+
+class TestTimeSeries(unittest.TestCase):
+    def test_keeps_most_recent_points(self):
+        series = TimeSeries(3)
+        self.assertEqual(series.points(), ([], []))
+        for i in range(5):
+            series.append(float(i), i * 10.0)
+
+        self.assertEqual(len(series), 3)
+        timestamps, values = series.view()
+        self.assertIsInstance(timestamps, memoryview)
+        self.assertEqual(timestamps.tolist(), [2.0, 3.0, 4.0])
+        self.assertEqual(values.tolist(), [20.0, 30.0, 40.0])
+
+    def test_points_are_downsampled(self):
+        series = TimeSeries(1000)
+        for i in range(1000):
+            series.append(float(i), 1.0)
+        x, y = series.points(50)
+        self.assertEqual(len(x), 50)
+        self.assertEqual((x[0], x[-1]), (0.0, 999.0))
+        self.assertEqual(len(series.points(2000)[0]), 1000)
+
+
+class TestLTTB(unittest.TestCase):
+    def test_keeps_peaks(self):
+        x = [float(i) for i in range(1000)]
+        y = [math.sin(i / 50) for i in range(1000)]
+        y[500] = 100.0
+        kept_x, kept_y = lttb(x, y, 100)
+        self.assertEqual(len(kept_x), 100)
+        self.assertEqual(kept_x, sorted(kept_x))
+        self.assertIn(500.0, kept_x)
+        self.assertEqual(max(kept_y), 100.0)
+
+    def test_short_series_unchanged(self):
+        self.assertEqual(lttb([1.0, 2.0], [3.0, 4.0], 10), ([1.0, 2.0], [3.0, 4.0]))
+        with self.assertRaises(ValueError):
+            lttb([1.0, 2.0], [3.0, 4.0], 2)
+
+    def test_config_needs_three_plot_points(self):
+        with self.assertRaises(ValueError):
+            WebUIConfig(is_active=False, max_plot_points=2)
+        series = TimeSeries(10)
+        for i in range(10):
+            series.append(float(i), float(i))
+        self.assertEqual(len(series.points(WebUIConfig(is_active=False, max_plot_points=3).max_plot_points)[0]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
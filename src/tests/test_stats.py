@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+
+from tracebook.config import Config, LogLevel, WebUIConfig
+from tracebook.logger import Logger
+from tracebook.stats import MAX_EXCEPTION_TYPES, FunctionStats, LatencyHistogram
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_error_bound(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 100_001):
+            histogram.record(value * 1000)
+
+        for percent in (50, 95, 99):
+            expected = percent * 1000 * 1000
+            self.assertAlmostEqual(histogram.percentile(percent), expected, delta=expected / 16)
+        self.assertEqual(histogram.min, 1000)
+        self.assertEqual(histogram.max, 100_000_000)
+
+    def test_small_values_are_exact(self):
+        histogram = LatencyHistogram()
+        for value in (3, 3, 3, 7):
+            histogram.record(value)
+        self.assertEqual(histogram.percentile(50), 3)
+        self.assertEqual(histogram.percentile(99), 7)
+
+    def test_memory_is_fixed(self):
+        histogram = LatencyHistogram()
+        size = len(histogram.counts)
+        histogram.record(2 ** 63)
+        histogram.record(0)
+        self.assertEqual(len(histogram.counts), size)
+        self.assertEqual(histogram.percentile(0), 0)
+
+    def test_empty(self):
+        self.assertEqual(LatencyHistogram().percentile(50), 0)
+
+
+class TestFunctionStats(unittest.TestCase):
+    def test_exception_types_are_bounded(self):
+        stats = FunctionStats("func")
+        for i in range(MAX_EXCEPTION_TYPES + 5):
+            stats.record(10, type(f"Error{i}", (Exception,), {})())
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot["errors"], MAX_EXCEPTION_TYPES + 5)
+        self.assertEqual(len(snapshot["exceptions"]), MAX_EXCEPTION_TYPES + 1)
+        self.assertEqual(snapshot["exceptions"]["other"], 5)
+
+
+class TestAggregateTrace(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.logger = Logger(
+            Config(
+                output="file",
+                log_level=LogLevel.INFO,
+                file_path=os.path.join(self.directory.name, "test.log"),
+                web_config=WebUIConfig(is_active=False),
+            )
+        )
+
+    def tearDown(self):
+        self.logger.logger.close()
+        self.directory.cleanup()
+
+    def test_stats_and_summary(self):
+        @self.logger.trace(aggregate=True, log_exceptions=False)
+        def divide(a, b):
+            return a / b
+
+        for i in range(100):
+            divide(i, 1)
+        self.assertIsNone(divide(1, 0))
+
+        stats = self.logger.stats()[f"{__name__}.{divide.__qualname__}"]
+        self.assertEqual(stats["calls"], 101)
+        self.assertEqual(stats["errors"], 1)
+        self.assertEqual(stats["exceptions"], {"ZeroDivisionError": 1})
+        self.assertLessEqual(stats["p50_ns"], stats["p99_ns"])
+
+        # Only the start line: no per-call records are written.
+        self.assertEqual(len(self.logger.logger.store.tail()), 1)
+
+        self.logger.logger.log_stats()
+        self.logger.logger.log_stats()
+        summaries = self.logger.logger.store.tail()[1:]
+        self.assertEqual(len(summaries), 1)
+        self.assertIn(f"| stats {__name__}.{divide.__qualname__} calls=101 errors=1", summaries[0])
+        self.assertIn("exceptions=ZeroDivisionError:1", summaries[0])
+
+    def test_functions_with_the_same_name(self):
+        class C:
+            @self.logger.trace(aggregate=True)
+            def go(self):
+                pass
+
+        class D:
+            @self.logger.trace(aggregate=True)
+            def go(self):
+                pass
+
+        for _ in range(4):
+            C().go()
+        D().go()
+
+        stats = self.logger.stats()
+        self.assertEqual(stats[f"{__name__}.{C.go.__qualname__}"]["calls"], 4)
+        self.assertEqual(stats[f"{__name__}.{D.go.__qualname__}"]["calls"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import json
+import threading
+import time
+import unittest
+
+from tracebook.config import Config, LogLevel, WebUIConfig
+from tracebook.dashboard import RealTimeDashboard
+from tracebook.event_bus import EventBus, LogEvent
+from tracebook.resource_probe import ResourceSample
+from tracebook.stream import DashboardStream
+
+
+def make_event(message):
+    return LogEvent(LogLevel.INFO, "2024-08-13 14:21:50", "|", None, message)
+
+
+class TestDashboardStream(unittest.TestCase):
+    def setUp(self):
+        self.events = EventBus()
+        self.metrics = EventBus(condition=self.events.condition)
+        self.stream = DashboardStream(self.events, self.metrics, max_points=10)
+
+    def test_read_since_cursor(self):
+        self.events.publish(make_event("old"))
+        cursor = self.stream.parse_cursor(None)
+        self.assertEqual(cursor, (1, 0))
+
+        self.events.publish(make_event("new"))
+        self.metrics.publish(ResourceSample(1.0, 12.5, 2 * 1024 ** 2, 3, 0.1))
+        message, cursor = self.stream.read(cursor)
+        self.assertEqual(cursor, (2, 1))
+        self.assertEqual(message["cursor"], "2-1")
+        self.assertEqual(message["records"], 1)
+        self.assertEqual(message["metrics"], [[1.0, 12.5, 2.0]])
+        self.assertEqual(self.stream.parse_cursor(message["cursor"]), cursor)
+
+    def test_wait_wakes_on_either_bus(self):
+        self.assertFalse(self.stream.wait((0, 0), 0.01))
+        timer = threading.Timer(0.02, self.metrics.publish, args=(ResourceSample(1.0, 1.0, 0, 1, 0.0),))
+        timer.start()
+        start = time.monotonic()
+        self.assertTrue(self.stream.wait((0, 0), 5))
+        self.assertLess(time.monotonic() - start, 1)
+        timer.join()
+
+    def test_server_sent_events_coalesce_bursts(self):
+        messages = self.stream.messages((0, 0))
+        self.assertEqual(next(messages), "retry: 1000\n\n")
+
+        def burst():
+            for i in range(5):
+                self.events.publish(make_event(f"message {i}"))
+
+        threading.Timer(0.02, burst).start()
+        event = next(messages)
+        lines = event.strip().split("\n")
+        self.assertEqual(lines[0], "id: 5-0")
+        message = json.loads(lines[1][len("data: ") :])
+        self.assertEqual(message["records"], 5)
+
+
+class TestStreamRoutes(unittest.TestCase):
+    def setUp(self):
+        self.bus = EventBus()
+        self.dashboard = RealTimeDashboard(Config(web_config=WebUIConfig(is_active=False)), self.bus)
+        self.client = self.dashboard.app.test_client()
+
+    def test_long_poll(self):
+        self.bus.publish(make_event("first"))
+        response = self.client.get("/tracebook/poll?cursor=0-0")
+        message = response.get_json()
+        self.assertEqual(message["cursor"], "1-0")
+        self.assertEqual(message["records"], 1)
+
+        threading.Timer(0.02, self.dashboard.add_resource_sample, args=(ResourceSample(2.0, 5.0, 0, 1, 0.0),)).start()
+        message = self.client.get(f"/tracebook/poll?cursor={message['cursor']}").get_json()
+        self.assertEqual((message["cursor"], message["metrics"]), ("1-1", [[2.0, 5.0, 0.0]]))
+
+    def test_event_stream_resumes_from_last_event_id(self):
+        self.bus.publish(make_event("seen"))
+        self.bus.publish(make_event("missed"))
+        response = self.client.get("/tracebook/stream", headers={"Last-Event-ID": "1-0"}, buffered=False)
+        self.assertEqual(response.mimetype, "text/event-stream")
+        self.assertEqual(response.headers["Cache-Control"], "no-cache")
+
+        chunks = iter(response.response)
+        self.assertEqual(next(chunks), b"retry: 1000\n\n")
+        message = json.loads(next(chunks).decode().split("data: ", 1)[1])
+        self.assertEqual(message["records"], 1)
+        response.close()
+
+    def test_script_and_polling_mode(self):
+        response = self.client.get("/tracebook/stream.js")
+        self.assertIn("EventSource", response.get_data(as_text=True))
+        # Only the cursor of new records reaches the log window callback.
+        inputs = {key: value["inputs"] for key, value in self.dashboard.dash_app.callback_map.items()}
+        self.assertEqual(inputs["..log-window.children...log-window-state.data.."], [{"id": "log-update", "property": "data"}])
+
+        polling = RealTimeDashboard(
+            Config(web_config=WebUIConfig(is_active=False, streaming=False)), EventBus()
+        )
+        response = polling.app.test_client().get("/tracebook/stream")
+        self.assertNotEqual(response.mimetype, "text/event-stream")
+
+
+if __name__ == "__main__":
+    unittest.main()
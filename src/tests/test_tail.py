@@ -0,0 +1,105 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from tracebook.log_store import RingLogStore
+from tracebook.rotation import RotatingLogStore
+from tracebook.tail import LogTail
+
+
+class TestLogTail(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "test.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_reads_new_complete_lines(self):
+        with open(self.file_path, "w") as file:
+            file.write("old\n")
+        tail = LogTail(self.file_path)
+        with open(self.file_path, "a") as file:
+            file.write("first\nsecond\npart")
+        self.assertEqual(tail.read_lines(), ["first", "second"])
+        with open(self.file_path, "a") as file:
+            file.write("ial\n")
+        self.assertEqual(tail.read_lines(), ["partial"])
+        self.assertEqual(tail.read_lines(), [])
+        tail.close()
+
+    def test_waits_for_missing_file(self):
+        tail = LogTail(self.file_path)
+        self.assertEqual(tail.read_lines(), [])
+        with open(self.file_path, "w") as file:
+            file.write("created\n")
+        self.assertEqual(tail.read_lines(), ["created"])
+        tail.close()
+
+    def test_follows_compaction_without_gaps_or_duplicates(self):
+        store = RingLogStore(self.file_path, max_entries=5)
+        tail = LogTail(self.file_path)
+        seen = []
+        for i in range(50):
+            store.append(f"line {i}")
+            if i % 3 == 0:
+                seen += tail.read_lines()
+        seen += tail.read_lines()
+        store.close()
+        tail.close()
+        self.assertEqual(seen, [f"line {i}" for i in range(50)])
+
+    def test_repeated_lines_after_compaction_are_read(self):
+        store = RingLogStore(self.file_path, max_entries=2)
+        tail = LogTail(self.file_path)
+        store.extend(["a", "tick"])
+        seen = tail.read_lines()
+        store.extend(["b", "tick"])
+        store.extend(["new1", "tick"])
+        seen += tail.read_lines()
+        store.close()
+        tail.close()
+        self.assertEqual(seen, ["a", "tick", "b", "tick", "new1", "tick"])
+
+    def test_follows_rotation(self):
+        store = RotatingLogStore(self.file_path, max_bytes=30, compression=None)
+        tail = LogTail(self.file_path)
+        seen = []
+        for i in range(20):
+            store.append(f"line {i}")
+            if i % 4 == 0:
+                seen += tail.read_lines()
+        seen += tail.read_lines()
+        store.close()
+        tail.close()
+        self.assertEqual(seen, [f"line {i}" for i in range(20)])
+
+    def test_follow_wakes_on_write(self):
+        open(self.file_path, "w").close()
+        tail = LogTail(self.file_path, max_interval=2.0)
+        stop = threading.Event()
+        received = []
+
+        def follow():
+            for lines in tail.follow(stop):
+                received.append((time.monotonic(), lines))
+                stop.set()
+
+        thread = threading.Thread(target=follow)
+        thread.start()
+        time.sleep(0.1)
+        written = time.monotonic()
+        with open(self.file_path, "a") as file:
+            file.write("hello\n")
+        thread.join(5)
+        tail.close()
+
+        (received_at, lines), = received
+        self.assertEqual(lines, ["hello"])
+        self.assertLess(received_at - written, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
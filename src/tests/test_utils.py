@@ -0,0 +1,71 @@
+import os
+import re
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from tracebook.config import Config, LogLevel, WebUIConfig
+from tracebook.logger import Logger
+from tracebook import utils
+from tracebook.utils import TimestampFormatter, clock_anchor, current_timestamp
+
+
+class TestTimestampFormatter(unittest.TestCase):
+    def test_precisions(self):
+        wall_ns = 1_723_558_910_123_456_789
+        prefix = current_timestamp(1_723_558_910)
+        self.assertEqual(TimestampFormatter().format_wall_ns(wall_ns), prefix)
+        self.assertEqual(TimestampFormatter("ms").format_wall_ns(wall_ns), f"{prefix}.123")
+        self.assertEqual(TimestampFormatter("us").format_wall_ns(wall_ns), f"{prefix}.123456")
+        with self.assertRaises(ValueError):
+            TimestampFormatter("ns")
+
+    def test_formats_once_per_second(self):
+        formatter = TimestampFormatter("ms")
+        with patch("tracebook.utils.time.strftime", wraps=time.strftime) as strftime:
+            first = formatter.format_wall_ns(1_723_558_910_000_000_000)
+            second = formatter.format_wall_ns(1_723_558_910_999_000_000)
+            formatter.format_wall_ns(1_723_558_911_000_000_000)
+        self.assertEqual(strftime.call_count, 2)
+        self.assertEqual(first[:-4], second[:-4])
+        self.assertEqual(second[-4:], ".999")
+
+    def test_now_matches_wall_clock(self):
+        self.assertIn(TimestampFormatter().now(), {current_timestamp(time.time() + d) for d in (-1, 0, 1)})
+
+    def test_stale_anchor_is_refreshed(self):
+        # An anchor taken two minutes ago, before the wall clock was stepped back an hour.
+        wall_ns, monotonic_ns = time.time_ns(), time.monotonic_ns()
+        stale = (wall_ns + 3600 * 10**9 - 120 * 10**9, monotonic_ns - 120 * 10**9)
+        with patch.object(utils, "_anchor", stale):
+            self.assertIn(TimestampFormatter().now(), {current_timestamp(time.time() + d) for d in (-1, 0, 1)})
+            self.assertIsNot(clock_anchor(), stale)
+            self.assertAlmostEqual(clock_anchor()[0], time.time_ns(), delta=10**9)
+
+
+class TestTimestampPrecision(unittest.TestCase):
+    def test_logger_writes_microseconds(self):
+        with tempfile.TemporaryDirectory() as directory:
+            logger = Logger(
+                Config(
+                    output="file",
+                    log_level=LogLevel.INFO,
+                    file_path=os.path.join(directory, "test.log"),
+                    web_config=WebUIConfig(is_active=False),
+                    timestamp_precision="us",
+                )
+            )
+            for i in range(3):
+                logger.info(f"message {i}")
+            lines = logger.logger.store.tail()[1:]
+            logger.logger.close()
+
+        stamps = [re.match(r"\[INFO\] (\S+ \S+) \| message \d", line).group(1) for line in lines]
+        for stamp in stamps:
+            self.assertRegex(stamp, r"^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\.\d{6}$")
+        self.assertEqual(stamps, sorted(stamps))
+
+
+if __name__ == "__main__":
+    unittest.main()
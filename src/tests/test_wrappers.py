@@ -0,0 +1,132 @@
+import asyncio
+import inspect
+import os
+import tempfile
+import unittest
+
+from tracebook.config import Config, LogLevel, WebUIConfig
+from tracebook.logger import Logger
+from tracebook.wrappers import wrap_call
+
+
+class TestWrapCall(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+
+    def hooks(self):
+        def before(args, kwargs):
+            self.events.append(("before", args))
+            return "state"
+
+        def after(state, result):
+            self.events.append(("after", state, result))
+
+        def failed(state, e):
+            self.events.append(("failed", state, type(e).__name__))
+            return "fallback"
+
+        return before, after, failed
+
+    def test_function(self):
+        wrapped = wrap_call(lambda x: x * 2, *self.hooks())
+        self.assertEqual(wrapped(3), 6)
+        self.assertEqual(self.events, [("before", (3,)), ("after", "state", 6)])
+
+    def test_coroutine(self):
+        async def double(x):
+            await asyncio.sleep(0)
+            return x * 2
+
+        wrapped = wrap_call(double, *self.hooks())
+        self.assertTrue(inspect.iscoroutinefunction(wrapped))
+        coroutine = wrapped(3)
+        self.assertEqual(self.events, [])
+        self.assertEqual(asyncio.run(coroutine), 6)
+        self.assertEqual(self.events, [("before", (3,)), ("after", "state", 6)])
+
+    def test_coroutine_exception(self):
+        async def fail():
+            raise KeyError("missing")
+
+        wrapped = wrap_call(fail, *self.hooks())
+        self.assertEqual(asyncio.run(wrapped()), "fallback")
+        self.assertEqual(self.events[-1], ("failed", "state", "KeyError"))
+
+    def test_generator(self):
+        def counter(n):
+            total = 0
+            for i in range(n):
+                total += yield i
+            return total
+
+        wrapped = wrap_call(counter, *self.hooks())
+        generator = wrapped(3)
+        self.assertEqual(next(generator), 0)
+        self.assertEqual(generator.send(10), 1)
+        self.assertEqual(generator.send(20), 2)
+        with self.assertRaises(StopIteration) as stop:
+            generator.send(30)
+        self.assertEqual(stop.exception.value, 60)
+        self.assertEqual(self.events[-1], ("after", "state", 60))
+
+    def test_async_generator(self):
+        async def ticks(n):
+            for i in range(n):
+                await asyncio.sleep(0)
+                yield i
+
+        wrapped = wrap_call(ticks, *self.hooks())
+        self.assertTrue(inspect.isasyncgenfunction(wrapped))
+
+        async def collect():
+            return [i async for i in wrapped(3)]
+
+        self.assertEqual(asyncio.run(collect()), [0, 1, 2])
+        self.assertEqual(self.events[-1], ("after", "state", None))
+
+
+class TestAsyncTrace(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.logger = Logger(
+            Config(
+                output="file",
+                log_level=LogLevel.INFO,
+                file_path=os.path.join(self.directory.name, "test.log"),
+                web_config=WebUIConfig(is_active=False),
+            )
+        )
+
+    def tearDown(self):
+        self.logger.logger.close()
+        self.directory.cleanup()
+
+    def test_trace_coroutine(self):
+        @self.logger.trace()
+        async def fetch(key):
+            await asyncio.sleep(0.01)
+            return key.upper()
+
+        self.assertIsNotNone(self.logger.logger.writer)
+        self.assertEqual(asyncio.run(fetch("id")), "ID")
+        self.logger.flush()
+
+        enter, exit = self.logger.logger.store.tail()[1:]
+        self.assertIn("> fetch ('id',) {}", enter)
+        self.assertIn("< fetch ID [duration=", exit)
+        duration_ms = float(exit.split("duration=")[1].split("ms")[0])
+        self.assertGreaterEqual(duration_ms, 10)
+
+    def test_trace_coroutine_exception(self):
+        @self.logger.trace(blocking=True)
+        async def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            asyncio.run(fail())
+        self.logger.flush()
+        self.assertIn("* fail boom", self.logger.logger.store.tail()[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
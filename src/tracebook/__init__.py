@@ -25,8 +25,10 @@ SOFTWARE.
 
 """
 
-from .config import Config, RemoteConfig, LogLevel, WebUIConfig
+from .config import AsyncConfig, Config, RemoteConfig, LogLevel, RotationConfig, WebUIConfig
 from .logger import Logger
+from .render import Renderer
+from .sampling import OneInN, Probability, TokenBucket
 
 __all__ = [
     "Logger",
@@ -34,4 +36,10 @@ __all__ = [
     "Config",
     "RemoteConfig",
     "WebUIConfig",
+    "AsyncConfig",
+    "RotationConfig",
+    "Renderer",
+    "Probability",
+    "OneInN",
+    "TokenBucket",
 ]
@@ -0,0 +1,147 @@
+import os
+import threading
+from collections import deque
+from typing import Callable, Literal
+
+OverflowPolicy = Literal["block", "drop_oldest", "drop_newest"]
+
+
+class AsyncWriter:
+    """
+    Background writer that drains queued records in batches.
+
+    Producers append records to a deque, which is cheap and thread-safe in
+    CPython, and a single daemon thread hands them to ``write_batch`` once
+    ``batch_size`` records are waiting or ``flush_interval`` seconds have passed.
+    Records put after ``close`` are dropped and counted in ``dropped``.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[list], None],
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+        queue_size: int = 10000,
+        overflow_policy: OverflowPolicy = "block",
+    ):
+        """
+        Initialize the writer and start its background thread.
+
+        Args:
+            write_batch (callable): Called with a list of records to write.
+            batch_size (int): The number of queued records that triggers a flush.
+            flush_interval (float): The maximum time in seconds between flushes.
+            queue_size (int): The maximum number of queued records.
+            overflow_policy (str): What to do when the queue is full, one of
+                "block", "drop_oldest" or "drop_newest".
+        """
+        if overflow_policy not in ("block", "drop_oldest", "drop_newest"):
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self.dropped = 0
+
+        self._queue = deque()
+        self._wake = threading.Event()
+        self._space = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._start()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def _start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="tracebook-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _restart_in_child(self):
+        # Records queued before the fork belong to the parent, and the writer
+        # thread and locks do not survive the fork.
+        self._queue.clear()
+        self._wake = threading.Event()
+        self._space = threading.Condition()
+        self._write_lock = threading.Lock()
+        if not self._closed:
+            self._start()
+
+    def put(self, record):
+        """
+        Queue a record for writing.
+
+        Args:
+            record: The record to queue.
+        """
+        if self._closed:
+            self.dropped += 1
+            return
+        queue = self._queue
+        if len(queue) >= self.queue_size:
+            if self.overflow_policy == "drop_newest":
+                self.dropped += 1
+                return
+            if self.overflow_policy == "drop_oldest":
+                try:
+                    queue.popleft()
+                    self.dropped += 1
+                except IndexError:
+                    pass
+            else:
+                self._wait_for_space()
+        queue.append(record)
+        if len(queue) >= self.batch_size and not self._wake.is_set():
+            self._wake.set()
+
+    def _wait_for_space(self):
+        self._wake.set()
+        with self._space:
+            while len(self._queue) >= self.queue_size and not self._closed:
+                self._space.wait(self.flush_interval)
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self._drain()
+            except Exception:
+                # A failing sink must not kill the writer thread.
+                pass
+
+    def _drain(self):
+        with self._write_lock:
+            queue = self._queue
+            while queue:
+                batch = []
+                try:
+                    while len(batch) < self.batch_size:
+                        batch.append(queue.popleft())
+                except IndexError:
+                    pass
+                if self.overflow_policy == "block":
+                    with self._space:
+                        self._space.notify_all()
+                self.write_batch(batch)
+
+    def flush(self):
+        """
+        Write every queued record before returning.
+        """
+        self._drain()
+
+    def close(self):
+        """
+        Stop the background thread and write any remaining records.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self._drain()
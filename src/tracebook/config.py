@@ -28,6 +28,8 @@ class WebUIConfig:
         port: int = 2234,
         refresh_interval: int = 1000,
         max_data_points: int = 100,
+        max_plot_points: int = 1000,
+        streaming: bool = True,
     ):
         """
         Initialize the web UI configuration.
@@ -40,9 +42,15 @@ class WebUIConfig:
             indent_logs (bool): Whether to indent the logs.
             is_active (bool): Whether the web UI is active.
             port (int): The port to use for the web UI.
-            refresh_interval (int): The refresh interval in milliseconds.
+            refresh_interval (int): The refresh interval in milliseconds, used when not streaming.
             max_data_points (int): The maximum number of data points to show.
+            max_plot_points (int): The number of points longer histories are downsampled to, at least 3.
+            streaming (bool): Whether to push updates to the browser as they arrive instead
+                of polling every refresh interval.
         """
+        if max_plot_points < 3:
+            # Downsampling keeps the first and last points and at least one between them.
+            raise ValueError("max_plot_points must be at least 3")
         self.title = title
         self.foreground_color = foreground_color
         self.background_color = background_color
@@ -52,6 +60,8 @@ class WebUIConfig:
         self.port = port
         self.refresh_interval = refresh_interval
         self.max_data_points = max_data_points
+        self.max_plot_points = max_plot_points
+        self.streaming = streaming
 
 
 
@@ -60,7 +70,16 @@ class RemoteConfig:
     Configuration for remote logging.
     """
 
-    def __init__(self, url, headers, use=True):
+    def __init__(
+        self,
+        url,
+        headers,
+        use=True,
+        payload: Literal["text", "ndjson", "binary"] = "text",
+        compression: Literal["gzip", "zstd", None] = "gzip",
+        max_batch_bytes: int = 1024 * 1024,
+        max_latency: float = None,
+    ):
         """
         Initialize the remote configuration.
 
@@ -68,10 +87,85 @@ class RemoteConfig:
             url (str): The URL of the remote logging server.
             headers (dict): The headers for the remote logging server.
             use (bool): Whether to use the remote logging server.
+            payload (str): How batches are sent: "text" for the log lines, "ndjson"
+                for one JSON record per line or "binary" for the entries of the record
+                file, which needs ``record_file_path`` and does not work with ``multiprocess``.
+            compression (str): The content encoding of batches: "gzip", "zstd"
+                (requires the zstandard package) or None.
+            max_batch_bytes (int): The maximum number of log file bytes in a batch.
+            max_latency (float): The longest time in seconds new lines wait before
+                they are sent, or None to send them only at startup, on exceptions
+                and at exit.
         """
         self.url = url
         self.headers = headers
         self.use = use
+        self.payload = payload
+        self.compression = compression
+        self.max_batch_bytes = max_batch_bytes
+        self.max_latency = max_latency
+
+
+class AsyncConfig:
+    """
+    Configuration for the asynchronous background writer.
+    """
+
+    def __init__(
+        self,
+        use: bool = False,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+        queue_size: int = 10000,
+        overflow_policy: Literal["block", "drop_oldest", "drop_newest"] = "block",
+    ):
+        """
+        Initialize the asynchronous writer configuration.
+
+        Args:
+            use (bool): Whether to write log records on a background thread.
+            batch_size (int): The number of queued records that triggers a flush.
+            flush_interval (float): The maximum time in seconds between flushes.
+            queue_size (int): The maximum number of records waiting to be written.
+            overflow_policy (str): What to do when the queue is full: "block" the
+                caller, "drop_oldest" queued record or "drop_newest" record.
+        """
+        self.use = use
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+
+
+class RotationConfig:
+    """
+    Configuration for rotating the log file into compressed segments.
+    """
+
+    def __init__(
+        self,
+        use: bool = False,
+        max_bytes: int = 10 * 1024 * 1024,
+        max_age: float = None,
+        retention: int = 10,
+        compression: Literal["gzip", "zstd", None] = "gzip",
+    ):
+        """
+        Initialize the rotation configuration.
+
+        Args:
+            use (bool): Whether to rotate the log file instead of keeping only its last lines.
+            max_bytes (int): The size in bytes at which the log file is rotated.
+            max_age (float): The age in seconds at which the log file is rotated, or None.
+            retention (int): The number of rotated segments to keep.
+            compression (str): How rotated segments are compressed: "gzip", "zstd"
+                (requires the zstandard package) or None.
+        """
+        self.use = use
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.retention = retention
+        self.compression = compression
 
 
 class Config:
@@ -86,6 +180,14 @@ class Config:
         file_path=None,
         remote_config: RemoteConfig = None,
         web_config: WebUIConfig = None,
+        max_log_entries: int = 500,
+        async_config: AsyncConfig = None,
+        resource_sample_interval: float = 1.0,
+        stats_summary_interval: float = 60.0,
+        multiprocess: bool = False,
+        record_file_path: str = None,
+        timestamp_precision: Literal["s", "ms", "us"] = "s",
+        rotation_config: RotationConfig = None,
     ):
         """
         Initialize the configuration.
@@ -96,12 +198,33 @@ class Config:
             file_path (str): The file path to use for logging.
             remote_config (RemoteConfig): The remote logging configuration.
             web_config (WebUIConfig): The web UI configuration.
+            max_log_entries (int): The number of most recent log entries to keep in the log file.
+            async_config (AsyncConfig): The asynchronous writer configuration.
+            resource_sample_interval (float): The time in seconds between two CPU and memory readings.
+            stats_summary_interval (float): The time in seconds between two summaries of aggregated functions.
+            multiprocess (bool): Whether several processes log to the same file. Lines are then sent
+                over a Unix socket to a single collector process that owns the file.
+            record_file_path (str): A file that records are also written to in the compact binary
+                format of ``tracebook.records``, or None. With ``multiprocess``, every process
+                writes its own ``<record_file_path>.<pid>``.
+            timestamp_precision (str): The precision of timestamps in the text log, "s" for whole
+                seconds, "ms" for milliseconds or "us" for microseconds.
+            rotation_config (RotationConfig): The log file rotation configuration. Without
+                rotation, the log file keeps only the last ``max_log_entries`` lines.
         """
         self.log_level = log_level
         self.output = output
         self.file_path = file_path
         self.remote_config = remote_config or RemoteConfig(None, None, False)
         self.web_config = web_config or WebUIConfig()
+        self.max_log_entries = max_log_entries
+        self.async_config = async_config or AsyncConfig()
+        self.resource_sample_interval = resource_sample_interval
+        self.stats_summary_interval = stats_summary_interval
+        self.multiprocess = multiprocess
+        self.record_file_path = record_file_path
+        self.timestamp_precision = timestamp_precision
+        self.rotation_config = rotation_config or RotationConfig()
 
     def get_log_level(self):
         """
@@ -130,6 +253,15 @@ class Config:
         """
         return self.file_path
 
+    def get_max_log_entries(self):
+        """
+        Get the number of log entries retained in the log file.
+
+        Returns:
+            int: The number of most recent log entries to keep.
+        """
+        return self.max_log_entries
+
     def get_remote_config(self):
         """
         Get the remote logging configuration.
@@ -1,21 +1,46 @@
 import logging
 import threading
+from collections import deque
 from flask import Flask
-from dash import Dash, dcc, html, Input, Output
+from dash import ClientsideFunction, Dash, Patch, dcc, html, no_update, Input, Output, State
 import plotly.graph_objs as go
-import time
-import re
 import dash_bootstrap_components as dbc
 
 from tracebook.config import Config
+from tracebook.event_bus import EventBus, LogEvent
+from tracebook.resource_probe import ResourceSample
+from tracebook.series import TimeSeries
+from tracebook.stream import DashboardStream
+from tracebook.tail import LogTail
+
+
+# Number of rows shown in the log window.
+LOG_WINDOW_SIZE = 100
 
 
 class RealTimeDashboard:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, events: EventBus = None):
+        """
+        Initialize the dashboard.
+
+        Args:
+            config (Config): The logger configuration.
+            events (EventBus): The bus the logger publishes records to. Without
+                it, the dashboard follows the log file instead.
+        """
         self.config = config
-        self.cpu_usage_data = []
-        self.memory_usage_data = []
-        self.logs = []
+        self.follow_file = events is None
+        self.events = events if events is not None else EventBus(LOG_WINDOW_SIZE)
+        self.metrics = EventBus(
+            config.web_config.max_data_points, condition=self.events.condition
+        )
+        self.cursor = 0
+        self.cpu_usage_data = TimeSeries(config.web_config.max_data_points)
+        self.memory_usage_data = TimeSeries(config.web_config.max_data_points)
+        self.rows = deque(maxlen=LOG_WINDOW_SIZE)
+        self.rows_lock = threading.RLock()
+        self.row_seq = 0
+        self.indent = 1
 
         logging.getLogger("werkzeug").setLevel(logging.ERROR)
         self.app = Flask(__name__)
@@ -24,12 +49,33 @@ class RealTimeDashboard:
             server=self.app,
             url_base_pathname="/",
             external_stylesheets=[dbc.themes.BOOTSTRAP],
+            external_scripts=["/tracebook/stream.js"]
+            if config.web_config.streaming
+            else [],
+        )
+
+        self.stream = DashboardStream(
+            self.events,
+            self.metrics,
+            min(config.web_config.max_data_points, config.web_config.max_plot_points),
         )
+        if config.web_config.streaming:
+            self.stream.register(self.app)
 
         self.build_layout()
 
-    def build_layout(self):
-        self.dash_app.layout = html.Div(
+    def make_layout(self):
+        if self.config.web_config.streaming:
+            # Updates are pushed by the stream script, see tracebook.stream.
+            trigger = html.Div([dcc.Store(id="stream-update"), dcc.Store(id="log-update")])
+        else:
+            trigger = dcc.Interval(
+                id="interval-component",
+                interval=self.config.web_config.refresh_interval,
+                n_intervals=0,
+            )
+
+        return html.Div(
             style={
                 "margin": "0",
                 "backgroundColor": self.config.web_config.background_color,
@@ -74,7 +120,16 @@ class RealTimeDashboard:
                         dbc.Col(
                             [
                                 dbc.Card(
-                                    [dbc.CardBody([dcc.Graph(id="cpu-usage-graph")])],
+                                    [
+                                        dbc.CardBody(
+                                            [
+                                                dcc.Graph(
+                                                    id="cpu-usage-graph",
+                                                    figure=self.make_cpu_figure(),
+                                                )
+                                            ]
+                                        )
+                                    ],
                                     className="mb-4",
                                     style={
                                         "borderRadius": "15px",
@@ -84,7 +139,12 @@ class RealTimeDashboard:
                                 dbc.Card(
                                     [
                                         dbc.CardBody(
-                                            [dcc.Graph(id="memory-usage-graph")]
+                                            [
+                                                dcc.Graph(
+                                                    id="memory-usage-graph",
+                                                    figure=self.make_memory_figure(),
+                                                )
+                                            ]
                                         )
                                     ],
                                     style={
@@ -126,36 +186,57 @@ class RealTimeDashboard:
                         ),
                     ]
                 ),
-                dcc.Interval(
-                    id="interval-component",
-                    interval=self.config.web_config.refresh_interval,
-                    n_intervals=0,
-                ),
+                dcc.Store(id="log-window-state"),
+                trigger,
             ],
         )
 
+    def build_layout(self):
+        # A function, so that every page load starts from the current graphs.
+        self.dash_app.layout = self.make_layout
+
+        if self.config.web_config.streaming:
+            self.dash_app.clientside_callback(
+                ClientsideFunction("tracebook", "extendMetrics"),
+                [
+                    Output("cpu-usage-graph", "extendData"),
+                    Output("memory-usage-graph", "extendData"),
+                ],
+                [Input("stream-update", "data")],
+            )
+            trigger = Input("log-update", "data")
+        else:
+            trigger = Input("interval-component", "n_intervals")
+            self.dash_app.callback(
+                [
+                    Output("cpu-usage-graph", "figure"),
+                    Output("memory-usage-graph", "figure"),
+                ],
+                [trigger],
+            )(self.update_graph)
+
         self.dash_app.callback(
             [
-                Output("cpu-usage-graph", "figure"),
-                Output("memory-usage-graph", "figure"),
                 Output("log-window", "children"),
+                Output("log-window-state", "data"),
             ],
-            [Input("interval-component", "n_intervals")],
-        )(self.update_graph)
+            [trigger],
+            [State("log-window-state", "data")],
+        )(self.update_log_window)
 
     def update_graph(self, n):
         return (
             self.make_cpu_figure(),
             self.make_memory_figure(),
-            self.make_foramtted_logs(),
         )
 
     def make_cpu_figure(self):
+        x, y = self.cpu_usage_data.points(self.config.web_config.max_plot_points)
         cpu_figure = {
             "data": [
                 go.Scatter(
-                    x=[timestamp for timestamp, _ in self.cpu_usage_data],
-                    y=[usage for _, usage in self.cpu_usage_data],
+                    x=x,
+                    y=y,
                     mode="lines",
                     line=dict(color=self.config.web_config.foreground_color, width=3),
                     fill="tozeroy",
@@ -186,11 +267,12 @@ class RealTimeDashboard:
         return cpu_figure
 
     def make_memory_figure(self):
+        x, y = self.memory_usage_data.points(self.config.web_config.max_plot_points)
         memory_figure = {
             "data": [
                 go.Scatter(
-                    x=[timestamp for timestamp, _ in self.memory_usage_data],
-                    y=[usage for _, usage in self.memory_usage_data],
+                    x=x,
+                    y=y,
                     mode="lines",
                     line=dict(
                         color=self.config.web_config.foreground_color, width=3
@@ -223,178 +305,209 @@ class RealTimeDashboard:
 
         return memory_figure
 
-    def make_foramtted_logs(self):
-        log_entries = []
-        indent = 1
-        for log in self.logs[-100:]:
-            parts = log.split(" ", 3)
-            if len(parts) >= 4:
-                info_tag, date, time, rest = parts
-                info_tag = self.format_tag(info_tag)
-                info_tag_color = self.get_color_for_tag(info_tag)
-                op = rest[0]
-                content = rest[2:]
-
-                if op in (">", "<"):
-                    func_name, args_kwargs = content.split(" ", 1)
-                    if op == ">":
-                        indent = indent + 1 if self.config.web_config.indent_logs else 0
-                        args, kwargs = args_kwargs.rsplit(" ", 1)
-                        log_entry = html.Div(
-                            [
-                                html.Span(
-                                    info_tag,
-                                    style={
-                                        "color": info_tag_color,
-                                        "fontWeight": "bold",
-                                    },
-                                ),
-                                html.Span(f" {time} ", style={"color": "#17a2b8"}),
-                                html.Span(
-                                    f" {op} ",
-                                    style={
-                                        "color": "#28a745",
-                                        "fontWeight": "bold",
-                                        "display": "inline-block",
-                                        "padding-left": f"{indent * 20}px",
-                                    },
-                                ),
-                                html.Span(
-                                    f" {func_name} ",
-                                    style={"color": "#6610f2", "fontWeight": "bold"},
-                                ),
-                                html.Span(
-                                    f" Args: {args} ", style={"color": "#fd7e14"}
-                                ),
-                                html.Span(
-                                    f" Kwargs: {kwargs}", style={"color": "#e83e8c"}
-                                ) if kwargs != "{}" else "",
-                            ]
-                        )
-                    else:
-                        indent = max(
-                            0, indent - 1 if self.config.web_config.indent_logs else 0
-                        )
-                        log_entry = html.Div(
-                            [
-                                html.Span(
-                                    info_tag,
-                                    style={
-                                        "color": info_tag_color,
-                                        "fontWeight": "bold",
-                                    },
-                                ),
-                                html.Span(f" {time} ", style={"color": "#17a2b8"}),
-                                html.Span(
-                                    f" {op} ",
-                                    style={
-                                        "color": "#dc3545",
-                                        "fontWeight": "bold",
-                                        "display": "inline-block",
-                                        "padding-left": f"{indent * 20}px",
-                                    },
-                                ),
-                                html.Span(
-                                    f" {func_name} ",
-                                    style={"color": "#6610f2", "fontWeight": "bold"},
-                                ),
-                                html.Span(
-                                    f" Returns: {args_kwargs}",
-                                    style={"color": "#20c997"},
-                                ),
-                            ]
-                        )
-                elif op == "|":
-                    cpu, mem = content.split(" ", 1)
-                    if "%" not in cpu:
-                        text_color = info_tag_color
-                    else:
-                        text_color = "#dc3545"
-                    log_entry = html.Div(
-                        [
-                            html.Span(
-                                info_tag,
-                                style={"color": info_tag_color, "fontWeight": "bold"},
-                            ),
-                            html.Span(f" {time} ", style={"color": info_tag_color}),
-                            html.Span(
-                                f" {op} ",
-                                style={
-                                    "color": "#ffc107",
-                                    "fontWeight": "bold",
-                                    "display": "inline-block",
-                                    "padding-left": f"{indent * 20}px",
-                                },
-                            ),
-                            html.Span(f" {cpu} ", style={"color": text_color}),
-                            html.Span(f" {mem} ", style={"color": text_color}),
-                        ]
-                    )
-                elif op == "*":
-                    func_name, content = content.split(" ", 1)
-                    log_entry = html.Div(
-                        [
-                            html.Span(
-                                info_tag,
-                                style={"color": info_tag_color, "fontWeight": "bold"},
-                            ),
-                            html.Span(f" {time} ", style={"color": info_tag_color}),
-                            html.Span(
-                                f" {op} ",
-                                style={
-                                    "color": "#ff7070",
-                                    "padding-left": f"{indent * 20}px",
-                                },
-                            ),
-                            html.Span(
-                                f" {func_name} ",
-                                style={"color": "#6610f2", "fontWeight": "bold"},
-                            ),
-                            html.Span(
-                                f" {content} ",
-                                style={
-                                    "color": "#333",
-                                },
-                            ),
-                        ],
-                        style={"margin": "0"},
-                    )
-
-                log_entries.append(log_entry)
+    def poll_events(self):
+        """
+        Render the events published since the last poll into the log window.
+        """
+        with self.rows_lock:
+            events, self.cursor = self.events.read(self.cursor)
+            for event in events:
+                self.add_log(event)
+
+    def add_log(self, event):
+        """
+        Render a log record once and add it to the rows of the log window.
+
+        Args:
+            event (LogEvent or str): The record, or a line that is not a record.
+        """
+        with self.rows_lock:
+            self.row_seq += 1
+            self.rows.append((self.row_seq, self.make_log_entry(event)))
+
+    def make_log_entry(self, event):
+        if isinstance(event, str):
+            return html.Div(event, style={"color": "#333"})
+
+        info_tag = self.format_tag(f"[{event.level.name}]")
+        info_tag_color = self.get_color_for_tag(info_tag)
+        time = event.timestamp[11:]
+        op = event.operation
+
+        if op in (">", "<") and event.function_name is not None:
+            if op == ">":
+                indent = self.indent + 1 if self.config.web_config.indent_logs else 0
+                log_entry = html.Div(
+                    [
+                        html.Span(
+                            info_tag,
+                            style={
+                                "color": info_tag_color,
+                                "fontWeight": "bold",
+                            },
+                        ),
+                        html.Span(f" {time} ", style={"color": "#17a2b8"}),
+                        html.Span(
+                            f" {op} ",
+                            style={
+                                "color": "#28a745",
+                                "fontWeight": "bold",
+                                "display": "inline-block",
+                                "padding-left": f"{indent * 20}px",
+                            },
+                        ),
+                        html.Span(
+                            f" {event.function_name} ",
+                            style={"color": "#6610f2", "fontWeight": "bold"},
+                        ),
+                        html.Span(
+                            f" Args: {event.args if event.args is not None else event.message} ",
+                            style={"color": "#fd7e14"},
+                        ),
+                        html.Span(
+                            f" Kwargs: {event.kwargs}", style={"color": "#e83e8c"}
+                        ) if event.kwargs not in (None, "{}") else "",
+                    ]
+                )
             else:
-                log_entries.append(html.Div(log, style={"color": "#333"}))
+                indent = max(
+                    0, self.indent - 1 if self.config.web_config.indent_logs else 0
+                )
+                log_entry = html.Div(
+                    [
+                        html.Span(
+                            info_tag,
+                            style={
+                                "color": info_tag_color,
+                                "fontWeight": "bold",
+                            },
+                        ),
+                        html.Span(f" {time} ", style={"color": "#17a2b8"}),
+                        html.Span(
+                            f" {op} ",
+                            style={
+                                "color": "#dc3545",
+                                "fontWeight": "bold",
+                                "display": "inline-block",
+                                "padding-left": f"{indent * 20}px",
+                            },
+                        ),
+                        html.Span(
+                            f" {event.function_name} ",
+                            style={"color": "#6610f2", "fontWeight": "bold"},
+                        ),
+                        html.Span(
+                            f" Returns: {event.message}",
+                            style={"color": "#20c997"},
+                        ),
+                    ]
+                )
+        elif op == "*":
+            indent = self.indent
+            log_entry = html.Div(
+                [
+                    html.Span(
+                        info_tag,
+                        style={"color": info_tag_color, "fontWeight": "bold"},
+                    ),
+                    html.Span(f" {time} ", style={"color": info_tag_color}),
+                    html.Span(
+                        f" {op} ",
+                        style={
+                            "color": "#ff7070",
+                            "padding-left": f"{indent * 20}px",
+                        },
+                    ),
+                    html.Span(
+                        f" {event.function_name or ''} ",
+                        style={"color": "#6610f2", "fontWeight": "bold"},
+                    ),
+                    html.Span(
+                        f" {event.message} ",
+                        style={
+                            "color": "#333",
+                        },
+                    ),
+                ],
+                style={"margin": "0"},
+            )
+        else:
+            indent = self.indent
+            text_color = "#dc3545" if "%" in event.message else info_tag_color
+            log_entry = html.Div(
+                [
+                    html.Span(
+                        info_tag,
+                        style={"color": info_tag_color, "fontWeight": "bold"},
+                    ),
+                    html.Span(f" {time} ", style={"color": info_tag_color}),
+                    html.Span(
+                        f" {op} ",
+                        style={
+                            "color": "#ffc107",
+                            "fontWeight": "bold",
+                            "display": "inline-block",
+                            "padding-left": f"{indent * 20}px",
+                        },
+                    ),
+                    html.Span(f" {event.body()} ", style={"color": text_color}),
+                ]
+            )
 
-        return log_entries
+        self.indent = indent
+        return log_entry
+
+    def make_foramtted_logs(self):
+        with self.rows_lock:
+            return [row for _, row in self.rows]
+
+    def update_log_window(self, n, client):
+        """
+        Send the client the rows it has not seen yet.
+
+        The client keeps the sequence number of its newest row and its number of
+        rows. New rows are appended with a partial update, and rows beyond the
+        window size are removed from the front, so the payload grows with the
+        number of new rows rather than with the window. A new client receives
+        the whole window.
+
+        Args:
+            n: The refresh interval count, or the pushed cursor when streaming.
+            client (dict): The ``seq`` and ``rows`` the client has, or None.
+
+        Returns:
+            tuple: The log window update and the new client state.
+        """
+        self.poll_events()
+        with self.rows_lock:
+            rows = list(self.rows)
+            latest = self.row_seq
+
+        if client is not None and client["seq"] == latest:
+            return no_update, no_update
+        if client is None or client["seq"] > latest or not rows or client["seq"] < rows[0][0] - 1:
+            return [row for _, row in rows], {"seq": latest, "rows": len(rows)}
+
+        new_rows = [row for seq, row in rows if seq > client["seq"]]
+        patch = Patch()
+        patch.extend(new_rows)
+        for _ in range(max(0, client["rows"] + len(new_rows) - LOG_WINDOW_SIZE)):
+            del patch[0]
+        return patch, {"seq": latest, "rows": min(client["rows"] + len(new_rows), LOG_WINDOW_SIZE)}
 
     def log_watcher(self):
-        with open(self.config.file_path, "r") as f:
-            f.seek(0, 2)
-            while True:
-                lines = f.readlines()
-                if lines:
-                    for line in lines:
-                        line = line.strip()
-                        self.logs.append(line)
-                        self.parse_log_line(line)
-                time.sleep(1)
-
-    def parse_log_line(self, line):
-        # Example log line: [INFO] 2024-08-13 14:21:50 * 7.40% 47.04 MB
-        match = re.match(
-            r"\[INFO\] (\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) \| (\d+\.\d+)% (\d+\.\d+) MB",
-            line,
-        )
-        if match:
-            timestamp_str, cpu_usage, memory_usage = match.groups()
-            timestamp = time.mktime(time.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S"))
-            self.cpu_usage_data.append((timestamp, float(cpu_usage)))
-            self.memory_usage_data.append((timestamp, float(memory_usage)))
-
-            # Keep only the most recent data points
-            if len(self.cpu_usage_data) > self.config.web_config.max_data_points:
-                self.cpu_usage_data = self.cpu_usage_data[-self.max_data_points :]
-            if len(self.memory_usage_data) > self.config.web_config.max_data_points:
-                self.memory_usage_data = self.memory_usage_data[-self.max_data_points :]
+        tail = LogTail(self.config.file_path)
+        for lines in tail.follow():
+            for line in lines:
+                line = line.strip()
+                self.events.publish(LogEvent.from_line(line) or line)
+
+    def add_resource_sample(self, sample: ResourceSample):
+        # The buffers keep only the most recent data points
+        self.cpu_usage_data.append(sample.timestamp, sample.cpu_percent)
+        self.memory_usage_data.append(sample.timestamp, sample.rss_mb)
+
+        self.metrics.publish(sample)
 
     def start_server(self):
         self.app.run(
@@ -402,9 +515,10 @@ class RealTimeDashboard:
         )
 
     def run(self):
-        # Start log watcher thread
-        thread = threading.Thread(target=self.log_watcher, daemon=True)
-        thread.start()
+        # Follow the log file unless records are published in-process
+        if self.follow_file:
+            thread = threading.Thread(target=self.log_watcher, daemon=True)
+            thread.start()
 
         # Start the Flask server in a separate thread
         server_thread = threading.Thread(target=self.start_server, daemon=True)
@@ -0,0 +1,197 @@
+import threading
+from typing import List, NamedTuple, Optional, Tuple
+
+from tracebook.config import LogLevel
+from tracebook.render import render_message
+
+
+class LogEvent(NamedTuple):
+    """
+    A log record as published to in-process subscribers such as the dashboard.
+
+    ``message`` is the text after the function name, e.g. the rendered result
+    and timings of a call. For function inputs, ``args`` and ``kwargs`` hold the
+    rendered positional and keyword arguments.
+    """
+
+    level: LogLevel
+    timestamp: str
+    operation: str
+    function_name: Optional[str]
+    message: str
+    args: Optional[str] = None
+    kwargs: Optional[str] = None
+
+    def body(self) -> str:
+        """
+        Get the message as it appears in the text log.
+
+        Returns:
+            str: The function name, if any, followed by the message.
+        """
+        if self.function_name is None:
+            return self.message
+        return f"{self.function_name} {self.message}"
+
+    def text(self) -> str:
+        """
+        Format the event as a line of the text log file.
+
+        Returns:
+            str: The line, e.g. ``[INFO] 2024-08-13 14:21:50 > fact (5,) {}``.
+        """
+        return f"[{self.level.name}] {self.timestamp} {self.operation} {self.body()}"
+
+    @classmethod
+    def from_record(cls, level: LogLevel, timestamp: str, operation: str, message) -> "LogEvent":
+        """
+        Create an event from a queued record, rendering its message if needed.
+
+        Args:
+            level (LogLevel): The level of the record.
+            timestamp (str): The formatted timestamp.
+            operation (str): The operation symbol.
+            message: The message of the record.
+
+        Returns:
+            LogEvent: The event.
+        """
+        message = render_message(message)
+        if type(message) is str:
+            return cls(level, timestamp, operation, None, message)
+        function_name = message.function_name
+        if message.args is not None:
+            return cls(level, timestamp, operation, function_name, message.payload, message.args, message.kwargs)
+        return cls(level, timestamp, operation, function_name, str(message)[len(function_name) + 1 :])
+
+    @classmethod
+    def from_line(cls, line: str) -> Optional["LogEvent"]:
+        """
+        Parse a line of the text log file, for readers that follow the file.
+
+        Args:
+            line (str): The line.
+
+        Returns:
+            LogEvent: The event, or None if the line is not a log record.
+        """
+        parts = line.split(" ", 3)
+        if len(parts) < 4 or len(parts[3]) < 2:
+            return None
+        tag, date, time, rest = parts
+        level = LogLevel.__members__.get(tag[1:-1])
+        if level is None:
+            return None
+        operation, content = rest[0], rest[2:]
+        if operation not in (">", "<", "*") or " " not in content:
+            return cls(level, f"{date} {time}", operation, None, content)
+        function_name, message = content.split(" ", 1)
+        if operation == ">" and " " in message:
+            args, kwargs = message.rsplit(" ", 1)
+            return cls(level, f"{date} {time}", operation, function_name, message, args, kwargs)
+        return cls(level, f"{date} {time}", operation, function_name, message)
+
+
+def event_to_json(event) -> dict:
+    """
+    Convert a log event or a plain log line to JSON.
+
+    Args:
+        event (LogEvent or str): The event.
+
+    Returns:
+        dict: The JSON object.
+    """
+    if isinstance(event, str):
+        return {"text": event}
+    return {
+        "level": event.level.name,
+        "timestamp": event.timestamp,
+        "operation": event.operation,
+        "function": event.function_name,
+        "message": event.message,
+        "args": event.args,
+        "kwargs": event.kwargs,
+    }
+
+
+class EventBus:
+    """
+    Bounded in-memory channel from the logger to in-process subscribers.
+
+    Events go into a ring of ``capacity`` slots and get consecutive sequence
+    numbers. Each subscriber keeps its own cursor, the sequence number of the
+    next event it wants, and reads from it. Publishing never waits for
+    subscribers: once the ring is full the oldest events are overwritten, and a
+    subscriber that falls behind continues with the oldest event still held.
+    """
+
+    def __init__(self, capacity: int = 1000, condition: threading.Condition = None):
+        """
+        Initialize the bus.
+
+        Args:
+            capacity (int): The number of most recent events held.
+            condition (threading.Condition): The condition notified on publish. Buses
+                sharing a condition can be waited on together.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.condition = condition or threading.Condition()
+        self._events = [None] * capacity
+        self._next = 0
+
+    @property
+    def cursor(self) -> int:
+        """
+        The sequence number of the next published event.
+        """
+        return self._next
+
+    def publish(self, event: LogEvent):
+        """
+        Publish an event to every subscriber.
+
+        Args:
+            event (LogEvent): The event.
+        """
+        with self.condition:
+            self._events[self._next % self.capacity] = event
+            self._next += 1
+            self.condition.notify_all()
+
+    def read(self, cursor: int, limit: int = None) -> Tuple[List[LogEvent], int]:
+        """
+        Read the events published since a cursor.
+
+        Args:
+            cursor (int): The sequence number of the first event to read.
+            limit (int): The maximum number of events to read, or None.
+
+        Returns:
+            tuple: The events and the cursor to continue from. The events are the
+            ones numbered from the returned cursor minus their count; fewer than
+            ``cursor`` to that point means older events were overwritten.
+        """
+        with self.condition:
+            end = self._next
+            start = min(max(cursor, end - self.capacity), end)
+            if limit is not None:
+                end = min(end, start + limit)
+            events = [self._events[sequence % self.capacity] for sequence in range(start, end)]
+        return events, end
+
+    def wait(self, cursor: int, timeout: float = None) -> bool:
+        """
+        Wait until an event at or after a cursor is published.
+
+        Args:
+            cursor (int): The sequence number to wait for.
+            timeout (float): The longest time to wait in seconds, or None.
+
+        Returns:
+            bool: True if such an event is available.
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: self._next > cursor, timeout)
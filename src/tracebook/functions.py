@@ -0,0 +1,96 @@
+import inspect
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+
+class FunctionInfo(NamedTuple):
+    """
+    A traced function, identified by a small integer id.
+
+    Functions that were only logged by name have an empty module and file and
+    line 0.
+    """
+
+    id: int
+    name: str
+    qualname: str
+    module: str
+    file: str
+    line: int
+
+    @property
+    def full_name(self) -> str:
+        """
+        The module and qualified name, e.g. ``app.Handler.run``, which tells
+        apart functions that share a name.
+        """
+        return f"{self.module}.{self.qualname}" if self.module else self.qualname
+
+
+class FunctionRegistry:
+    """
+    Table of traced functions.
+
+    The decorators register every function once when it is decorated, so that
+    records carry only its id and sinks write the details once.
+    """
+
+    def __init__(self):
+        self.functions: List[FunctionInfo] = []
+        self._ids: Dict[tuple, FunctionInfo] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, key: tuple, name: str, qualname: str, module: str, file: str, line: int) -> FunctionInfo:
+        with self._lock:
+            function = self._ids.get(key)
+            if function is None:
+                function = FunctionInfo(len(self.functions) + 1, name, qualname, module, file, line)
+                self.functions.append(function)
+                self._ids[key] = function
+            return function
+
+    def register(self, func) -> FunctionInfo:
+        """
+        Get the entry of a function, registering it on first use.
+
+        Decorating the same function several times returns the same entry.
+
+        Args:
+            func (callable): The function.
+
+        Returns:
+            FunctionInfo: The entry of the function.
+        """
+        name = getattr(func, "__name__", repr(func))
+        qualname = getattr(func, "__qualname__", name)
+        module = getattr(func, "__module__", None) or ""
+        code = getattr(inspect.unwrap(func), "__code__", None)
+        file = code.co_filename if code is not None else ""
+        line = code.co_firstlineno if code is not None else 0
+        return self._add((module, qualname, file, line), name, qualname, module, file, line)
+
+    def register_name(self, name: str) -> FunctionInfo:
+        """
+        Get the entry of a function that is only known by name.
+
+        Args:
+            name (str): The function name.
+
+        Returns:
+            FunctionInfo: The entry of the function.
+        """
+        return self._add(("", name, "", 0), name, name, "", "", 0)
+
+    def get(self, function_id: int) -> Optional[FunctionInfo]:
+        """
+        Get a function by its id.
+
+        Args:
+            function_id (int): The id assigned by ``register``.
+
+        Returns:
+            FunctionInfo: The function, or None for unknown ids.
+        """
+        if 0 < function_id <= len(self.functions):
+            return self.functions[function_id - 1]
+        return None
@@ -0,0 +1,175 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from tracebook.config import Config, LogLevel, RemoteConfig, WebUIConfig
+from tracebook.logger import Logger
+from tracebook.remote_server import CollectorServer
+
+_MARKER = "load-test"
+
+
+def _percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def _drive(logger: Logger, index: int, records: int, rate: float):
+    interval = 1 / rate if rate else 0.0
+    start = time.monotonic()
+    for number in range(records):
+        if interval:
+            delay = start + number * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        logger.info(f"{_MARKER} {index} {number} {time.time_ns()}")
+
+
+def run_load_test(
+    loggers: int = 4,
+    records: int = 10000,
+    rate: float = None,
+    payload: str = "ndjson",
+    compression: str = "gzip",
+    max_batch_bytes: int = 1024 * 1024,
+    max_latency: float = 0.05,
+    url: str = None,
+    directory: str = None,
+) -> dict:
+    """
+    Measure remote shipping by driving several loggers against a collector.
+
+    Every logger gets its own log file, and its own record file for the binary
+    payload, and logs ``records`` messages from its own thread, each holding
+    the wall-clock time it was logged. The latency of a record is the time
+    from logging it to its arrival at the collector.
+
+    Args:
+        loggers (int): The number of ``Logger`` instances.
+        records (int): The number of records each logger writes.
+        rate (float): The records per second each logger writes, or None for as fast as possible.
+        payload (str): The ``RemoteConfig`` payload.
+        compression (str): The ``RemoteConfig`` compression.
+        max_batch_bytes (int): The ``RemoteConfig`` maximum batch size.
+        max_latency (float): The ``RemoteConfig`` maximum latency.
+        url (str): The collector to ship to. Without it, a ``CollectorServer``
+            is started and latencies are read from its segment files.
+        directory (str): The directory for log files and segments, by default a temporary one.
+
+    Returns:
+        dict: The number of records sent and received, the elapsed seconds
+        until every logger was closed, the records per second, and the p50, p99
+        and maximum latency in milliseconds. Received records and latencies are
+        only known with the bundled collector.
+    """
+    temporary = tempfile.TemporaryDirectory() if directory is None else None
+    directory = temporary.name if temporary is not None else directory
+    collector = None
+    if url is None:
+        collector = CollectorServer(os.path.join(directory, "collected"), port=0)
+        collector.start()
+        url = collector.url
+
+    try:
+        instances = [
+            Logger(
+                Config(
+                    output="file",
+                    log_level=LogLevel.INFO,
+                    file_path=os.path.join(directory, f"logger-{index}.log"),
+                    remote_config=RemoteConfig(
+                        url,
+                        {},
+                        payload=payload,
+                        compression=compression,
+                        max_batch_bytes=max_batch_bytes,
+                        max_latency=max_latency,
+                    ),
+                    web_config=WebUIConfig(is_active=False),
+                    record_file_path=os.path.join(directory, f"logger-{index}.tbr") if payload == "binary" else None,
+                )
+            )
+            for index in range(loggers)
+        ]
+
+        start = time.monotonic()
+        threads = [
+            threading.Thread(target=_drive, args=(logger, index, records, rate))
+            for index, logger in enumerate(instances)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for logger in instances:
+            logger.logger.close()
+
+        sent = loggers * records
+        result = {"sent": sent, "received": None, "elapsed": time.monotonic() - start}
+        if collector is None:
+            result["records_per_second"] = sent / result["elapsed"]
+            return result
+
+        # Closing a logger ships its remaining lines, so everything delivered has arrived.
+        collector.flush()
+        latencies = sorted(_latencies(collector.segments()))
+        result.update(
+            {
+                "received": len(latencies),
+                "p50_ms": _percentile(latencies, 0.5) / 1e6,
+                "p99_ms": _percentile(latencies, 0.99) / 1e6,
+                "max_ms": latencies[-1] / 1e6 if latencies else 0.0,
+            }
+        )
+        result["records_per_second"] = len(latencies) / result["elapsed"]
+        return result
+    finally:
+        if collector is not None:
+            collector.close()
+        if temporary is not None:
+            temporary.cleanup()
+
+
+def _latencies(segments: list) -> list:
+    latencies = []
+    for path in segments:
+        with open(path) as file:
+            for line in file:
+                record = json.loads(line)
+                message = record.get("message") or ""
+                if message.startswith(_MARKER):
+                    latencies.append(record["received_ns"] - int(message.rsplit(" ", 1)[1]))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure TraceBook remote shipping against a collector.")
+    parser.add_argument("--loggers", type=int, default=4)
+    parser.add_argument("--records", type=int, default=10000, help="records per logger")
+    parser.add_argument("--rate", type=float, default=None, help="records per second per logger")
+    parser.add_argument("--payload", choices=("text", "ndjson", "binary"), default="ndjson")
+    parser.add_argument("--compression", choices=("gzip", "zstd", "none"), default="gzip")
+    parser.add_argument("--max-batch-bytes", type=int, default=1024 * 1024)
+    parser.add_argument("--max-latency", type=float, default=0.05)
+    parser.add_argument("--url", default=None, help="an external collector; by default one is started locally")
+    args = parser.parse_args()
+
+    result = run_load_test(
+        loggers=args.loggers,
+        records=args.records,
+        rate=args.rate,
+        payload=args.payload,
+        compression=None if args.compression == "none" else args.compression,
+        max_batch_bytes=args.max_batch_bytes,
+        max_latency=args.max_latency,
+        url=args.url,
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+import hashlib
+import json
+import os
+import selectors
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from tracebook.config import Config, RemoteConfig, RotationConfig
+from tracebook.log_store import RingLogStore
+from tracebook.remote_handler import RemoteShipper
+from tracebook.rotation import RotatingLogStore
+
+
+def _is_exception(line: str) -> bool:
+    # "[ERROR] <date> <time> * <function> <message>", as written by log_exception.
+    parts = line.split(" ", 4)
+    return len(parts) > 3 and parts[0] == "[ERROR]" and parts[3] == "*"
+
+
+def _runtime_directory() -> str:
+    # Shared directories such as /tmp would let other users replace the lock
+    # file with a symlink or listen on the socket first.
+    path = os.path.join(tempfile.gettempdir(), f"tracebook-{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{path} must be a directory that only the current user can access")
+    return path
+
+
+def collector_address(file_path: str) -> str:
+    """
+    Get the Unix socket path of the collector that owns a log file.
+
+    The path is derived from the absolute log file path and placed in a
+    directory of the temporary directory that only the current user can
+    access, which keeps it below the socket path length limit.
+
+    Args:
+        file_path (str): The log file.
+
+    Returns:
+        str: The socket path.
+
+    Raises:
+        PermissionError: If that directory belongs to another user or others can access it.
+    """
+    digest = hashlib.sha1(os.path.abspath(file_path).encode()).hexdigest()[:16]
+    return os.path.join(_runtime_directory(), f"{digest}.sock")
+
+
+class LogCollector:
+    """
+    Collector that writes log lines received from several processes to one log file.
+
+    Processes connect over a Unix socket and send newline-terminated lines. The
+    collector is the only writer of the file, so processes never rewrite it
+    underneath each other, and it rotates the file if a ``RotationConfig`` is
+    given. With a ``RemoteConfig``, the collector is also the only process that
+    ships the file to the remote server, and it does so whenever an exception
+    record arrives. It stops once no process has been connected for
+    ``idle_timeout`` seconds.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        max_entries: int = 500,
+        idle_timeout: float = 5.0,
+        rotation_config: RotationConfig = None,
+        remote_config: RemoteConfig = None,
+    ):
+        """
+        Initialize the collector.
+
+        Args:
+            file_path (str): The log file to write.
+            max_entries (int): The number of most recent log entries to keep.
+            idle_timeout (float): The time in seconds without clients after which the collector stops.
+            rotation_config (RotationConfig): The rotation configuration, or None to keep
+                only the last ``max_entries`` lines.
+            remote_config (RemoteConfig): The remote logging configuration, or None.
+        """
+        self.file_path = file_path
+        self.max_entries = max_entries
+        self.idle_timeout = idle_timeout
+        self.rotation_config = rotation_config
+        self.remote_config = remote_config
+        self.address = None
+        self.server = None
+        self.store = None
+        self.shipper = None
+
+    def bind(self) -> bool:
+        """
+        Start listening on the collector socket.
+
+        Returns:
+            bool: False if another collector already serves this log file.
+        """
+        import fcntl
+
+        self.address = collector_address(self.file_path)
+        lock = os.open(self.address + ".lock", os.O_WRONLY | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.address)
+                return False
+            except OSError:
+                pass
+            finally:
+                probe.close()
+
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+            self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.server.bind(self.address)
+            self.server.listen(128)
+            self.server.setblocking(False)
+        finally:
+            # Closing the file releases the lock.
+            os.close(lock)
+        rotation_config = self.rotation_config
+        if rotation_config is not None and rotation_config.use:
+            self.store = RotatingLogStore(
+                self.file_path,
+                self.max_entries,
+                max_bytes=rotation_config.max_bytes,
+                max_age=rotation_config.max_age,
+                retention=rotation_config.retention,
+                compression=rotation_config.compression,
+            )
+        else:
+            self.store = RingLogStore(self.file_path, self.max_entries)
+        if self.remote_config is not None and self.remote_config.use:
+            self.shipper = RemoteShipper(
+                Config(file_path=self.file_path, remote_config=self.remote_config), flush=self.store.flush
+            )
+            # Spool unshipped lines before the store compacts or rotates them away.
+            self.store.on_replace = self.shipper.collect
+            self.shipper.start()
+            self.shipper.request()
+        return True
+
+    def serve(self):
+        """
+        Write received lines until the collector has been idle for ``idle_timeout`` seconds.
+        """
+        selector = selectors.DefaultSelector()
+        selector.register(self.server, selectors.EVENT_READ)
+        pending = {}
+        try:
+            while True:
+                events = selector.select(self.idle_timeout)
+                if not events and not pending:
+                    break
+                for key, _ in events:
+                    if key.fileobj is self.server:
+                        try:
+                            connection, _ = self.server.accept()
+                        except BlockingIOError:
+                            continue
+                        connection.setblocking(False)
+                        selector.register(connection, selectors.EVENT_READ)
+                        pending[connection] = b""
+                        continue
+
+                    connection = key.fileobj
+                    try:
+                        data = connection.recv(65536)
+                    except BlockingIOError:
+                        continue
+                    except OSError:
+                        data = b""
+                    if not data:
+                        selector.unregister(connection)
+                        connection.close()
+                        rest = pending.pop(connection)
+                        if rest:
+                            self.store.append(rest.decode(errors="replace"))
+                        continue
+
+                    *lines, pending[connection] = (pending[connection] + data).split(b"\n")
+                    if lines:
+                        lines = [line.decode(errors="replace") for line in lines]
+                        self.store.extend(lines)
+                        if self.shipper is not None and any(_is_exception(line) for line in lines):
+                            self.shipper.request()
+        finally:
+            selector.close()
+            self.close()
+
+    def close(self):
+        """
+        Stop listening and close the log file.
+        """
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+        if self.store is not None:
+            self.store.close()
+        if self.shipper is not None:
+            self.shipper.close()
+            self.shipper = None
+
+
+class CollectorClient:
+    """
+    Connection through which a process sends its log lines to the collector.
+
+    It has the same ``append``/``extend``/``flush``/``close`` interface as
+    ``RingLogStore``, so it can replace the local store in ``LoggerCore``.
+    Forked children open their own connection.
+
+    If no collector comes up, or it goes away and cannot be restarted, lines
+    are dropped and counted in ``dropped`` instead of raising into the logging
+    code, and the connection is retried after ``retry_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        max_entries: int = 500,
+        connect_timeout: float = 5.0,
+        rotation_config: RotationConfig = None,
+        retry_interval: float = 5.0,
+        remote_config: RemoteConfig = None,
+    ):
+        """
+        Connect to the collector of a log file, starting one if none is running.
+
+        Args:
+            file_path (str): The log file.
+            max_entries (int): The number of most recent log entries the collector keeps.
+            connect_timeout (float): The time in seconds to wait for a new collector.
+            rotation_config (RotationConfig): The rotation configuration of a new collector.
+            retry_interval (float): The time in seconds between attempts to reconnect.
+            remote_config (RemoteConfig): The remote logging configuration of a new collector.
+        """
+        self.file_path = file_path
+        self.max_entries = max_entries
+        self.connect_timeout = connect_timeout
+        self.rotation_config = rotation_config
+        self.remote_config = remote_config
+        self.retry_interval = retry_interval
+        self.address = None
+        self.dropped = 0
+        self._closed = False
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._socket = None
+        self._reconnect()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reconnect_in_child)
+
+    def _connect(self) -> socket.socket:
+        try:
+            return self._open()
+        except OSError:
+            self._spawn_collector()
+
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                return self._open()
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def _open(self) -> socket.socket:
+        if self.address is None:
+            self.address = collector_address(self.file_path)
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.connect(self.address)
+        except OSError:
+            connection.close()
+            raise
+        return connection
+
+    def _spawn_collector(self):
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+        # On stdin rather than the command line, which other users can see.
+        options = {
+            "rotation": vars(self.rotation_config) if self.rotation_config is not None else None,
+            "remote": vars(self.remote_config) if self.remote_config is not None else None,
+        }
+        process = subprocess.Popen(
+            [sys.executable, "-m", "tracebook.log_collector", self.file_path, str(self.max_entries), "--options"],
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        with process.stdin:
+            process.stdin.write(json.dumps(options).encode())
+
+    def _reconnect_in_child(self):
+        self._lock = threading.Lock()
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+            self._retry_at = 0.0
+            self._reconnect()
+
+    def _reconnect(self) -> bool:
+        if time.monotonic() < self._retry_at:
+            return False
+        try:
+            self._socket = self._connect()
+            return True
+        except OSError:
+            self._retry_at = time.monotonic() + self.retry_interval
+            return False
+
+    def _send(self, data: bytes, lines: int):
+        with self._lock:
+            if self._closed:
+                self.dropped += lines
+                return
+            for _ in range(2):
+                if self._socket is None and not self._reconnect():
+                    break
+                try:
+                    self._socket.sendall(data)
+                    return
+                except OSError:
+                    # The collector stopped, e.g. after an idle timeout; start a new one.
+                    self._socket.close()
+                    self._socket = None
+            self.dropped += lines
+
+    def append(self, line: str):
+        """
+        Send a single line to the collector.
+
+        Args:
+            line (str): The line to send, without a trailing newline.
+        """
+        self._send((line + "\n").encode(), 1)
+
+    def extend(self, lines):
+        """
+        Send several lines to the collector with a single write.
+
+        Args:
+            lines (iterable of str): The lines to send.
+        """
+        lines = list(lines)
+        if lines:
+            self._send(("\n".join(lines) + "\n").encode(), len(lines))
+
+    def flush(self):
+        """
+        Lines are sent unbuffered, so there is nothing to flush.
+        """
+
+    def close(self):
+        """
+        Close the connection to the collector.
+        """
+        with self._lock:
+            self._closed = True
+            if self._socket is not None:
+                self._socket.close()
+                self._socket = None
+
+
+def main():
+    file_path = sys.argv[1]
+    max_entries = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    # A spawning client passes the rest of its configuration as JSON on stdin.
+    options = json.loads(sys.stdin.read() or "{}") if "--options" in sys.argv[3:] else {}
+    rotation = options.get("rotation")
+    remote = options.get("remote")
+    collector = LogCollector(
+        file_path,
+        max_entries,
+        rotation_config=RotationConfig(**rotation) if rotation else None,
+        remote_config=RemoteConfig(**remote) if remote else None,
+    )
+    if collector.bind():
+        collector.serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+from collections import deque
+
+
+def replacement_path(file_path: str) -> str:
+    """
+    Get the path of the note describing the last compaction of a log file.
+
+    Args:
+        file_path (str): The log file.
+
+    Returns:
+        str: The note path.
+    """
+    return file_path + ".replaced.json"
+
+
+def resume_offset(file_path: str, previous, current) -> int:
+    """
+    Get where a reader of a replaced log file continues in the new file.
+
+    Args:
+        file_path (str): The log file.
+        previous (tuple): The (device, inode) of the file read so far, or None.
+        current (tuple): The (device, inode) of the file that replaced it.
+
+    Returns:
+        int: The number of bytes at the start of the new file that were copied
+        from the previous one by compaction, or 0 if it is not a compaction of it.
+    """
+    if previous is None:
+        return 0
+    try:
+        with open(replacement_path(file_path)) as file:
+            note = json.load(file)
+    except (OSError, ValueError):
+        return 0
+    if tuple(note["previous"]) != tuple(previous) or tuple(note["current"]) != tuple(current):
+        return 0
+    return note["kept"]
+
+
+class RingLogStore:
+    """
+    Bounded log store that retains the last ``max_entries`` log lines.
+
+    Lines are kept in an in-memory ring and appended to the log file through a
+    single long-lived handle, so each append is constant time. The file is
+    compacted back down to the ring contents once it holds twice as many lines
+    as allowed, which keeps the amortized cost per line constant while the file
+    always contains at least the last ``max_entries`` lines.
+
+    The store is safe to use from several threads. ``on_replace``, if set, is
+    called before the file is compacted, e.g. to read lines not yet shipped.
+    Every compaction is described in ``<file_path>.replaced.json``, so that
+    readers continue after the lines that were copied, see ``resume_offset``.
+    Lines appended after ``close`` are dropped and counted in ``dropped``.
+    """
+
+    def __init__(self, file_path: str, max_entries: int = 500):
+        """
+        Initialize the store and load the tail of an existing log file.
+
+        Args:
+            file_path (str): The log file backing the store.
+            max_entries (int): The number of most recent lines to retain.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.file_path = file_path
+        self.max_entries = max_entries
+        self.entries = deque(maxlen=max_entries)
+        self.dropped = 0
+        self._file_lines = 0
+        self._lock = threading.Lock()
+        self.on_replace = None
+        self._load()
+        self._file = open(self.file_path, "a", buffering=1)
+
+    def _load(self):
+        if not os.path.exists(self.file_path):
+            return
+        with open(self.file_path, "r") as file:
+            for line in file:
+                self.entries.append(line.rstrip("\n"))
+                self._file_lines += 1
+
+    def append(self, line: str):
+        """
+        Append a single line to the store.
+
+        Args:
+            line (str): The line to append, without a trailing newline.
+        """
+        with self._lock:
+            if self._file.closed:
+                self.dropped += 1
+                return
+            self.entries.append(line)
+            self._file.write(line + "\n")
+            self._file_lines += 1
+            if self._file_lines >= 2 * self.max_entries:
+                self._compact()
+
+    def extend(self, lines):
+        """
+        Append several lines to the store with a single write.
+
+        Args:
+            lines (iterable of str): The lines to append.
+        """
+        lines = list(lines)
+        if not lines:
+            return
+        with self._lock:
+            if self._file.closed:
+                self.dropped += len(lines)
+                return
+            self.entries.extend(lines)
+            self._file.write("\n".join(lines) + "\n")
+            self._file_lines += len(lines)
+            if self._file_lines >= 2 * self.max_entries:
+                self._compact()
+
+    def compact(self):
+        """
+        Rewrite the log file so that it holds only the retained lines.
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._compact()
+
+    def _compact(self):
+        # Replace the file in one step, so readers see either the old or the new file.
+        if self.on_replace is not None:
+            self.on_replace()
+        self._file.close()
+        temporary = self.file_path + ".tmp"
+        with open(temporary, "w") as file:
+            file.writelines(line + "\n" for line in self.entries)
+        self._note_replacement(temporary)
+        os.replace(temporary, self.file_path)
+        self._file_lines = len(self.entries)
+        self._file = open(self.file_path, "a", buffering=1)
+
+    def _note_replacement(self, temporary: str):
+        # Written before the replacement, so that readers who see the new file
+        # find its note. Renaming keeps the inode of the temporary file.
+        previous = os.stat(self.file_path)
+        current = os.stat(temporary)
+        note = {
+            "previous": [previous.st_dev, previous.st_ino],
+            "current": [current.st_dev, current.st_ino],
+            "kept": current.st_size,
+        }
+        path = replacement_path(self.file_path)
+        with open(path + ".tmp", "w") as file:
+            json.dump(note, file)
+        os.replace(path + ".tmp", path)
+
+    def tail(self, count: int = None):
+        """
+        Get the most recent lines held by the store.
+
+        Args:
+            count (int): The number of lines to return, or None for all of them.
+
+        Returns:
+            list: The most recent lines, oldest first.
+        """
+        with self._lock:
+            entries = list(self.entries)
+        if count is None:
+            return entries
+        return entries[-count:] if count else []
+
+    def flush(self):
+        """
+        Flush buffered lines to the log file.
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self):
+        """
+        Flush and close the log file.
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
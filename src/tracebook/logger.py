@@ -1,15 +1,42 @@
 # decorators.py
-from functools import wraps
+from time import perf_counter_ns, process_time_ns
 
 from tracebook.config import Config, LogLevel
+from tracebook.functions import FunctionInfo
 from tracebook.logger_core import LoggerCore
-from tracebook.utils import get_cpu_usage, get_memory_usage
+from tracebook.render import Renderer, default_renderer
+from tracebook.sampling import SamplingPolicy
+from tracebook.wrappers import is_async, wrap_call
+
+_INFO = LogLevel.INFO.value
+_ERROR = LogLevel.ERROR.value
+
+_LEVEL_METHODS = {
+    "debug": LogLevel.DEBUG,
+    "info": LogLevel.INFO,
+    "warning": LogLevel.WARNING,
+    "error": LogLevel.ERROR,
+    "critical": LogLevel.CRITICAL,
+}
+
+
+# State of a call that a sampling policy chose not to log.
+_SKIPPED = object()
+
+
+def _disabled(*args):
+    pass
 
 
 class Logger:
     """
     Logger class for logging function calls, parameters, return values, and execution times.
 
+    The trace decorators work with regular functions, generators, coroutine functions
+    and async generators. Async functions are timed over their awaited duration, and
+    decorating one switches the logger to its background writer so that logging does
+    not block the event loop.
+
     Parameters
     ----------
     config : Config
@@ -37,6 +64,16 @@ class Logger:
         Logs error-level messages.
     critical : logging function
         Logs critical-level messages.
+    flush : function
+        Writes every pending log record.
+    close : function
+        Writes every pending log record and releases the log file.
+    set_log_level : function
+        Changes the minimum level of logged messages at runtime.
+    stats : function
+        Returns call statistics of functions traced with `aggregate=True`.
+    sampling_stats : function
+        Returns the number of logged and skipped calls of sampled functions.
     """
 
     def __init__(self, config: Config):
@@ -44,6 +81,31 @@ class Logger:
         Initialize the logger
         """
         self.logger = LoggerCore(config)
+        self._bind_log_methods()
+
+    def _bind_log_methods(self):
+        # Disabled levels resolve to a no-op so filtered calls skip all formatting.
+        for name, level in _LEVEL_METHODS.items():
+            if self.logger.is_enabled(level):
+                self.__dict__.pop(name, None)
+            else:
+                setattr(self, name, _disabled)
+
+    def set_log_level(self, level: LogLevel):
+        """
+        Changes the minimum level of logged messages at runtime.
+
+        Parameters
+        ----------
+        level : LogLevel
+            The new minimum log level.
+
+        Returns
+        -------
+        None
+        """
+        self.logger.set_log_level(level)
+        self._bind_log_methods()
 
     def trace(
         self,
@@ -52,6 +114,9 @@ class Logger:
         log_exceptions: bool = True,
         log_resources: bool = False,
         blocking: bool = False,
+        renderer: Renderer = None,
+        aggregate: bool = False,
+        sampling: SamplingPolicy = None,
     ):
         """
         A decorator function to log function calls, parameters, return values, and execution times.
@@ -68,6 +133,16 @@ class Logger:
             Whether to log system resources (default: False)
         blocking : bool
             Whether to block the execution of the function if an exception occurs (default: False)
+        renderer : Renderer
+            Limits and formatters used to render inputs and outputs (default: size-capped repr)
+        aggregate : bool
+            Whether to keep call statistics instead of logging every call. Inputs, outputs
+            and resources are not logged per call; a summary is logged periodically and
+            the statistics are available through `stats()` (default: False)
+        sampling : SamplingPolicy
+            Which calls to log, e.g. `Probability(0.01)`, `OneInN(100)` or `TokenBucket(10)`.
+            Calls that are not sampled skip all logging; their exceptions are still logged
+            if the policy has `always_on_error` set (default: log every call)
 
         Returns
         -------
@@ -75,73 +150,187 @@ class Logger:
             A decorator function that logs the specified information
         """
 
+        core = self.logger
+        renderer = renderer or default_renderer
+        sampler = core.start_resource_sampler() if log_resources and not aggregate else None
+
         def decorator(func):
-            @wraps(func)
-            def wrapper(*args, **kwargs):
+            function = core.register_function(func)
+            name, function_id = function.name, function.id
+            if is_async(func):
+                core.start_async_writer()
+            if aggregate:
+                return self._aggregate(func, function, log_exceptions, blocking)
+
+            def before(args, kwargs):
+                if core.min_level > _INFO:
+                    return None
                 if log_inputs:
-                    self.logger.log_function_call(func.__name__, *args, **kwargs)
-                try:
-                    result = func(*args, **kwargs)
-                    if log_outputs:
-                        self.logger.log_function_exit(func.__name__, str(result))
-                    return result
-                except Exception as e:
-                    if log_exceptions:
-                        self.logger.log_exception(func.__name__, e)
-                    if blocking:
-                        raise e
-                    else:
-                        if log_outputs:
-                            self.logger.log_function_exit(func.__name__, str(None))
-                        return None
-                finally:
-                    if log_resources:
-                        cpu_usage = get_cpu_usage()
-                        memory_usage = get_memory_usage()
-                        self.logger.log_details(f"{cpu_usage} {memory_usage}")
-
-            return wrapper
+                    core.log_function_inputs(name, args, kwargs, renderer, function_id)
+                return perf_counter_ns(), process_time_ns()
+
+            def finish(state, result):
+                start_ns, cpu_start_ns = state
+                cpu_ns = process_time_ns() - cpu_start_ns
+                if log_outputs:
+                    core.log_function_result(
+                        name, result, renderer, perf_counter_ns() - start_ns, cpu_ns, function_id
+                    )
+                if log_resources:
+                    core.log_resources(sampler.sample, cpu_ns)
+
+            def after(state, result):
+                if state is not None:
+                    finish(state, result)
+
+            def failed(state, e):
+                if log_exceptions and core.min_level <= _ERROR:
+                    core.log_exception(name, e, function_id)
+                if blocking:
+                    if state is not None and log_resources:
+                        core.log_resources(sampler.sample, process_time_ns() - state[1])
+                    raise e
+                if state is not None:
+                    finish(state, None)
+                return None
+
+            if sampling is not None:
+                return self._sampled(func, function, sampling, before, after, failed, log_exceptions, blocking)
+            return wrap_call(func, before, after, failed)
 
         return decorator
 
-    def trace_inputs(self):
+    def _sampled(
+        self,
+        func,
+        function: FunctionInfo,
+        sampling: SamplingPolicy,
+        before,
+        after,
+        failed,
+        log_exceptions: bool,
+        blocking: bool,
+    ):
+        core = self.logger
+        name = function.name
+        policy = core.register_sampling(function.full_name, sampling)
+        log_errors = log_exceptions and policy.always_on_error
+
+        def sampled_before(args, kwargs):
+            if policy.sample():
+                return before(args, kwargs)
+            return _SKIPPED
+
+        def sampled_after(state, result):
+            if state is not _SKIPPED:
+                after(state, result)
+
+        def sampled_failed(state, e):
+            if state is not _SKIPPED:
+                return failed(state, e)
+            if log_errors and core.min_level <= _ERROR:
+                core.log_exception(name, e, function.id)
+            if blocking:
+                raise e
+            return None
+
+        return wrap_call(func, sampled_before, sampled_after, sampled_failed)
+
+    def _aggregate(self, func, function: FunctionInfo, log_exceptions: bool, blocking: bool):
+        core = self.logger
+        name = function.name
+        stats = core.register_stats(function.full_name)
+
+        def before(args, kwargs):
+            return perf_counter_ns()
+
+        def after(start_ns, result):
+            stats.record(perf_counter_ns() - start_ns)
+
+        def failed(start_ns, e):
+            stats.record(perf_counter_ns() - start_ns, e)
+            if log_exceptions and core.min_level <= _ERROR:
+                core.log_exception(name, e, function.id)
+            if blocking:
+                raise e
+            return None
+
+        return wrap_call(func, before, after, failed)
+
+    def trace_inputs(self, renderer: Renderer = None):
         """
         A decorator function that logs the inputs of a function.
 
+        Parameters
+        ----------
+        renderer : Renderer
+            Limits and formatters used to render inputs (default: size-capped repr)
+
         Returns
         -------
         decorator
             A decorator function that logs the inputs of the decorated function.
         """
 
+        core = self.logger
+        renderer = renderer or default_renderer
+
         def decorator(func):
-            @wraps(func)
-            def wrapper(*args, **kwargs):
-                self.logger.log_function_call(func.__name__, *args, **kwargs)
-                return func(*args, **kwargs)
+            function = core.register_function(func)
+            name, function_id = function.name, function.id
+            if is_async(func):
+                core.start_async_writer()
+
+            def before(args, kwargs):
+                if core.min_level <= _INFO:
+                    core.log_function_inputs(name, args, kwargs, renderer, function_id)
 
-            return wrapper
+            return wrap_call(func, before)
 
         return decorator
 
-    def trace_outputs(self):
+    def trace_outputs(self, renderer: Renderer = None):
         """
         A decorator function to log function outputs.
 
+        Parameters
+        ----------
+        renderer : Renderer
+            Limits and formatters used to render outputs (default: size-capped repr)
+
         Returns
         -------
         decorator
             A decorator function that logs function outputs
         """
 
-        def decorator(func):
-            @wraps(func)
-            def wrapper(*args, **kwargs):
-                result = func(*args, **kwargs)
-                self.logger.log_function_exit(func.__name__, str(result))
-                return result
+        core = self.logger
+        renderer = renderer or default_renderer
 
-            return wrapper
+        def decorator(func):
+            function = core.register_function(func)
+            name, function_id = function.name, function.id
+            if is_async(func):
+                core.start_async_writer()
+
+            def before(args, kwargs):
+                if core.min_level > _INFO:
+                    return None
+                return perf_counter_ns(), process_time_ns()
+
+            def after(state, result):
+                if state is not None:
+                    start_ns, cpu_start_ns = state
+                    core.log_function_result(
+                        name,
+                        result,
+                        renderer,
+                        perf_counter_ns() - start_ns,
+                        process_time_ns() - cpu_start_ns,
+                        function_id,
+                    )
+
+            return wrap_call(func, before, after)
 
         return decorator
 
@@ -155,16 +344,20 @@ class Logger:
             A decorator function that catches and logs exceptions raised by the decorated function.
         """
 
+        core = self.logger
+
         def decorator(func):
-            @wraps(func)
-            def wrapper(*args, **kwargs):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    self.logger.log_exception(func.__name__, e)
-                    raise
+            function = core.register_function(func)
+            name, function_id = function.name, function.id
+            if is_async(func):
+                core.start_async_writer()
+
+            def failed(state, e):
+                if core.min_level <= _ERROR:
+                    core.log_exception(name, e, function_id)
+                raise e
 
-            return wrapper
+            return wrap_call(func, failed=failed)
 
         return decorator
 
@@ -186,22 +379,29 @@ class Logger:
             my_function(1, 2)
         """
 
+        core = self.logger
+        sampler = core.start_resource_sampler()
+
         def decorator(func):
-            @wraps(func)
-            def wrapper(*args, **kwargs):
-                import time
-
-                start_time = time.time()
-                result = func(*args, **kwargs)
-                end_time = time.time()
-                cpu_usage = get_cpu_usage()
-                memory_usage = get_memory_usage()
-                self.logger.log_details(
-                    f"Execution Time: {end_time - start_time} seconds, CPU Usage: {cpu_usage}, Memory Usage: {memory_usage}"
-                )
-                return result
-
-            return wrapper
+            core.register_function(func)
+            if is_async(func):
+                core.start_async_writer()
+
+            def before(args, kwargs):
+                if core.min_level > _INFO:
+                    return None
+                return perf_counter_ns(), process_time_ns()
+
+            def after(state, result):
+                if state is not None:
+                    start_ns, cpu_start_ns = state
+                    core.log_execution(
+                        perf_counter_ns() - start_ns,
+                        process_time_ns() - cpu_start_ns,
+                        sampler.sample,
+                    )
+
+            return wrap_call(func, before, after)
 
         return decorator
 
@@ -274,3 +474,57 @@ class Logger:
         None
         """
         self.logger.log_details(" ".join(args), LogLevel.CRITICAL)
+
+    def flush(self):
+        """
+        Writes every pending log record.
+
+        When the asynchronous writer is enabled, records queued by the decorators
+        and logging functions are written before this method returns.
+
+        Returns
+        -------
+        None
+        """
+        self.logger.flush()
+
+    def close(self):
+        """
+        Writes every pending log record and releases the log file.
+
+        With remote logging, the lines not shipped yet are sent once more before
+        this method returns. This also happens at interpreter exit for loggers
+        that were not closed.
+        Records logged after closing are dropped instead of raising.
+
+        Returns
+        -------
+        None
+        """
+        self.logger.close()
+
+    def stats(self):
+        """
+        Returns call statistics of functions traced with `aggregate=True`.
+
+        Returns
+        -------
+        dict
+            Maps functions, by module and qualified name such as `app.Handler.run`,
+            to their call count, error count, exception counts
+            by type and `min_ns`, `max_ns`, `mean_ns`, `p50_ns`, `p95_ns` and `p99_ns`
+            durations in nanoseconds.
+        """
+        return self.logger.stats.snapshot()
+
+    def sampling_stats(self):
+        """
+        Returns the number of logged and skipped calls of sampled functions.
+
+        Returns
+        -------
+        dict
+            Maps functions, by module and qualified name such as `app.Handler.run`,
+            to their `sampled` and `skipped` call counts.
+        """
+        return {name: policy.counts() for name, policy in self.logger.sampling.items()}
@@ -1,27 +1,121 @@
 # logger.py
+import atexit
+import importlib.util
 import logging
+import threading
+import time
 from typing import Literal
 
+from tracebook.async_writer import AsyncWriter
 from tracebook.config import Config, LogLevel
-from tracebook.remote_handler import log_push_file_to_remote_server
-from tracebook.utils import current_timestamp
+from tracebook.event_bus import EventBus, LogEvent
+from tracebook.functions import FunctionInfo, FunctionRegistry
+from tracebook.log_collector import CollectorClient
+from tracebook.log_store import RingLogStore
+from tracebook.records import RecordWriter
+from tracebook.remote_handler import RemoteShipper
+from tracebook.render import FunctionMessage, LazyArguments, LazyResult, Renderer, default_renderer, render_message
+from tracebook.resource_probe import ExecutionDetails, ResourceDetails, ResourceSample
+from tracebook.resource_sampler import ResourceSampler
+from tracebook.rotation import RotatingLogStore
+from tracebook.sampling import SamplingPolicy
+from tracebook.stats import FunctionStats, StatsRegistry
+from tracebook.utils import TimestampFormatter, current_timestamp
+
+# Imported by the dashboard, installed with the ``dashboard`` extra.
+_DASHBOARD_MODULES = ("dash", "dash_bootstrap_components", "flask", "plotly")
 
 
 class LoggerCore:
     def __init__(self, config: Config):
         self.config = config
-        with open(self.config.file_path, "a") as file:
-            file.write(f"=== Starting TraceBook at {current_timestamp()} ===\n")
-        if self.config.remote_config.use:
-            log_push_file_to_remote_server(self.config)
+        self.min_level = config.log_level.value
+        self.sampler = None
+        self.timestamps = TimestampFormatter(config.timestamp_precision)
+        self.functions = FunctionRegistry()
+        self.stats = StatsRegistry()
+        self._stats_thread = None
+        self._stats_stopped = threading.Event()
+        self._reported_calls = {}
+        self.sampling = {}
+        self.events = None
+        rotation_config = self.config.rotation_config
+        remote_config = self.config.remote_config
+        if self.config.multiprocess and remote_config.use and remote_config.payload == "binary":
+            raise ValueError("The binary payload ships the record file of one process; use text or ndjson")
+        if self.config.multiprocess:
+            # The collector owns the file, so it is the one that ships it.
+            self.store = CollectorClient(
+                self.config.file_path,
+                self.config.max_log_entries,
+                rotation_config=rotation_config,
+                remote_config=remote_config,
+            )
+        elif rotation_config.use:
+            self.store = RotatingLogStore(
+                self.config.file_path,
+                self.config.max_log_entries,
+                max_bytes=rotation_config.max_bytes,
+                max_age=rotation_config.max_age,
+                retention=rotation_config.retention,
+                compression=rotation_config.compression,
+            )
+        else:
+            self.store = RingLogStore(self.config.file_path, self.config.max_log_entries)
+        self.store.append(f"=== Starting TraceBook at {current_timestamp()} ===")
+        self.records = None
+        if self.config.record_file_path:
+            # Other processes may log to the same path; blocks of several
+            # writers in one file cannot be read back.
+            self.records = RecordWriter(
+                self.config.record_file_path, self.functions, per_process=self.config.multiprocess
+            )
+            atexit.register(self.records.flush)
+        self.writer = None
+        if self.config.async_config.use:
+            self.start_async_writer()
 
+        self.shipper = None
+        if remote_config.use and not self.config.multiprocess:
+            # Buffered records are written on the shipping thread, not on
+            # the thread that requested the push.
+            self.shipper = RemoteShipper(self.config, flush=self.flush)
+            if remote_config.payload != "binary":
+                # Spool unshipped lines before the store compacts or rotates them away.
+                self.store.on_replace = self.shipper.collect
+            self.shipper.start()
+            self.shipper.request()
+            atexit.register(self._ship_at_exit)
+
+        self.dashboard = None
         if self.config.web_config.is_active:
-            from tracebook.dashboard import RealTimeDashboard
+            self.start_dashboard()
 
-            self.dashboard = RealTimeDashboard(self.config)
-            self.dashboard.run()
-        else:
-            self.dashboard = None
+    def start_dashboard(self):
+        """
+        Start the web dashboard on a background thread.
+
+        Importing Dash, Flask and Plotly takes most of a second, so it happens on
+        that thread as well. Log entries are kept for the dashboard from the
+        start, resource samples only once it is running. Without the
+        ``dashboard`` extra installed, a note is logged instead.
+        """
+        missing = [name for name in _DASHBOARD_MODULES if importlib.util.find_spec(name) is None]
+        if missing:
+            self.store.append(
+                f"=== TraceBook dashboard disabled, missing {', '.join(missing)}: "
+                "pip install tracebook[dashboard] ==="
+            )
+            return
+        self.events = EventBus(self.config.max_log_entries)
+        threading.Thread(target=self._run_dashboard, name="tracebook-dashboard", daemon=True).start()
+
+    def _run_dashboard(self):
+        from tracebook.dashboard import RealTimeDashboard
+
+        dashboard = RealTimeDashboard(self.config, self.events)
+        dashboard.run()
+        self.dashboard = dashboard
 
     def _save_message(self, message: str, level: LogLevel = LogLevel.INFO):
         level_str = level.name
@@ -33,18 +127,203 @@ class LoggerCore:
         if self.config.output == "file" or self.config.output == "both":
             self._write_to_file(full_message)
 
+    def set_log_level(self, level: LogLevel):
+        """
+        Change the minimum level of records that are logged.
+
+        Args:
+            level (LogLevel): The new minimum log level.
+        """
+        self.config.log_level = level
+        self.min_level = level.value
+
+    def is_enabled(self, level: LogLevel) -> bool:
+        """
+        Check whether records of the given level are logged.
+
+        Args:
+            level (LogLevel): The level to check.
+
+        Returns:
+            bool: True if records of this level are logged.
+        """
+        return level.value >= self.min_level
+
+    def start_async_writer(self) -> AsyncWriter:
+        """
+        Get the background writer, starting it on first use.
+
+        Once started, every record is written by the background thread. This is
+        also used by the decorators of async functions, so that logging never
+        blocks a running event loop.
+
+        Returns:
+            AsyncWriter: The background writer.
+        """
+        if self.writer is None:
+            async_config = self.config.async_config
+            self.writer = AsyncWriter(
+                self._write_records,
+                batch_size=async_config.batch_size,
+                flush_interval=async_config.flush_interval,
+                queue_size=async_config.queue_size,
+                overflow_policy=async_config.overflow_policy,
+            )
+            atexit.register(self.flush)
+        return self.writer
+
+    def start_resource_sampler(self) -> ResourceSampler:
+        """
+        Get the resource sampler, starting it on first use.
+
+        Returns:
+            ResourceSampler: The sampler shared by the resource decorators.
+        """
+        if self.sampler is None:
+            self.sampler = ResourceSampler(self.config.resource_sample_interval)
+        return self.sampler
+
+    def register_function(self, func) -> FunctionInfo:
+        """
+        Assign an id to a traced function.
+
+        Args:
+            func (callable): The decorated function.
+
+        Returns:
+            FunctionInfo: The id, name and call site of the function.
+        """
+        return self.functions.register(func)
+
+    def register_stats(self, function_name: str) -> FunctionStats:
+        """
+        Get the statistics of an aggregated function and start periodic summaries.
+
+        Args:
+            function_name (str): The ``FunctionInfo.full_name`` of the traced function.
+
+        Returns:
+            FunctionStats: The statistics of the function.
+        """
+        if self._stats_thread is None:
+            self._stats_thread = threading.Thread(
+                target=self._report_stats, name="tracebook-stats", daemon=True
+            )
+            self._stats_thread.start()
+        return self.stats.register(function_name)
+
+    def register_sampling(self, function_name: str, policy: SamplingPolicy) -> SamplingPolicy:
+        """
+        Bind a sampling policy to a traced function.
+
+        Args:
+            function_name (str): The ``FunctionInfo.full_name`` of the traced function.
+            policy (SamplingPolicy): The policy passed to the decorator.
+
+        Returns:
+            SamplingPolicy: The policy instance used by this function.
+        """
+        bound = policy.bind()
+        self.sampling[function_name] = bound
+        return bound
+
+    def _report_stats(self):
+        while not self._stats_stopped.wait(self.config.stats_summary_interval):
+            self.log_stats()
+
+    def log_stats(self):
+        """
+        Log a summary record for every aggregated function called since the last summary.
+        """
+        for stats in list(self.stats.functions.values()):
+            if stats.calls == self._reported_calls.get(stats.name):
+                continue
+            self._reported_calls[stats.name] = stats.calls
+            self._submit("|", f"stats {stats.summary()}", LogLevel.INFO)
+
+    def _submit(self, operation_symbol: Literal[">", "<", "|", "*"], message: str, level: LogLevel):
+        if level.value < self.min_level:
+            return
+        if self.writer is not None:
+            self.writer.put((level, time.monotonic_ns(), operation_symbol, message, threading.get_ident()))
+            return
+        # One clock reading and one rendering for every sink, so that the record
+        # file converts back to exactly the text lines.
+        timestamp_ns = time.monotonic_ns()
+        message = render_message(message)
+        timestamp = self.timestamps.format(timestamp_ns)
+        if self.records is not None:
+            self.records.write(level, timestamp_ns, operation_symbol, message, threading.get_ident())
+        if self.events is not None:
+            message = self._publish(level, timestamp, operation_symbol, message)
+        self._save_message(f"{timestamp} {operation_symbol} {message}", level)
+
+    def _publish(self, level: LogLevel, timestamp: str, operation_symbol: str, message) -> str:
+        event = LogEvent.from_record(level, timestamp, operation_symbol, message)
+        self.events.publish(event)
+        return event.body()
+
+    def _write_records(self, records):
+        to_console = self.config.output == "console" or self.config.output == "both"
+        to_file = self.config.output == "file" or self.config.output == "both"
+        format_timestamp = self.timestamps.format
+        lines = []
+        for level, timestamp_ns, operation_symbol, message, thread_ident in records:
+            message = render_message(message)
+            timestamp = format_timestamp(timestamp_ns)
+            # Written right after formatting, so that a refreshed clock anchor
+            # applies to the same records in both.
+            if self.records is not None:
+                self.records.write(level, timestamp_ns, operation_symbol, message, thread_ident)
+            if self.events is not None:
+                message = self._publish(level, timestamp, operation_symbol, message)
+            full_message = f"[{level.name}] {timestamp} {operation_symbol} {message}"
+            if to_console:
+                self._log_to_console(full_message, level)
+            lines.append(full_message)
+        if to_file:
+            self.store.extend(lines)
+
+    def _ship_at_exit(self):
+        # Registered after the flush hooks of the writers, so it runs before
+        # them; the shipper flushes them, so that the last lines are shipped too.
+        self.shipper.close()
+
     def _write_to_file(self, message: str):
-        with open(self.config.file_path, "a") as file:
-            file.write(message + "\n")
+        self.store.append(message)
+
+    def flush(self):
+        """
+        Write every pending record to its destination.
+        """
+        if self.writer is not None:
+            self.writer.flush()
+        self.store.flush()
+        if self.records is not None:
+            self.records.flush()
 
-        # Check if log file has more than 500 entries and trim older entries
-        with open(self.config.file_path, "r") as file:
-            lines = file.readlines()
+    def close(self):
+        """
+        Flush pending records and release the log file.
 
-        if len(lines) > 500:
-            # Keep only the last 500 entries
-            with open(self.config.file_path, "w") as file:
-                file.writelines(lines[-500:])
+        Records logged afterwards are dropped and counted in the ``dropped``
+        attribute of the store, the record writer and the background writer.
+        """
+        # Nothing is left for the exit hooks to do.
+        atexit.unregister(self.flush)
+        atexit.unregister(self._ship_at_exit)
+        if self.records is not None:
+            atexit.unregister(self.records.flush)
+        if self.writer is not None:
+            self.writer.close()
+        if self.sampler is not None:
+            self.sampler.stop()
+        self._stats_stopped.set()
+        self.store.close()
+        if self.records is not None:
+            self.records.close()
+        if self.shipper is not None:
+            self.shipper.close()
 
     def _log_to_console(self, message: str, level: LogLevel):
         log_method = {
@@ -57,27 +336,54 @@ class LoggerCore:
         log_method(message)
 
     def log_function_enter(self, function_name: str, parameters: str):
-        message = self._generate_message(">", f"{function_name} {parameters}")
-        self._save_message(message, LogLevel.INFO)
+        self._submit(">", f"{function_name} {parameters}", LogLevel.INFO)
 
     def log_function_exit(self, function_name: str, result: str):
-        message = self._generate_message("<", f"{function_name} {result}")
-        self._save_message(message, LogLevel.INFO)
+        self._submit("<", f"{function_name} {result}", LogLevel.INFO)
 
     def log_function_call(self, function_name: str, *args, **kwargs):
-        parameters = f"{args} {kwargs}"
-        self.log_function_enter(function_name, parameters)
+        self.log_function_inputs(function_name, args, kwargs)
 
-    def log_exception(self, function_name: str, exception: Exception):
-        message = self._generate_message("*", f"{function_name} {str(exception)}")
-        self._save_message(message, LogLevel.ERROR)
+    def log_function_inputs(
+        self,
+        function_name: str,
+        args: tuple,
+        kwargs: dict,
+        renderer: Renderer = default_renderer,
+        function_id: int = 0,
+    ):
+        self._submit(">", LazyArguments(function_name, args, kwargs, renderer, function_id), LogLevel.INFO)
+
+    def log_function_result(
+        self,
+        function_name: str,
+        result,
+        renderer: Renderer = default_renderer,
+        duration_ns: int = None,
+        cpu_ns: int = None,
+        function_id: int = 0,
+    ):
+        self._submit(
+            "<", LazyResult(function_name, result, renderer, duration_ns, cpu_ns, function_id), LogLevel.INFO
+        )
+
+    def log_exception(self, function_name: str, exception: Exception, function_id: int = 0):
+        self._submit("*", FunctionMessage(function_name, str(exception), function_id), LogLevel.ERROR)
         if self.config.remote_config.use:
-            self._save_message(self._generate_message("|", f"{function_name} pushed log to remote server"), LogLevel.INFO)
-            log_push_file_to_remote_server(self.config)
+            self._submit("|", f"{function_name} remote push requested", LogLevel.INFO)
+            if self.shipper is not None:
+                self.shipper.request()
+
+    def log_resources(self, sample: ResourceSample, cpu_ns: int):
+        self._submit("|", ResourceDetails(sample, cpu_ns), LogLevel.INFO)
+        if self.dashboard is not None:
+            self.dashboard.add_resource_sample(sample)
+
+    def log_execution(self, duration_ns: int, cpu_ns: int, sample: ResourceSample):
+        self._submit("|", ExecutionDetails(duration_ns, cpu_ns, sample), LogLevel.INFO)
 
     def log_details(self, message: str, level: LogLevel = LogLevel.INFO):
-        message = self._generate_message("|", message)
-        self._save_message(message, level)
+        self._submit("|", message, level)
 
     def _generate_message(self, operation_symbol: Literal[">", "<", "|", "*"], message):
-        return f"{current_timestamp()} {operation_symbol} {message}"
+        return f"{self.timestamps.now()} {operation_symbol} {message}"
@@ -0,0 +1,533 @@
+import os
+import struct
+import sys
+import threading
+from typing import NamedTuple, Optional
+
+from tracebook.config import LogLevel
+from tracebook.functions import FunctionInfo, FunctionRegistry
+from tracebook.render import format_timing
+from tracebook.utils import TimestampFormatter, clock_anchor
+
+MAGIC = b"TBRC\x01"
+
+OPERATIONS = (">", "<", "|", "*")
+LEVELS = tuple(LogLevel)
+
+# Tags of the entries that follow the magic bytes. Log records use one tag per
+# level and operation, so neither needs its own byte.
+SESSION = 0
+FUNCTION = 1
+THREAD = 2
+ANCHOR = 4
+RECORD = 16
+
+_ANCHOR = struct.Struct("<qq")
+_LEVEL_INDEX = {level: index for index, level in enumerate(LEVELS)}
+_OPERATION_INDEX = {operation: index for index, operation in enumerate(OPERATIONS)}
+_FORMATTERS = {precision: TimestampFormatter(precision) for precision in TimestampFormatter.PRECISIONS}
+
+
+class Record(NamedTuple):
+    """
+    A log record read from a binary record file.
+
+    ``timestamp`` is the wall-clock time in seconds since the epoch, ``wall_ns``
+    the same time in nanoseconds, and ``timestamp_ns`` the
+    ``time.monotonic_ns()`` reading of the writing process.
+    ``function_name``, ``duration_ns`` and ``cpu_ns`` are None for records that
+    are not about a traced call or were not timed, and ``function`` holds the
+    id and call site of the traced function.
+    """
+
+    level: LogLevel
+    timestamp: float
+    timestamp_ns: int
+    thread_id: int
+    operation: str
+    function_name: Optional[str]
+    duration_ns: Optional[int]
+    cpu_ns: Optional[int]
+    message: str
+    function: Optional[FunctionInfo] = None
+    wall_ns: Optional[int] = None
+
+    def text(self, precision: str = "s") -> str:
+        """
+        Format the record as a line of the text log file.
+
+        Args:
+            precision (str): The timestamp precision, "s", "ms" or "us".
+
+        Returns:
+            str: The line, e.g. ``[INFO] 2024-08-13 14:21:50 > fact (5,) {}``.
+        """
+        message = self.message
+        if self.function_name is not None:
+            message = f"{self.function_name} {message}"
+        if self.duration_ns is not None:
+            message = f"{message} {format_timing(self.duration_ns, self.cpu_ns)}"
+        # The float timestamp is too coarse for microseconds.
+        wall_ns = self.wall_ns if self.wall_ns is not None else round(self.timestamp * 1e9)
+        timestamp = _FORMATTERS[precision].format_wall_ns(wall_ns)
+        return f"[{self.level.name}] {timestamp} {self.operation} {message}"
+
+    def to_json(self) -> dict:
+        """
+        Convert the record to JSON, with the fields of ``event_to_json`` and its numbers.
+
+        Returns:
+            dict: The JSON object. ``timestamp`` has microseconds, and
+            ``message`` holds no timings; they are in ``duration_ns`` and ``cpu_ns``.
+        """
+        args = kwargs = None
+        if self.operation == ">" and self.function_name is not None and " " in self.message:
+            args, kwargs = self.message.rsplit(" ", 1)
+        wall_ns = self.wall_ns if self.wall_ns is not None else round(self.timestamp * 1e9)
+        return {
+            "level": self.level.name,
+            "timestamp": _FORMATTERS["us"].format_wall_ns(wall_ns),
+            "operation": self.operation,
+            "function": self.function_name,
+            "message": self.message,
+            "args": args,
+            "kwargs": kwargs,
+            "wall_ns": wall_ns,
+            "thread": self.thread_id,
+            "duration_ns": self.duration_ns,
+            "cpu_ns": self.cpu_ns,
+        }
+
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, position: int):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+class RecordWriter:
+    """
+    Writer of the compact binary record format.
+
+    The file starts with ``MAGIC`` followed by length-prefixed entries. Each
+    entry is a tag byte and varint fields:
+
+    - a session entry holds the wall-clock and monotonic readings that the
+      timestamps of the following records are relative to, and an anchor
+      entry replaces them when the clock anchor is refreshed,
+    - function entries hold the name, qualname, module, file and line of a
+      function from the ``FunctionRegistry`` the first time it appears, and
+      thread entries assign small ids to thread idents, so records carry only
+      the ids,
+    - log records hold the level and operation in their tag, followed by the
+      timestamp delta to the previous record, the thread id, the function id,
+      the duration and CPU time of the call and the UTF-8 message.
+
+    Entries are buffered and written in blocks. Every process that opens the
+    file starts a new session, and a forked child continues in its own file
+    named ``<file_path>.<pid>``, since the ids of a session belong to one
+    writer. With ``per_process``, every process writes its own
+    ``<file_path>.<pid>`` from the start, so that processes sharing the path
+    never interleave their blocks. Records written after ``close`` are
+    dropped and counted in ``dropped``.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        functions: FunctionRegistry = None,
+        buffer_size: int = 65536,
+        per_process: bool = False,
+    ):
+        """
+        Open the record file for appending and start a new session.
+
+        Args:
+            file_path (str): The record file.
+            functions (FunctionRegistry): The registry that the function ids of records refer to.
+            buffer_size (int): The number of encoded bytes buffered before they are written.
+            per_process (bool): Whether to write to ``<file_path>.<pid>`` instead.
+        """
+        self._base_path = file_path
+        self.file_path = f"{file_path}.{os.getpid()}" if per_process else file_path
+        self.functions = functions or FunctionRegistry()
+        self.buffer_size = buffer_size
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._open(self.file_path)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reopen_in_child)
+
+    def _open(self, file_path: str):
+        self._file = open(file_path, "ab")
+        self._buffer = bytearray()
+        if self._file.tell() == 0:
+            self._buffer += MAGIC
+        self._written_functions = set()
+        self._threads = {}
+        self._anchor = clock_anchor()
+        wall_ns, self._last_ns = self._anchor
+        self._entry(bytes((SESSION,)) + _ANCHOR.pack(wall_ns, self._last_ns))
+
+    def _reopen_in_child(self):
+        self._lock = threading.Lock()
+        self._file.close()
+        self.file_path = f"{self._base_path}.{os.getpid()}"
+        self._open(self.file_path)
+
+    def _entry(self, body):
+        _write_varint(self._buffer, len(body))
+        self._buffer += body
+
+    def _function_id(self, message) -> int:
+        function_id = getattr(message, "function_id", 0)
+        if not function_id:
+            function_id = self.functions.register_name(message.function_name).id
+        if function_id not in self._written_functions:
+            self._written_functions.add(function_id)
+            function = self.functions.get(function_id)
+            body = bytearray((FUNCTION,))
+            _write_varint(body, function_id)
+            fields = (function.name, function.qualname, function.module, function.file, str(function.line))
+            body += "\0".join(fields).encode(errors="replace")
+            self._entry(body)
+        return function_id
+
+    def _thread_id(self, thread_ident: int) -> int:
+        thread_id = self._threads.get(thread_ident)
+        if thread_id is None:
+            thread_id = self._threads[thread_ident] = len(self._threads)
+            body = bytearray((THREAD,))
+            _write_varint(body, thread_id)
+            _write_varint(body, thread_ident)
+            self._entry(body)
+        return thread_id
+
+    def _encode(self, level: LogLevel, timestamp_ns: int, operation: str, message, thread_ident: int):
+        function_name = getattr(message, "function_name", None)
+        if function_name is None:
+            function_id = 0
+            payload = str(message)
+            duration_ns = cpu_ns = None
+        else:
+            function_id = self._function_id(message)
+            payload = message.render_payload()
+            duration_ns = getattr(message, "duration_ns", None)
+            cpu_ns = getattr(message, "cpu_ns", None)
+        thread_id = self._thread_id(thread_ident)
+        anchor = clock_anchor()
+        if anchor is not self._anchor:
+            self._anchor = anchor
+            self._entry(bytes((ANCHOR,)) + _ANCHOR.pack(*anchor))
+
+        delta = timestamp_ns - self._last_ns
+        self._last_ns = timestamp_ns
+        body = bytearray((RECORD + _LEVEL_INDEX[level] * len(OPERATIONS) + _OPERATION_INDEX[operation],))
+        _write_varint(body, delta << 1 if delta >= 0 else (-delta << 1) - 1)
+        _write_varint(body, thread_id)
+        _write_varint(body, function_id)
+        _write_varint(body, 0 if duration_ns is None else duration_ns + 1)
+        _write_varint(body, 0 if cpu_ns is None else cpu_ns + 1)
+        body += payload.encode(errors="replace")
+        self._entry(body)
+
+    def write(self, level: LogLevel, timestamp_ns: int, operation: str, message, thread_ident: int):
+        """
+        Write a single log record.
+
+        Args:
+            level (LogLevel): The level of the record.
+            timestamp_ns (int): The ``time.monotonic_ns()`` reading of the record.
+            operation (str): The operation symbol, one of ``OPERATIONS``.
+            message: The message. Function inputs and results are stored with
+                the id of their function and their timings.
+            thread_ident (int): The ident of the thread that logged the record.
+        """
+        with self._lock:
+            if self._file.closed:
+                self.dropped += 1
+                return
+            self._encode(level, timestamp_ns, operation, message, thread_ident)
+            if len(self._buffer) >= self.buffer_size:
+                self._write_buffer()
+
+    def write_many(self, records):
+        """
+        Write several log records.
+
+        Args:
+            records (iterable): ``(level, timestamp_ns, operation, message, thread_ident)`` tuples.
+        """
+        records = list(records)
+        with self._lock:
+            if self._file.closed:
+                self.dropped += len(records)
+                return
+            for record in records:
+                self._encode(*record)
+            if len(self._buffer) >= self.buffer_size:
+                self._write_buffer()
+
+    def _write_buffer(self):
+        if self._buffer and not self._file.closed:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+
+    def flush(self):
+        """
+        Write buffered records to the file.
+        """
+        with self._lock:
+            self._write_buffer()
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self):
+        """
+        Write buffered records and close the file.
+        """
+        with self._lock:
+            self._write_buffer()
+            self._file.close()
+
+
+def _entries(data, position: int):
+    # The start, body start and end of every complete entry from position on.
+    while position < len(data):
+        try:
+            length, body = _read_varint(data, position)
+        except IndexError:
+            return
+        end = body + length
+        if end > len(data):
+            return
+        yield position, body, end
+        position = end
+
+
+def _read_entries(data, position: int):
+    functions = {}
+    threads = {}
+    wall_ns = last_ns = anchor_ns = 0
+    for _, start, end in _entries(data, position):
+        tag = data[start]
+        if tag >= RECORD:
+            delta, start = _read_varint(data, start + 1)
+            thread_id, start = _read_varint(data, start)
+            function_id, start = _read_varint(data, start)
+            duration_ns, start = _read_varint(data, start)
+            cpu_ns, start = _read_varint(data, start)
+            last_ns += delta >> 1 if not delta & 1 else -((delta + 1) >> 1)
+            level_index, operation_index = divmod(tag - RECORD, len(OPERATIONS))
+            function = functions[function_id] if function_id else None
+            record_wall_ns = wall_ns + last_ns - anchor_ns
+            yield Record(
+                LEVELS[level_index],
+                record_wall_ns / 1e9,
+                last_ns,
+                threads[thread_id],
+                OPERATIONS[operation_index],
+                function.name if function is not None else None,
+                duration_ns - 1 if duration_ns else None,
+                cpu_ns - 1 if cpu_ns else None,
+                data[start:end].decode(errors="replace"),
+                function,
+                record_wall_ns,
+            )
+        elif tag == FUNCTION:
+            function_id, start = _read_varint(data, start + 1)
+            name, qualname, module, file, line = data[start:end].decode(errors="replace").split("\0")
+            functions[function_id] = FunctionInfo(function_id, name, qualname, module, file, int(line))
+        elif tag == THREAD:
+            thread_id, start = _read_varint(data, start + 1)
+            threads[thread_id], _ = _read_varint(data, start)
+        elif tag == ANCHOR:
+            wall_ns, anchor_ns = _ANCHOR.unpack_from(data, start + 1)
+        elif tag == SESSION:
+            wall_ns, anchor_ns = _ANCHOR.unpack_from(data, start + 1)
+            last_ns = anchor_ns
+            functions.clear()
+            threads.clear()
+
+
+def read_records(file_path: str):
+    """
+    Read the log records of a binary record file.
+
+    An incomplete record at the end of the file, left by a process that is
+    still writing or was killed, is ignored.
+
+    Args:
+        file_path (str): The record file.
+
+    Yields:
+        Record: The records in the order they were written.
+    """
+    with open(file_path, "rb") as file:
+        data = file.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{file_path} is not a TraceBook record file")
+    yield from _read_entries(data, len(MAGIC))
+
+
+def convert_to_text(file_path: str, text_path: str, precision: str = "s") -> int:
+    """
+    Convert a binary record file to the text log format.
+
+    Args:
+        file_path (str): The record file.
+        text_path (str): The text file to write.
+        precision (str): The timestamp precision, "s", "ms" or "us".
+
+    Returns:
+        int: The number of converted records.
+    """
+    count = 0
+    with open(text_path, "w") as file:
+        for record in read_records(file_path):
+            file.write(record.text(precision) + "\n")
+            count += 1
+    return count
+
+
+class RecordBatcher:
+    """
+    Cuts the entries of a record file into batches that can be read on their own.
+
+    A batch is a record file of its own: ``MAGIC``, a session entry that
+    continues the clock where the previous batch ended, the function and
+    thread entries that its records refer to but that were written before it,
+    and then the entries of the file, copied unchanged. ``read_batch`` reads
+    it. The batcher keeps the clock, functions and threads of the entries
+    passed to ``consume``, which must follow each other in the file.
+    """
+
+    def __init__(self):
+        """
+        Initialize a batcher for the start of a record file.
+        """
+        self._wall_ns = self._anchor_ns = self._last_ns = 0
+        self._functions = {}
+        self._threads = {}
+
+    @staticmethod
+    def cut(data: bytes) -> int:
+        """
+        Get the length of the complete entries at the start of some bytes of a record file.
+
+        Args:
+            data (bytes): The bytes, starting at an entry.
+
+        Returns:
+            int: The number of bytes of complete entries.
+        """
+        end = 0
+        for _, _, end in _entries(data, 0):
+            pass
+        return end
+
+    def encode(self, data: bytes) -> bytes:
+        """
+        Build the batch of the entries that follow those consumed so far.
+
+        Args:
+            data (bytes): Complete entries of the record file.
+
+        Returns:
+            bytes: The batch.
+        """
+        out = bytearray(MAGIC)
+        # A session whose anchor is the time of the last record, so that the
+        # delta of the first record applies to it.
+        body = bytes((SESSION,)) + _ANCHOR.pack(self._wall_ns + self._last_ns - self._anchor_ns, self._last_ns)
+        _write_varint(out, len(body))
+        out += body
+
+        functions = set()
+        threads = set()
+        defined = set()
+        for _, start, _ in _entries(data, 0):
+            tag = data[start]
+            if tag == SESSION:
+                break
+            if tag >= RECORD:
+                position = _read_varint(data, start + 1)[1]
+                thread_id, position = _read_varint(data, position)
+                function_id, _ = _read_varint(data, position)
+                threads.add(thread_id)
+                if function_id:
+                    functions.add(function_id)
+            elif tag in (FUNCTION, THREAD):
+                defined.add((tag, _read_varint(data, start + 1)[0]))
+        for function_id in sorted(functions):
+            if (FUNCTION, function_id) not in defined and function_id in self._functions:
+                out += self._functions[function_id]
+        for thread_id in sorted(threads):
+            if (THREAD, thread_id) not in defined and thread_id in self._threads:
+                out += self._threads[thread_id]
+        out += data
+        return bytes(out)
+
+    def consume(self, data: bytes):
+        """
+        Follow entries of the record file, e.g. after they were batched.
+
+        Args:
+            data (bytes): Complete entries that follow those consumed so far.
+        """
+        for entry, start, end in _entries(data, 0):
+            tag = data[start]
+            if tag >= RECORD:
+                delta, _ = _read_varint(data, start + 1)
+                self._last_ns += delta >> 1 if not delta & 1 else -((delta + 1) >> 1)
+            elif tag == FUNCTION:
+                self._functions[_read_varint(data, start + 1)[0]] = bytes(data[entry:end])
+            elif tag == THREAD:
+                self._threads[_read_varint(data, start + 1)[0]] = bytes(data[entry:end])
+            elif tag == ANCHOR:
+                self._wall_ns, self._anchor_ns = _ANCHOR.unpack_from(data, start + 1)
+            elif tag == SESSION:
+                self._wall_ns, self._anchor_ns = _ANCHOR.unpack_from(data, start + 1)
+                self._last_ns = self._anchor_ns
+                self._functions.clear()
+                self._threads.clear()
+
+
+def read_batch(data: bytes) -> list:
+    """
+    Read the log records of a batch built by ``RecordBatcher``.
+
+    Args:
+        data (bytes): The batch.
+
+    Returns:
+        list: The records.
+    """
+    if not data.startswith(MAGIC):
+        raise ValueError("not a TraceBook record batch")
+    return list(_read_entries(data, len(MAGIC)))
+
+
+def main():
+    if len(sys.argv) > 2:
+        convert_to_text(sys.argv[1], sys.argv[2])
+    else:
+        for record in read_records(sys.argv[1]):
+            print(record.text())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,27 @@
-import requests
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
 from tracebook.config import Config
+from tracebook.event_bus import LogEvent, event_to_json
+from tracebook.log_store import resume_offset
+from tracebook.records import MAGIC, RecordBatcher
+from tracebook.rotation import _zstandard
+from tracebook.utils import LazyModule
+
+requests = LazyModule("requests")
+
+CONTENT_TYPES = {
+    "text": "text/plain; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "binary": "application/vnd.tracebook.records",
+}
+
+_CONTENT_ENCODINGS = ("gzip", "zstd", None)
 
 def log_push_file_to_remote_server(config: Config):
     url = config.remote_config.url
@@ -12,3 +34,432 @@ def log_push_file_to_remote_server(config: Config):
                 raise Exception(f"Failed to upload log file: {response.text}")
         except Exception as _:
             pass
+
+
+def state_path(file_path: str) -> str:
+    """
+    Get the path of the file recording what was shipped from a log file.
+
+    Args:
+        file_path (str): The log file.
+
+    Returns:
+        str: The state path.
+    """
+    return file_path + ".remote.json"
+
+
+def spool_path(file_path: str) -> str:
+    """
+    Get the directory holding the batches of a log file that were not delivered yet.
+
+    Args:
+        file_path (str): The log file.
+
+    Returns:
+        str: The spool directory.
+    """
+    return file_path + ".spool"
+
+
+class RemoteShipper:
+    """
+    Ships the lines appended to the log file to the remote server in batches.
+
+    Shipping has two steps. ``collect`` cuts the lines after the committed
+    offset into batches of up to ``max_batch_bytes`` of the ``RemoteConfig``,
+    encodes each one as configured and writes it to the spool directory
+    ``<file_path>.spool`` before advancing the offset in
+    ``<file_path>.remote.json``. ``deliver`` then sends the spooled batches
+    oldest first through a keep-alive ``requests.Session`` and removes each one
+    once the server accepts it. Batches survive a server outage and a restart.
+    The spool is capped at ``max_spool_bytes`` by dropping the oldest batches,
+    counted in ``dropped``.
+
+    Batches are retried after network errors and after 5xx and 429 responses.
+    Other error responses, e.g. 400 or 413, are final: the batch is dropped,
+    counted in ``dropped``, and delivery continues with the next one.
+
+    Every batch is sent with an ``Idempotency-Key`` header made of the
+    ``X-TraceBook-Source`` of the log file, a random id kept in its state, and
+    the ``X-TraceBook-Sequence`` number of the batch. A retried batch has the
+    same key, so servers can drop duplicates. ``X-TraceBook-Offset`` holds the
+    position of the batch in the log file.
+
+    After a failure nothing is sent until a backoff that doubles with every
+    failure, from ``min_backoff`` to ``max_backoff`` seconds, has passed. The
+    background thread also backs off when collecting fails, e.g. because the
+    spool cannot be written.
+
+    ``start`` runs shipping on a background thread. ``request`` then only
+    wakes the thread, which calls ``flush`` before it collects new lines. Requests arriving within a second, or ``max_latency``
+    if shorter, of each other are handled together, and failed batches are
+    retried once the backoff has passed. With ``max_latency`` set, new lines
+    are also shipped at least that often without requests.
+
+    The log file is identified by its inode. When it is replaced, e.g. by
+    compaction of the ``RingLogStore`` or by rotation, the rest of the old
+    file is shipped first, then the new file after the bytes that compaction
+    copied from the old one.
+
+    The ``binary`` payload ships the record file of ``record_file_path``
+    instead of the text log, cut into ``RecordBatcher`` batches of whole
+    entries, so the records are never parsed from text. Its state and spool
+    are those of the record file.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        max_spool_bytes: int = 64 * 1024 * 1024,
+        min_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        timeout: float = 10.0,
+        flush: Callable[[], None] = None,
+    ):
+        """
+        Initialize the shipper and load the committed state.
+
+        Args:
+            config (Config): The logger configuration.
+            max_spool_bytes (int): The maximum size in bytes of the spooled batches.
+            min_backoff (float): The time in seconds to wait after the first failure.
+            max_backoff (float): The longest time in seconds to wait after failures.
+            timeout (float): The timeout of a request in seconds.
+            flush (callable): Called before ``ship`` collects new lines, e.g. to
+                write lines that are still buffered, or None.
+        """
+        remote_config = config.remote_config
+        if remote_config.payload not in CONTENT_TYPES:
+            raise ValueError(f"Unknown payload: {remote_config.payload}")
+        if remote_config.compression not in _CONTENT_ENCODINGS:
+            raise ValueError(f"Unknown compression: {remote_config.compression}")
+        if remote_config.compression == "zstd":
+            _zstandard()
+        if remote_config.payload == "binary" and not config.record_file_path:
+            raise ValueError("The binary payload ships the record file, so it needs record_file_path")
+
+        self.url = remote_config.url
+        self.headers = remote_config.headers or {}
+        self.payload = remote_config.payload
+        self.compression = remote_config.compression
+        self.max_batch_bytes = remote_config.max_batch_bytes
+        self.max_latency = remote_config.max_latency
+        self.coalesce_interval = min(1.0, self.max_latency) if self.max_latency is not None else 1.0
+        self.file_path = config.record_file_path if self.payload == "binary" else config.file_path
+        self.spool = spool_path(self.file_path)
+        self.max_spool_bytes = max_spool_bytes
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.flush = flush
+        self.dropped = 0
+        self.session = requests.Session()
+        self._collect_lock = threading.Lock()
+        self._deliver_lock = threading.Lock()
+        self._file = None
+        self._batcher = RecordBatcher()
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._closed = False
+
+        state = self._load_state()
+        self.source = state.get("source") or uuid.uuid4().hex
+        self.offset = state["offset"]
+        self.sequence = state["sequence"]
+        self._identity = tuple(state["identity"]) if state["identity"] else None
+        os.makedirs(self.spool, exist_ok=True)
+
+    def _load_state(self) -> dict:
+        try:
+            with open(state_path(self.file_path)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {"identity": None, "offset": 0, "sequence": 0}
+
+    def _save_state(self):
+        state = {
+            "source": self.source,
+            "identity": self._identity,
+            "offset": self.offset,
+            "sequence": self.sequence,
+        }
+        temporary = state_path(self.file_path) + ".tmp"
+        with open(temporary, "w") as file:
+            json.dump(state, file)
+        os.replace(temporary, state_path(self.file_path))
+
+    def _open(self) -> bool:
+        try:
+            self._file = open(self.file_path, "rb")
+        except FileNotFoundError:
+            return False
+        stat = os.fstat(self._file.fileno())
+        identity = (stat.st_dev, stat.st_ino)
+        if identity != self._identity:
+            self.offset = resume_offset(self.file_path, self._identity, identity)
+            self._identity = identity
+        elif stat.st_size < self.offset:
+            self.offset = 0
+        if self.payload == "binary":
+            # Batches need the functions, threads and clock of the entries before them.
+            self._batcher = RecordBatcher()
+            if self.offset > len(MAGIC):
+                self._batcher.consume(self._file.read(self.offset)[len(MAGIC) :])
+        return True
+
+    def _read_entries(self) -> bytes:
+        self._file.seek(self.offset)
+        if self.offset == 0:
+            if self._file.read(len(MAGIC)) != MAGIC:
+                return b""
+            self.offset = len(MAGIC)
+        data = self._file.read(self.max_batch_bytes)
+        end = RecordBatcher.cut(data)
+        while not end:
+            # A single entry longer than a batch is sent on its own.
+            more = self._file.read(self.max_batch_bytes)
+            if not more:
+                return b""
+            data += more
+            end = RecordBatcher.cut(data)
+        return data[:end]
+
+    def _read_batch(self, final: bool) -> bytes:
+        if self.payload == "binary":
+            return self._read_entries()
+        self._file.seek(self.offset)
+        data = self._file.read(self.max_batch_bytes)
+        if final:
+            return data
+        end = data.rfind(b"\n")
+        if end >= 0:
+            return data[: end + 1]
+        if len(data) < self.max_batch_bytes:
+            return b""
+        # A single line longer than a batch is sent on its own.
+        data += self._file.readline()
+        return data if data.endswith(b"\n") else b""
+
+    def _next_batch(self) -> bytes:
+        if self._file is None and not self._open():
+            return b""
+        try:
+            stat = os.stat(self.file_path)
+            replaced = (stat.st_dev, stat.st_ino) != self._identity
+        except FileNotFoundError:
+            replaced = True
+        if not replaced and stat.st_size < self.offset:
+            self._file.close()
+            self._file = None
+            return self._next_batch()
+
+        data = self._read_batch(final=replaced)
+        if data or not replaced:
+            return data
+        self._file.close()
+        self._file = None
+        if not self._open():
+            return b""
+        return self._read_batch(final=False)
+
+    def _spooled(self) -> list:
+        return sorted(name for name in os.listdir(self.spool) if not name.endswith(".tmp"))
+
+    def _encode(self, data: bytes) -> bytes:
+        if self.payload == "ndjson":
+            events = [LogEvent.from_line(line) or line for line in data.decode(errors="replace").splitlines()]
+            data = "".join(json.dumps(event_to_json(event)) + "\n" for event in events).encode()
+        elif self.payload == "binary":
+            data = self._batcher.encode(data)
+        if self.compression == "gzip":
+            return gzip.compress(data)
+        if self.compression == "zstd":
+            return _zstandard().ZstdCompressor().compress(data)
+        return data
+
+    def _spool_batch(self, data: bytes):
+        # The name records how the batch was encoded, in case the configuration
+        # changes before it is delivered.
+        name = os.path.join(
+            self.spool, f"{self.sequence:012d}-{self.offset}.{self.payload}.{self.compression or 'identity'}"
+        )
+        with open(name + ".tmp", "wb") as file:
+            file.write(self._encode(data))
+        os.replace(name + ".tmp", name)
+
+        batches = self._spooled()
+        sizes = [os.path.getsize(os.path.join(self.spool, batch)) for batch in batches]
+        total = sum(sizes)
+        for batch, size in zip(batches[:-1], sizes):
+            if total <= self.max_spool_bytes:
+                break
+            self._remove(batch)
+            total -= size
+            self.dropped += 1
+
+    def _remove(self, batch: str):
+        # Collecting may drop a batch that is being delivered, and the other way round.
+        try:
+            os.remove(os.path.join(self.spool, batch))
+        except FileNotFoundError:
+            pass
+
+    def collect(self) -> int:
+        """
+        Move the lines appended since the committed offset to the spool.
+
+        Returns:
+            int: The number of uncompressed bytes spooled.
+        """
+        with self._collect_lock:
+            collected = 0
+            while True:
+                data = self._next_batch()
+                if not data:
+                    return collected
+                self._spool_batch(data)
+                if self.payload == "binary":
+                    self._batcher.consume(data)
+                self.offset += len(data)
+                self.sequence += 1
+                self._save_state()
+                collected += len(data)
+
+    def _send(self, batch: str) -> Optional[bool]:
+        # True if the batch is done with, False to retry it later and None if
+        # the server rejected it for good.
+        position, payload, encoding = batch.split(".")
+        sequence, offset = position.split("-")
+        headers = dict(self.headers)
+        headers.update(
+            {
+                "Content-Type": CONTENT_TYPES[payload],
+                "Idempotency-Key": f"{self.source}-{int(sequence)}",
+                "X-TraceBook-Source": self.source,
+                "X-TraceBook-Sequence": str(int(sequence)),
+                "X-TraceBook-Offset": offset,
+            }
+        )
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        try:
+            with open(os.path.join(self.spool, batch), "rb") as file:
+                body = file.read()
+        except FileNotFoundError:
+            return True
+        try:
+            response = self.session.post(self.url, data=body, headers=headers, timeout=self.timeout)
+        except requests.RequestException:
+            return False
+        if response.ok:
+            return True
+        if response.status_code >= 500 or response.status_code == 429:
+            return False
+        return None
+
+    def deliver(self) -> int:
+        """
+        Send the spooled batches to the server.
+
+        Does nothing while backing off after a failure.
+
+        Returns:
+            int: The number of batches the server accepted.
+        """
+        with self._deliver_lock:
+            if time.monotonic() < self._retry_at:
+                return 0
+            delivered = 0
+            for batch in self._spooled():
+                sent = self._send(batch)
+                if sent is False:
+                    self._back_off()
+                    break
+                self._backoff = 0.0
+                self._remove(batch)
+                if sent:
+                    delivered += 1
+                else:
+                    self.dropped += 1
+            return delivered
+
+    def _back_off(self):
+        self._backoff = min(max(self._backoff * 2, self.min_backoff), self.max_backoff)
+        self._retry_at = time.monotonic() + self._backoff
+
+    def ship(self) -> int:
+        """
+        Collect the new lines and deliver the spooled batches.
+
+        Returns:
+            int: The number of batches the server accepted.
+        """
+        if self.flush is not None:
+            self.flush()
+        self.collect()
+        return self.deliver()
+
+    def start(self):
+        """
+        Start shipping on a background thread.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="tracebook-remote", daemon=True)
+            self._thread.start()
+
+    def request(self):
+        """
+        Ask for the new lines to be shipped, without waiting for it.
+
+        Ships right away when the background thread is not running.
+        """
+        if self._closed:
+            return
+        if self._thread is None:
+            self.ship()
+        else:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self._run_once()
+            except Exception:
+                # E.g. the spool directory cannot be written. The thread must
+                # survive, so try again after the backoff.
+                self._back_off()
+                self._stopped.wait(self._backoff)
+
+    def _run_once(self):
+        timeout = self.max_latency
+        if self._spooled():
+            retry = max(self._retry_at - time.monotonic(), 0.0)
+            timeout = retry if timeout is None else min(timeout, retry)
+        requested = self._wake.wait(timeout)
+        if self._stopped.wait(self.coalesce_interval if requested else 0):
+            return
+        self._wake.clear()
+        self.ship()
+
+    def close(self):
+        """
+        Stop the background thread, ship what is left once and close the log file.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._stopped.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.ship()
+        with self._collect_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        self.session.close()
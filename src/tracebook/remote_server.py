@@ -0,0 +1,283 @@
+import argparse
+import gzip
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tracebook.event_bus import LogEvent, event_to_json
+from tracebook.records import read_batch
+from tracebook.rotation import _zstandard
+
+
+def _decode_lines(body: bytes) -> list:
+    return [event_to_json(LogEvent.from_line(line) or line) for line in body.decode(errors="replace").splitlines()]
+
+
+def _decode_ndjson(body: bytes) -> list:
+    records = [json.loads(line) for line in body.splitlines() if line.strip()]
+    return [record if isinstance(record, dict) else {"text": record} for record in records]
+
+
+def _decode_binary(body: bytes) -> list:
+    return [record.to_json() for record in read_batch(body)]
+
+
+_DECODERS = {
+    "text/plain": _decode_lines,
+    "application/x-ndjson": _decode_ndjson,
+    "application/vnd.tracebook.records": _decode_binary,
+}
+
+
+class CollectorServer:
+    """
+    Reference server for the batches sent by ``RemoteShipper``.
+
+    Every accepted batch is decompressed, decoded and appended to NDJSON
+    segment files ``segment-<number>.ndjson`` in ``directory``, one JSON
+    record per line with the ``source`` of the batch and the ``received_ns``
+    wall-clock time it arrived. A segment is closed once it reaches
+    ``segment_bytes``. Batches whose ``Idempotency-Key`` sequence is not newer
+    than the last one stored for their source are acknowledged without being
+    stored again, since shippers deliver the batches of a source in order.
+
+    ``GET /stats`` returns the ingest counters and throughput as JSON. The
+    server is meant for local testing and measurement; it keeps the last
+    sequence of every source only in memory.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        segment_bytes: int = 64 * 1024 * 1024,
+    ):
+        """
+        Initialize the server and bind its socket.
+
+        Args:
+            directory (str): The directory the segment files are written to.
+            host (str): The address to listen on.
+            port (int): The port to listen on, or 0 for any free port.
+            segment_bytes (int): The size in bytes at which a segment is closed.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.batches = 0
+        self.records = 0
+        self.bytes_received = 0
+        self.duplicates = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._last_sequence = {}
+        self._segment = None
+        self._segment_number = len(self.segments())
+        self._segment_size = 0
+        self._thread = None
+
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status = collector.ingest(self.headers, body)
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                if self.path != "/stats":
+                    self.send_error(404)
+                    return
+                body = json.dumps(collector.stats()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """
+        The URL to send batches to.
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def ingest(self, headers, body: bytes) -> int:
+        """
+        Store a batch.
+
+        Args:
+            headers: The request headers.
+            body (bytes): The request body.
+
+        Returns:
+            int: The HTTP status of the response.
+        """
+        content_type = (headers.get("Content-Type") or "text/plain").split(";")[0].strip()
+        decoder = _DECODERS.get(content_type)
+        if decoder is None:
+            return 415
+        encoding = headers.get("Content-Encoding")
+        try:
+            if encoding == "gzip":
+                data = gzip.decompress(body)
+            elif encoding == "zstd":
+                data = _zstandard().ZstdDecompressor().decompress(body)
+            elif encoding in (None, "identity"):
+                data = body
+            else:
+                return 415
+            records = decoder(data)
+        except (OSError, ValueError, IndexError, ImportError):
+            return 400
+
+        source, sequence = None, None
+        key = headers.get("Idempotency-Key")
+        if key and "-" in key:
+            source, sequence = key.rsplit("-", 1)
+            sequence = int(sequence) if sequence.isdigit() else None
+
+        received_ns = time.time_ns()
+        lines = []
+        for record in records:
+            record["source"] = source
+            record["received_ns"] = received_ns
+            lines.append(json.dumps(record) + "\n")
+        data = "".join(lines).encode()
+
+        with self._lock:
+            self.bytes_received += len(body)
+            if sequence is not None:
+                if sequence <= self._last_sequence.get(source, -1):
+                    self.duplicates += 1
+                    return 200
+                self._last_sequence[source] = sequence
+            self._write(data)
+            self.batches += 1
+            self.records += len(records)
+        return 200
+
+    def _write(self, data: bytes):
+        if self._segment is None or self._segment_size >= self.segment_bytes:
+            if self._segment is not None:
+                self._segment.close()
+            self._segment_number += 1
+            path = os.path.join(self.directory, f"segment-{self._segment_number:06d}.ndjson")
+            self._segment = open(path, "ab")
+            self._segment_size = 0
+        self._segment.write(data)
+        self._segment_size += len(data)
+
+    def stats(self) -> dict:
+        """
+        Get the ingest counters.
+
+        Returns:
+            dict: The number of batches, records, received bytes and duplicate
+            batches, the seconds since the server started, and the records and
+            bytes received per second.
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            return {
+                "batches": self.batches,
+                "records": self.records,
+                "bytes_received": self.bytes_received,
+                "duplicates": self.duplicates,
+                "elapsed": elapsed,
+                "records_per_second": self.records / elapsed if elapsed else 0.0,
+                "bytes_per_second": self.bytes_received / elapsed if elapsed else 0.0,
+            }
+
+    def segments(self) -> list:
+        """
+        Get the paths of the segment files, oldest first.
+        """
+        return sorted(
+            os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.startswith("segment-")
+        )
+
+    def flush(self):
+        """
+        Flush the open segment file.
+        """
+        with self._lock:
+            if self._segment is not None:
+                self._segment.flush()
+
+    def start(self):
+        """
+        Serve requests on a background thread.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.serve_forever, name="tracebook-collector", daemon=True)
+            self._thread.start()
+
+    def serve_forever(self):
+        """
+        Serve requests until ``close`` is called.
+        """
+        self.server.serve_forever(poll_interval=0.05)
+
+    def close(self):
+        """
+        Stop serving and close the open segment file.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect TraceBook batches into segment files.")
+    parser.add_argument("directory", help="directory for the segment files")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--segment-bytes", type=int, default=64 * 1024 * 1024)
+    parser.add_argument("--report-interval", type=float, default=5.0, help="seconds between throughput reports")
+    args = parser.parse_args()
+
+    collector = CollectorServer(args.directory, args.host, args.port, args.segment_bytes)
+    collector.start()
+    print(f"Collecting at {collector.url} into {args.directory}")
+    last = collector.stats()
+    try:
+        while True:
+            time.sleep(args.report_interval)
+            stats = collector.stats()
+            interval = stats["elapsed"] - last["elapsed"]
+            print(
+                f"{stats['records']} records in {stats['batches']} batches, "
+                f"{(stats['records'] - last['records']) / interval:.0f} records/s, "
+                f"{(stats['bytes_received'] - last['bytes_received']) / interval / 1024:.1f} KiB/s, "
+                f"{stats['duplicates']} duplicates"
+            )
+            last = stats
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.close()
+
+
+if __name__ == "__main__":
+    main()
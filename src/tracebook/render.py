@@ -0,0 +1,324 @@
+import reprlib
+from typing import Callable, Dict
+
+
+class Renderer(reprlib.Repr):
+    """
+    Size-capped renderer for traced arguments and return values.
+
+    Works like ``reprlib.Repr``: containers show at most ``max_items`` items,
+    nesting deeper than ``max_depth`` is elided, and every rendered value is cut
+    to ``max_chars`` characters. Formatters registered for a type take precedence
+    over the built-in representation of that type and its subclasses.
+    """
+
+    def __init__(
+        self,
+        max_chars: int = 500,
+        max_items: int = 10,
+        max_depth: int = 3,
+        formatters: Dict[type, Callable[[object], str]] = None,
+    ):
+        """
+        Initialize the renderer.
+
+        Args:
+            max_chars (int): The maximum length of a rendered value.
+            max_items (int): The maximum number of items shown per container.
+            max_depth (int): The maximum nesting depth shown.
+            formatters (dict): Maps types to callables that render their instances.
+        """
+        super().__init__()
+        self.max_chars = max_chars
+        self.maxlevel = max_depth
+        self.maxtuple = self.maxlist = self.maxarray = max_items
+        self.maxdict = self.maxset = self.maxfrozenset = self.maxdeque = max_items
+        self.maxstring = self.maxlong = self.maxother = max_chars
+        self.formatters = dict(formatters or {})
+        self._resolved = {}
+
+    def register(self, cls: type, formatter: Callable[[object], str]):
+        """
+        Register a formatter for a type and its subclasses.
+
+        Args:
+            cls (type): The type to format.
+            formatter (callable): Called with an instance, returns its text.
+        """
+        self.formatters[cls] = formatter
+        self._resolved.clear()
+
+    def _formatter_for(self, cls: type):
+        try:
+            return self._resolved[cls]
+        except KeyError:
+            pass
+        formatter = None
+        for base in cls.__mro__:
+            if base in self.formatters:
+                formatter = self.formatters[base]
+                break
+        self._resolved[cls] = formatter
+        return formatter
+
+    def repr1(self, x, level):
+        if self.formatters:
+            formatter = self._formatter_for(type(x))
+            if formatter is not None:
+                return self._cap(formatter(x))
+        return super().repr1(x, level)
+
+    def repr_bytes(self, x, level):
+        if len(x) <= self.max_chars // 4:
+            return repr(x)
+        # Leave room for the length suffix so it survives the final cap.
+        keep = max(0, self.max_chars // 4 - 4)
+        return f"{bytes(x[:keep])!r}...<{len(x)} bytes>"
+
+    repr_bytearray = repr_bytes
+
+    def _cap(self, text: str) -> str:
+        if len(text) <= self.max_chars:
+            return text
+        return text[: self.max_chars - 3] + "..."
+
+    def render(self, value) -> str:
+        """
+        Render a value.
+
+        Args:
+            value: The value to render.
+
+        Returns:
+            str: The size-capped representation of the value.
+        """
+        return self._cap(self.repr(value))
+
+    def render_arguments(self, args: tuple, kwargs: dict) -> str:
+        """
+        Render the positional and keyword arguments of a call.
+
+        Args:
+            args (tuple): The positional arguments.
+            kwargs (dict): The keyword arguments.
+
+        Returns:
+            str: The rendered arguments, e.g. ``(5,) {}``.
+        """
+        return f"{self.render(args)} {self.render(kwargs)}"
+
+    def render_result(self, result) -> str:
+        """
+        Render the return value of a call.
+
+        Strings are written as they are, like ``str(result)``, other values
+        through the size-capped representation.
+
+        Args:
+            result: The return value.
+
+        Returns:
+            str: The rendered return value.
+        """
+        if type(result) is str:
+            return self._cap(result)
+        return self.render(result)
+
+
+default_renderer = Renderer()
+
+
+class LazyArguments:
+    """
+    Function inputs that are rendered only when the record is written.
+
+    ``function_id`` is the id of the function in the ``FunctionRegistry`` of the
+    logger, or 0 if it was not registered.
+    """
+
+    __slots__ = ("function_name", "args", "kwargs", "renderer", "function_id")
+
+    def __init__(self, function_name: str, args: tuple, kwargs: dict, renderer: Renderer, function_id: int = 0):
+        self.function_name = function_name
+        self.args = args
+        self.kwargs = kwargs
+        self.renderer = renderer
+        self.function_id = function_id
+
+    def render_payload(self) -> str:
+        """
+        Render the inputs without the function name.
+
+        Returns:
+            str: The rendered arguments.
+        """
+        return self.renderer.render_arguments(self.args, self.kwargs)
+
+    def __str__(self):
+        return f"{self.function_name} {self.render_payload()}"
+
+
+class LazyResult:
+    """
+    A function result that is rendered only when the record is written.
+
+    ``duration_ns`` and ``cpu_ns`` hold the wall-clock and CPU time of the call
+    in nanoseconds when the decorator measured them, and ``function_id`` the id
+    of the function in the ``FunctionRegistry`` of the logger, or 0.
+    """
+
+    __slots__ = ("function_name", "result", "renderer", "duration_ns", "cpu_ns", "function_id")
+
+    def __init__(
+        self,
+        function_name: str,
+        result,
+        renderer: Renderer,
+        duration_ns: int = None,
+        cpu_ns: int = None,
+        function_id: int = 0,
+    ):
+        self.function_name = function_name
+        self.result = result
+        self.renderer = renderer
+        self.duration_ns = duration_ns
+        self.cpu_ns = cpu_ns
+        self.function_id = function_id
+
+    def render_payload(self) -> str:
+        """
+        Render the result without the function name and timings.
+
+        Returns:
+            str: The rendered return value.
+        """
+        return self.renderer.render_result(self.result)
+
+    def __str__(self):
+        text = f"{self.function_name} {self.render_payload()}"
+        if self.duration_ns is None:
+            return text
+        return f"{text} {format_timing(self.duration_ns, self.cpu_ns)}"
+
+
+class FunctionMessage:
+    """
+    A message about a traced function, such as an exception it raised.
+    """
+
+    __slots__ = ("function_name", "text", "function_id")
+
+    def __init__(self, function_name: str, text: str, function_id: int = 0):
+        self.function_name = function_name
+        self.text = text
+        self.function_id = function_id
+
+    def render_payload(self) -> str:
+        """
+        Get the message without the function name.
+
+        Returns:
+            str: The message.
+        """
+        return self.text
+
+    def __str__(self):
+        return f"{self.function_name} {self.text}"
+
+
+class RenderedMessage:
+    """
+    A message about a traced function whose payload was rendered.
+
+    Records are rendered once when they are written, and every sink writes the
+    same text. For function inputs, ``args`` and ``kwargs`` hold the rendered
+    positional and keyword arguments.
+    """
+
+    __slots__ = ("function_name", "payload", "function_id", "duration_ns", "cpu_ns", "args", "kwargs")
+
+    def __init__(
+        self,
+        function_name: str,
+        payload: str,
+        function_id: int = 0,
+        duration_ns: int = None,
+        cpu_ns: int = None,
+        args: str = None,
+        kwargs: str = None,
+    ):
+        self.function_name = function_name
+        self.payload = payload
+        self.function_id = function_id
+        self.duration_ns = duration_ns
+        self.cpu_ns = cpu_ns
+        self.args = args
+        self.kwargs = kwargs
+
+    def render_payload(self) -> str:
+        """
+        Get the rendered payload without the function name and timings.
+
+        Returns:
+            str: The payload.
+        """
+        return self.payload
+
+    def __str__(self):
+        text = f"{self.function_name} {self.payload}"
+        if self.duration_ns is None:
+            return text
+        return f"{text} {format_timing(self.duration_ns, self.cpu_ns)}"
+
+
+def render_message(message):
+    """
+    Render the message of a record for writing.
+
+    A message that fails to render, e.g. because a formatter raised, is
+    replaced by an ``<unrenderable: ...>`` placeholder, so that one bad value
+    never costs the other records of a batch.
+
+    Args:
+        message: The message of the record.
+
+    Returns:
+        str or RenderedMessage: The text of plain messages, the rendered
+        message for messages about a traced function.
+    """
+    if type(message) is str or type(message) is RenderedMessage:
+        return message
+    function_name = getattr(message, "function_name", None)
+    try:
+        if function_name is None:
+            return str(message)
+        if type(message) is LazyArguments:
+            args = message.renderer.render(message.args)
+            kwargs = message.renderer.render(message.kwargs)
+            return RenderedMessage(function_name, f"{args} {kwargs}", message.function_id, args=args, kwargs=kwargs)
+        return RenderedMessage(
+            function_name,
+            message.render_payload(),
+            message.function_id,
+            getattr(message, "duration_ns", None),
+            getattr(message, "cpu_ns", None),
+        )
+    except Exception as e:
+        placeholder = f"<unrenderable: {e!r}>"
+        if function_name is None:
+            return placeholder
+        return RenderedMessage(function_name, placeholder, getattr(message, "function_id", 0))
+
+
+def format_timing(duration_ns: int, cpu_ns: int) -> str:
+    """
+    Format the timings of a call as they appear after its result.
+
+    Args:
+        duration_ns (int): The wall-clock time of the call in nanoseconds.
+        cpu_ns (int): The CPU time of the call in nanoseconds.
+
+    Returns:
+        str: The timings, e.g. ``[duration=1.500000ms cpu_time=1.200000ms]``.
+    """
+    return f"[duration={duration_ns / 1e6:.6f}ms cpu_time={cpu_ns / 1e6:.6f}ms]"
@@ -0,0 +1,104 @@
+import os
+import time
+from typing import NamedTuple
+
+import psutil
+
+_process = None
+_process_pid = None
+
+
+class ResourceSample(NamedTuple):
+    """
+    A single reading of the resources used by the process.
+    """
+
+    timestamp: float
+    cpu_percent: float
+    rss: int
+    num_threads: int
+    cpu_time: float
+
+    @property
+    def rss_mb(self) -> float:
+        return self.rss / 1024 ** 2
+
+
+class ResourceDetails:
+    """
+    Resource usage of a traced call, formatted only when the record is written.
+    """
+
+    __slots__ = ("sample", "cpu_ns")
+
+    def __init__(self, sample: ResourceSample, cpu_ns: int):
+        self.sample = sample
+        self.cpu_ns = cpu_ns
+
+    def __str__(self):
+        sample = self.sample
+        return (
+            f"{sample.cpu_percent:.2f}% {sample.rss_mb:.2f} MB"
+            f" threads={sample.num_threads} cpu_time={self.cpu_ns / 1e9:.6f}s"
+        )
+
+
+class ExecutionDetails:
+    """
+    Timing and resource usage of a call, formatted only when the record is written.
+    """
+
+    __slots__ = ("duration_ns", "cpu_ns", "sample")
+
+    def __init__(self, duration_ns: int, cpu_ns: int, sample: ResourceSample):
+        self.duration_ns = duration_ns
+        self.cpu_ns = cpu_ns
+        self.sample = sample
+
+    def __str__(self):
+        return (
+            f"Execution Time: {self.duration_ns / 1e9:.9f} seconds, "
+            f"CPU Time: {self.cpu_ns / 1e9:.6f} seconds, "
+            f"CPU Usage: {self.sample.cpu_percent:.2f}%, Memory Usage: {self.sample.rss_mb:.2f} MB"
+        )
+
+
+def get_process() -> psutil.Process:
+    """
+    Get a cached handle to the current process.
+
+    The handle is recreated when the process ID changes, e.g. after a fork.
+
+    Returns:
+        psutil.Process: The handle to the current process.
+    """
+    global _process, _process_pid
+    pid = os.getpid()
+    if _process is None or _process_pid != pid:
+        _process = psutil.Process(pid)
+        _process_pid = pid
+    return _process
+
+
+def read_sample() -> ResourceSample:
+    """
+    Read the resource usage of the current process.
+
+    Process metrics are read together inside ``Process.oneshot()`` so psutil
+    collects them with as few system calls as possible.
+
+    Returns:
+        ResourceSample: The current resource usage.
+    """
+    process = get_process()
+    with process.oneshot():
+        memory_info = process.memory_info()
+        num_threads = process.num_threads()
+        cpu_times = process.cpu_times()
+    return ResourceSample(
+        time.time(),
+        psutil.cpu_percent(interval=None),
+        memory_info.rss,
+        num_threads,
+        cpu_times.user + cpu_times.system,
+    )
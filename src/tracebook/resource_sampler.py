@@ -0,0 +1,64 @@
+import os
+import threading
+
+import psutil
+
+from tracebook.resource_probe import ResourceSample, read_sample
+
+
+class ResourceSampler:
+    """
+    Background thread that keeps resource readings of the process current.
+
+    Readings are refreshed every ``interval`` seconds, so decorators can read
+    the latest CPU usage, resident memory and thread count without blocking.
+    """
+
+    def __init__(self, interval: float = 1.0):
+        """
+        Initialize the sampler and start its background thread.
+
+        Args:
+            interval (float): The time in seconds between two readings.
+        """
+        self.interval = interval
+        # The first non-blocking reading only sets the baseline for the next one.
+        psutil.cpu_percent(interval=None)
+        self.sample = read_sample()
+        self._stopped = threading.Event()
+        self._start()
+        if hasattr(os, "register_at_fork"):
+            # Threads do not survive a fork, so the child needs its own.
+            os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def _restart_in_child(self):
+        if not self._stopped.is_set():
+            self._start()
+
+    def _start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="tracebook-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.sample = read_sample()
+            except psutil.Error:
+                pass
+
+    def latest(self) -> ResourceSample:
+        """
+        Get the most recent reading.
+
+        Returns:
+            ResourceSample: The latest resource usage of the process.
+        """
+        return self.sample
+
+    def stop(self):
+        """
+        Stop the background thread.
+        """
+        self._stopped.set()
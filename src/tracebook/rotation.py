@@ -0,0 +1,324 @@
+import gzip
+import io
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import deque
+from typing import List, Literal
+
+Compression = Literal["gzip", "zstd", None]
+
+_SUFFIXES = {"gzip": ".gz", "zstd": ".zst", None: ""}
+
+
+def index_path(file_path: str) -> str:
+    """
+    Get the path of the segment index of a log file.
+
+    Args:
+        file_path (str): The active log file.
+
+    Returns:
+        str: The index path.
+    """
+    return file_path + ".index.json"
+
+
+def _load_index(file_path: str) -> dict:
+    try:
+        with open(index_path(file_path)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {"active_start": None, "next_segment": 1, "segments": []}
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compression requires the zstandard package") from None
+    return zstandard
+
+
+class RotatingLogStore:
+    """
+    Log store that rotates the log file into numbered segments.
+
+    The active segment is always ``file_path``. It is renamed to
+    ``<file_path>.<number>`` once it reaches ``max_bytes`` or is older than
+    ``max_age`` seconds, and a background thread then compresses it. Only the
+    newest ``retention`` segments are kept. The time range of every segment is
+    recorded in ``<file_path>.index.json``, see ``find_segments``.
+
+    Like ``RingLogStore`` it keeps the last ``max_entries`` lines in memory for
+    ``tail``. Rotation only renames a file, so it never waits for compression.
+    ``on_replace``, if set, is called before the active segment is rotated.
+    Lines appended after ``close`` are dropped and counted in ``dropped``.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        max_entries: int = 500,
+        max_bytes: int = 10 * 1024 * 1024,
+        max_age: float = None,
+        retention: int = 10,
+        compression: Compression = "gzip",
+    ):
+        """
+        Initialize the store and continue the active segment of an existing log file.
+
+        Args:
+            file_path (str): The active log file.
+            max_entries (int): The number of most recent lines kept in memory.
+            max_bytes (int): The size in bytes at which a segment is rotated.
+            max_age (float): The age in seconds at which a segment is rotated, or None.
+            retention (int): The number of rotated segments to keep.
+            compression (str): "gzip", "zstd" or None.
+        """
+        if compression not in _SUFFIXES:
+            raise ValueError(f"Unknown compression: {compression}")
+        if compression == "zstd":
+            _zstandard()
+
+        self.file_path = file_path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.retention = retention
+        self.compression = compression
+        self.entries = deque(maxlen=max_entries)
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self.on_replace = None
+        self._index = _load_index(file_path)
+        self._pending = queue.Queue()
+        self._compressor = None
+
+        self._size = 0
+        if os.path.exists(file_path):
+            with open(file_path, "r") as file:
+                for line in file:
+                    self.entries.append(line.rstrip("\n"))
+            self._size = os.path.getsize(file_path)
+            if self._index["active_start"] is None and self._size:
+                self._index["active_start"] = os.path.getmtime(file_path)
+        self._last_time = self._index["active_start"]
+        self._file = open(file_path, "a", buffering=1)
+
+    def append(self, line: str):
+        """
+        Append a single line to the active segment.
+
+        Args:
+            line (str): The line to append, without a trailing newline.
+        """
+        self.extend((line,))
+
+    def extend(self, lines):
+        """
+        Append several lines to the active segment with a single write.
+
+        Args:
+            lines (iterable of str): The lines to append.
+        """
+        lines = list(lines)
+        if not lines:
+            return
+        data = "\n".join(lines) + "\n"
+        now = time.time()
+        with self._lock:
+            if self._file.closed:
+                self.dropped += len(lines)
+                return
+            if self._due(now):
+                self._rotate()
+            if self._index["active_start"] is None:
+                self._index["active_start"] = now
+                self._write_index()
+            self.entries.extend(lines)
+            self._file.write(data)
+            self._size += len(data.encode(self._file.encoding))
+            self._last_time = now
+
+    def _due(self, now: float) -> bool:
+        if not self._size:
+            return False
+        if self._size >= self.max_bytes:
+            return True
+        return self.max_age is not None and now - self._index["active_start"] >= self.max_age
+
+    def _rotate(self):
+        if self.on_replace is not None:
+            self.on_replace()
+        self._file.close()
+        number = self._index["next_segment"]
+        segment = f"{self.file_path}.{number:06d}"
+        os.replace(self.file_path, segment)
+        self._file = open(self.file_path, "a", buffering=1)
+
+        self._index["segments"].append(
+            {
+                "file": os.path.basename(segment),
+                "start": self._index["active_start"],
+                "end": self._last_time,
+                "bytes": self._size,
+            }
+        )
+        self._index["next_segment"] = number + 1
+        self._index["active_start"] = None
+        self._size = 0
+        while len(self._index["segments"]) > self.retention:
+            expired = self._index["segments"].pop(0)
+            try:
+                os.remove(os.path.join(os.path.dirname(self.file_path), expired["file"]))
+            except OSError:
+                pass
+        self._write_index()
+
+        if self.compression is not None:
+            self._pending.put(segment)
+            if self._compressor is None:
+                self._compressor = threading.Thread(
+                    target=self._compress_pending, name="tracebook-compressor", daemon=True
+                )
+                self._compressor.start()
+
+    def _write_index(self):
+        temporary = index_path(self.file_path) + ".tmp"
+        with open(temporary, "w") as file:
+            json.dump(self._index, file)
+        os.replace(temporary, index_path(self.file_path))
+
+    def _compress_pending(self):
+        while True:
+            segment = self._pending.get()
+            try:
+                self._compress(segment)
+            except OSError:
+                pass
+            finally:
+                self._pending.task_done()
+
+    def _compress(self, segment: str):
+        target = segment + _SUFFIXES[self.compression]
+        temporary = target + ".tmp"
+        try:
+            with open(segment, "rb") as source, open(temporary, "wb") as destination:
+                if self.compression == "gzip":
+                    with gzip.GzipFile(fileobj=destination, mode="wb") as compressed:
+                        shutil.copyfileobj(source, compressed)
+                else:
+                    _zstandard().ZstdCompressor().copy_stream(source, destination)
+        except FileNotFoundError:
+            # The segment expired before it was compressed.
+            return
+
+        name = os.path.basename(segment)
+        with self._lock:
+            for entry in self._index["segments"]:
+                if entry["file"] == name:
+                    os.replace(temporary, target)
+                    os.remove(segment)
+                    entry["file"] = os.path.basename(target)
+                    entry["bytes"] = os.path.getsize(target)
+                    self._write_index()
+                    return
+        os.remove(temporary)
+
+    def rotate(self):
+        """
+        Rotate the active segment now, unless it is empty.
+        """
+        with self._lock:
+            if self._size and not self._file.closed:
+                self._rotate()
+
+    def tail(self, count: int = None):
+        """
+        Get the most recent lines held by the store.
+
+        Args:
+            count (int): The number of lines to return, or None for all of them.
+
+        Returns:
+            list: The most recent lines, oldest first.
+        """
+        with self._lock:
+            entries = list(self.entries)
+        if count is None:
+            return entries
+        return entries[-count:] if count else []
+
+    def flush(self):
+        """
+        Flush buffered lines to the active segment.
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def wait_for_compression(self):
+        """
+        Wait until every rotated segment is compressed.
+        """
+        self._pending.join()
+
+    def close(self):
+        """
+        Close the active segment and wait for pending compression.
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+        self.wait_for_compression()
+
+
+def find_segments(file_path: str, start: float = None, end: float = None) -> List[str]:
+    """
+    Find the segments of a rotated log file that hold lines written in a time range.
+
+    Args:
+        file_path (str): The active log file.
+        start (float): The start of the range in seconds since the epoch, or None.
+        end (float): The end of the range in seconds since the epoch, or None.
+
+    Returns:
+        list: The paths of matching segments, oldest first. The active log file
+        is included when it may hold matching lines.
+    """
+    index = _load_index(file_path)
+    directory = os.path.dirname(file_path)
+    paths = []
+    for segment in index["segments"]:
+        if (start is None or segment["end"] is None or segment["end"] >= start) and (
+            end is None or segment["start"] is None or segment["start"] <= end
+        ):
+            paths.append(os.path.join(directory, segment["file"]))
+    active_start = index["active_start"]
+    if os.path.exists(file_path) and (end is None or active_start is None or active_start <= end):
+        paths.append(file_path)
+    return paths
+
+
+def read_segment(path: str) -> List[str]:
+    """
+    Read the lines of a log segment, decompressing it if needed.
+
+    Args:
+        path (str): The segment path.
+
+    Returns:
+        list: The lines of the segment, without trailing newlines.
+    """
+    if path.endswith(".gz"):
+        with gzip.open(path, "rt") as file:
+            return file.read().splitlines()
+    if path.endswith(".zst"):
+        with open(path, "rb") as file:
+            reader = _zstandard().ZstdDecompressor().stream_reader(file)
+            return io.TextIOWrapper(reader).read().splitlines()
+    with open(path) as file:
+        return file.read().splitlines()
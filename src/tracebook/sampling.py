@@ -0,0 +1,156 @@
+import copy
+import random
+import threading
+from time import monotonic
+
+
+class SamplingPolicy:
+    """
+    Base class for policies that decide which calls of a traced function are logged.
+
+    A policy passed to ``Logger.trace`` is copied for every decorated function,
+    so each function keeps its own state and counters. ``sampled`` and
+    ``skipped`` count the calls that were and were not logged. Subclasses
+    update them and their state in ``sample`` while holding ``_lock``, since
+    a function may be called from several threads at once.
+    """
+
+    def __init__(self, always_on_error: bool = True):
+        """
+        Initialize the policy.
+
+        Args:
+            always_on_error (bool): Whether exceptions of skipped calls are still logged.
+        """
+        self.always_on_error = always_on_error
+        self.sampled = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def bind(self) -> "SamplingPolicy":
+        """
+        Get a fresh copy of the policy for a single function.
+
+        Returns:
+            SamplingPolicy: A copy with its own state and zeroed counters.
+        """
+        policy = copy.copy(self)
+        policy.sampled = 0
+        policy.skipped = 0
+        policy._lock = threading.Lock()
+        return policy
+
+    def sample(self) -> bool:
+        """
+        Decide whether the current call is logged.
+
+        Returns:
+            bool: True if the call is logged.
+        """
+        raise NotImplementedError
+
+    def counts(self) -> dict:
+        """
+        Get the number of logged and skipped calls.
+
+        Returns:
+            dict: The ``sampled`` and ``skipped`` call counts.
+        """
+        with self._lock:
+            return {"sampled": self.sampled, "skipped": self.skipped}
+
+
+class Probability(SamplingPolicy):
+    """
+    Logs each call with a fixed probability.
+    """
+
+    def __init__(self, rate: float, always_on_error: bool = True):
+        """
+        Initialize the policy.
+
+        Args:
+            rate (float): The probability of logging a call, between 0 and 1.
+            always_on_error (bool): Whether exceptions of skipped calls are still logged.
+        """
+        super().__init__(always_on_error)
+        self.rate = rate
+
+    def sample(self) -> bool:
+        logged = random.random() < self.rate
+        with self._lock:
+            if logged:
+                self.sampled += 1
+            else:
+                self.skipped += 1
+        return logged
+
+
+class OneInN(SamplingPolicy):
+    """
+    Logs the first call and then every n-th call.
+    """
+
+    def __init__(self, n: int, always_on_error: bool = True):
+        """
+        Initialize the policy.
+
+        Args:
+            n (int): Log one call out of every n.
+            always_on_error (bool): Whether exceptions of skipped calls are still logged.
+        """
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        super().__init__(always_on_error)
+        self.n = n
+        self._countdown = 0
+
+    def sample(self) -> bool:
+        with self._lock:
+            if self._countdown <= 0:
+                self._countdown = self.n - 1
+                self.sampled += 1
+                return True
+            self._countdown -= 1
+            self.skipped += 1
+            return False
+
+
+class TokenBucket(SamplingPolicy):
+    """
+    Logs at most ``rate`` calls per second, allowing bursts of ``burst`` calls.
+    """
+
+    def __init__(self, rate: float, burst: int = None, always_on_error: bool = True):
+        """
+        Initialize the policy.
+
+        Args:
+            rate (float): The number of calls per second that may be logged.
+            burst (int): The maximum number of calls logged at once (default: rate).
+            always_on_error (bool): Whether exceptions of skipped calls are still logged.
+        """
+        super().__init__(always_on_error)
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = monotonic()
+
+    def bind(self) -> "TokenBucket":
+        policy = super().bind()
+        policy._tokens = float(policy.burst)
+        policy._updated = monotonic()
+        return policy
+
+    def sample(self) -> bool:
+        with self._lock:
+            now = monotonic()
+            tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if tokens >= 1.0:
+                self._tokens = tokens - 1.0
+                self.sampled += 1
+                return True
+            self._tokens = tokens
+            self.skipped += 1
+            return False
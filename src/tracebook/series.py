@@ -0,0 +1,123 @@
+from array import array
+from typing import List, Sequence, Tuple
+
+
+class TimeSeries:
+    """
+    Fixed-size circular buffer of ``(timestamp, value)`` points.
+
+    Points are stored in two preallocated ``array("d")`` buffers of twice the
+    capacity, each point written both at its slot and at its slot plus the
+    capacity. The newest ``capacity`` points are then always contiguous, so
+    ``view`` returns them oldest first as memoryviews without copying, and
+    ``append`` is O(1) however full the buffer is.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize the buffer.
+
+        Args:
+            capacity (int): The number of most recent points kept.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._timestamps = array("d", bytes(16 * capacity))
+        self._values = array("d", bytes(16 * capacity))
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, value: float):
+        """
+        Add a point, overwriting the oldest one when the buffer is full.
+
+        Args:
+            timestamp (float): The time of the point.
+            value (float): The value of the point.
+        """
+        slot = self._next
+        self._timestamps[slot] = self._timestamps[slot + self.capacity] = timestamp
+        self._values[slot] = self._values[slot + self.capacity] = value
+        self._next = (slot + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def view(self) -> Tuple[memoryview, memoryview]:
+        """
+        Get the points without copying them.
+
+        The views are only valid until the next ``append``.
+
+        Returns:
+            tuple: The timestamps and the values, oldest first.
+        """
+        end = self._next + self.capacity
+        start = end - self._count
+        return memoryview(self._timestamps)[start:end], memoryview(self._values)[start:end]
+
+    def points(self, max_points: int = None) -> Tuple[List[float], List[float]]:
+        """
+        Get the points for plotting, downsampled with ``lttb`` if there are too many.
+
+        Args:
+            max_points (int): The maximum number of points returned, or None for all of them.
+
+        Returns:
+            tuple: The timestamps and the values, oldest first.
+        """
+        timestamps, values = self.view()
+        if max_points is not None and len(timestamps) > max_points:
+            return lttb(timestamps, values, max_points)
+        return timestamps.tolist(), values.tolist()
+
+
+def lttb(x: Sequence[float], y: Sequence[float], threshold: int) -> Tuple[List[float], List[float]]:
+    """
+    Downsample a series with Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept, and the points between them are split
+    into ``threshold - 2`` buckets. From each bucket the point forming the
+    largest triangle with the previously kept point and the average of the
+    next bucket is kept, which preserves the peaks and the shape of the series.
+
+    Args:
+        x (sequence of float): The timestamps, in ascending order.
+        y (sequence of float): The values.
+        threshold (int): The number of points to keep, at least 3.
+
+    Returns:
+        tuple: The kept timestamps and values.
+    """
+    if threshold < 3:
+        raise ValueError("threshold must be at least 3")
+    length = len(x)
+    if threshold >= length:
+        return list(x), list(y)
+
+    kept_x, kept_y = [x[0]], [y[0]]
+    buckets = threshold - 2
+    previous = 0
+    for bucket in range(buckets):
+        start = bucket * (length - 2) // buckets + 1
+        end = (bucket + 1) * (length - 2) // buckets + 1
+        next_end = min((bucket + 2) * (length - 2) // buckets + 1, length)
+        next_count = next_end - end
+        average_x = sum(x[end:next_end]) / next_count
+        average_y = sum(y[end:next_end]) / next_count
+
+        point_x, point_y = x[previous], y[previous]
+        best, best_area = start, -1.0
+        for index in range(start, end):
+            area = abs((point_x - average_x) * (y[index] - point_y) - (point_x - x[index]) * (average_y - point_y))
+            if area > best_area:
+                best, best_area = index, area
+        kept_x.append(x[best])
+        kept_y.append(y[best])
+        previous = best
+
+    kept_x.append(x[length - 1])
+    kept_y.append(y[length - 1])
+    return kept_x, kept_y
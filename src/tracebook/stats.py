@@ -0,0 +1,200 @@
+import threading
+from array import array
+from typing import Dict
+
+# Each power of two is split into 2 ** _SUB_BITS linear sub-buckets, which keeps
+# the relative error of a reported percentile below 1 / 2 ** _SUB_BITS.
+_SUB_BITS = 4
+_SUB_COUNT = 1 << _SUB_BITS
+_EXACT_LIMIT = _SUB_COUNT << 1
+_BUCKET_COUNT = (64 - _SUB_BITS - 1) * _SUB_COUNT + _EXACT_LIMIT
+
+MAX_EXCEPTION_TYPES = 32
+
+
+def _bucket_index(value: int) -> int:
+    if value < _EXACT_LIMIT:
+        return value if value > 0 else 0
+    shift = value.bit_length() - _SUB_BITS - 1
+    return min((shift << _SUB_BITS) + (value >> shift), _BUCKET_COUNT - 1)
+
+
+def _bucket_bounds(index: int):
+    if index < _EXACT_LIMIT:
+        return index, index
+    shift = (index >> _SUB_BITS) - 1
+    top = _SUB_COUNT + (index & (_SUB_COUNT - 1))
+    return top << shift, ((top + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed histogram of durations in nanoseconds.
+
+    Values below 32 ns are counted exactly, larger values fall into one of 16
+    linear buckets per power of two. Memory use is fixed regardless of how many
+    values are recorded.
+    """
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * _BUCKET_COUNT))
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, value: int):
+        """
+        Record a single duration.
+
+        Args:
+            value (int): The duration in nanoseconds.
+        """
+        self.counts[_bucket_index(value)] += 1
+        if self.count == 0 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def percentile(self, percent: float) -> int:
+        """
+        Estimate a percentile of the recorded durations.
+
+        Args:
+            percent (float): The percentile to estimate, between 0 and 100.
+
+        Returns:
+            int: The estimated duration in nanoseconds, or 0 if nothing was recorded.
+        """
+        if self.count == 0:
+            return 0
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                low, high = _bucket_bounds(index)
+                return min(max((low + high) // 2, self.min), self.max)
+        return self.max
+
+
+class FunctionStats:
+    """
+    Call statistics of a single traced function.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.exceptions = {}
+        self.histogram = LatencyHistogram()
+        self._lock = threading.Lock()
+
+    def record(self, duration_ns: int, exception: Exception = None):
+        """
+        Record a finished call.
+
+        Args:
+            duration_ns (int): The wall-clock duration of the call in nanoseconds.
+            exception (Exception): The exception raised by the call, if any.
+        """
+        with self._lock:
+            self.calls += 1
+            self.histogram.record(duration_ns)
+            if exception is not None:
+                self.errors += 1
+                name = type(exception).__name__
+                if name not in self.exceptions and len(self.exceptions) >= MAX_EXCEPTION_TYPES:
+                    name = "other"
+                self.exceptions[name] = self.exceptions.get(name, 0) + 1
+
+    def snapshot(self) -> dict:
+        """
+        Get the current statistics.
+
+        Returns:
+            dict: Call and error counts, exception counts by type and duration
+            statistics in nanoseconds.
+        """
+        with self._lock:
+            histogram = self.histogram
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "exceptions": dict(self.exceptions),
+                "min_ns": histogram.min,
+                "max_ns": histogram.max,
+                "mean_ns": histogram.total // histogram.count if histogram.count else 0,
+                "p50_ns": histogram.percentile(50),
+                "p95_ns": histogram.percentile(95),
+                "p99_ns": histogram.percentile(99),
+            }
+
+    def summary(self) -> str:
+        """
+        Get a one-line summary of the statistics.
+
+        Returns:
+            str: The summary, e.g. ``fact calls=10 errors=0 p50=1.20us ...``.
+        """
+        stats = self.snapshot()
+        text = (
+            f"{self.name} calls={stats['calls']} errors={stats['errors']}"
+            f" p50={_format_ns(stats['p50_ns'])} p95={_format_ns(stats['p95_ns'])}"
+            f" p99={_format_ns(stats['p99_ns'])} max={_format_ns(stats['max_ns'])}"
+        )
+        if stats["exceptions"]:
+            text += " exceptions=" + ",".join(
+                f"{name}:{count}" for name, count in stats["exceptions"].items()
+            )
+        return text
+
+
+def _format_ns(value: int) -> str:
+    if value < 1_000:
+        return f"{value}ns"
+    if value < 1_000_000:
+        return f"{value / 1_000:.2f}us"
+    if value < 1_000_000_000:
+        return f"{value / 1_000_000:.2f}ms"
+    return f"{value / 1_000_000_000:.2f}s"
+
+
+class StatsRegistry:
+    """
+    Statistics of every function traced with ``aggregate=True``.
+    """
+
+    def __init__(self):
+        self.functions: Dict[str, FunctionStats] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str) -> FunctionStats:
+        """
+        Get the statistics of a function, creating them on first use.
+
+        Args:
+            name (str): The module and qualified name of the function.
+
+        Returns:
+            FunctionStats: The statistics of the function.
+        """
+        with self._lock:
+            stats = self.functions.get(name)
+            if stats is None:
+                stats = self.functions[name] = FunctionStats(name)
+            return stats
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Get the current statistics of every function.
+
+        Returns:
+            dict: Maps the module and qualified names of functions to their statistics.
+        """
+        with self._lock:
+            functions = list(self.functions.values())
+        return {stats.name: stats.snapshot() for stats in functions}
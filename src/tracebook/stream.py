@@ -0,0 +1,242 @@
+import json
+import time
+from typing import Optional, Tuple
+
+from flask import Flask, Response, request
+
+from tracebook.event_bus import EventBus
+
+# Time in seconds a burst of updates is collected into one message, about one frame.
+FRAME_INTERVAL = 1 / 60
+
+# Time in seconds after which an idle stream sends a comment to keep the connection open.
+KEEPALIVE_INTERVAL = 15.0
+
+# Longest time in seconds a long-poll request waits for updates.
+POLL_TIMEOUT = 25.0
+
+STREAM_SCRIPT = """
+(function () {
+  var pending = null;
+  var scheduled = false;
+
+  function flush() {
+    scheduled = false;
+    var update = pending;
+    pending = null;
+    if (!window.dash_clientside || !window.dash_clientside.set_props) {
+      return;
+    }
+    // Samples go straight into the graphs. New records only trigger the log
+    // window callback, which fetches the rows the page has not seen yet.
+    if (update.metrics.length) {
+      window.dash_clientside.set_props("stream-update", {
+        data: {metrics: update.metrics, max_points: update.max_points}
+      });
+    }
+    if (update.records) {
+      window.dash_clientside.set_props("log-update", {data: update.cursor});
+    }
+  }
+
+  // Messages arriving within one animation frame become one Dash update.
+  function deliver(message) {
+    if (!message.records && !message.metrics.length) {
+      return;
+    }
+    if (pending === null) {
+      pending = {records: 0, metrics: [], max_points: message.max_points};
+    }
+    pending.cursor = message.cursor;
+    pending.records += message.records;
+    pending.metrics = pending.metrics.concat(message.metrics).slice(-message.max_points);
+    if (!scheduled) {
+      scheduled = true;
+      window.requestAnimationFrame(flush);
+    }
+  }
+
+  function longPoll(cursor) {
+    fetch("%(poll_url)s?cursor=" + encodeURIComponent(cursor || ""))
+      .then(function (response) { return response.json(); })
+      .then(function (message) {
+        deliver(message);
+        longPoll(message.cursor);
+      })
+      .catch(function () {
+        setTimeout(function () { longPoll(cursor); }, 1000);
+      });
+  }
+
+  function connect() {
+    if (!window.EventSource) {
+      longPoll(null);
+      return;
+    }
+    var opened = false;
+    var source = new EventSource("%(stream_url)s");
+    source.onopen = function () { opened = true; };
+    source.onmessage = function (event) { deliver(JSON.parse(event.data)); };
+    source.onerror = function () {
+      // Fall back to long-polling when streaming responses never get through.
+      if (!opened) {
+        source.close();
+        longPoll(null);
+      }
+    };
+  }
+
+  window.dash_clientside = window.dash_clientside || {};
+  window.dash_clientside.tracebook = {
+    extendMetrics: function (update) {
+      var noUpdate = window.dash_clientside.no_update;
+      if (!update || !update.metrics.length) {
+        return [noUpdate, noUpdate];
+      }
+      var x = update.metrics.map(function (point) { return point[0]; });
+      var cpu = update.metrics.map(function (point) { return point[1]; });
+      var memory = update.metrics.map(function (point) { return point[2]; });
+      return [
+        [{x: [x], y: [cpu]}, [0], update.max_points],
+        [{x: [x], y: [memory]}, [0], update.max_points]
+      ];
+    }
+  };
+
+  window.addEventListener("load", connect);
+})();
+"""
+
+
+class DashboardStream:
+    """
+    Push channel that streams resource samples, and notices of new log records, to browsers.
+
+    ``/tracebook/stream`` sends Server-Sent Events and ``/tracebook/poll``
+    answers long-poll requests with the same messages. A message holds the
+    samples and the number of records published since the client's cursor,
+    which is sent back with it as ``"<records>-<samples>"``. The records
+    themselves are not sent: the log window fetches its new rows, rendered
+    once, through its Dash callback. Updates that arrive within one
+    frame are sent as one message, and an idle stream only sends a keep-alive
+    comment every ``KEEPALIVE_INTERVAL`` seconds.
+    """
+
+    def __init__(self, events: EventBus, metrics: EventBus, max_points: int = 100):
+        """
+        Initialize the stream.
+
+        Args:
+            events (EventBus): The bus of log records.
+            metrics (EventBus): The bus of resource samples. It must share the
+                condition of ``events``.
+            max_points (int): The number of points the graphs keep.
+        """
+        self.events = events
+        self.metrics = metrics
+        self.max_points = max_points
+
+    def parse_cursor(self, value: Optional[str]) -> Tuple[int, int]:
+        """
+        Parse a cursor sent by a client.
+
+        Args:
+            value (str): The cursor, or None for a new client.
+
+        Returns:
+            tuple: The record and sample cursors. New clients start with the next update.
+        """
+        try:
+            records, samples = value.split("-")
+            return int(records), int(samples)
+        except (AttributeError, ValueError):
+            return self.events.cursor, self.metrics.cursor
+
+    def read(self, cursor: Tuple[int, int]) -> Tuple[dict, Tuple[int, int]]:
+        """
+        Read the updates published since a cursor.
+
+        Args:
+            cursor (tuple): The record and sample cursors.
+
+        Returns:
+            tuple: The message and the new cursor.
+        """
+        events, records = self.events.read(cursor[0])
+        samples, sample_cursor = self.metrics.read(cursor[1])
+        message = {
+            "cursor": f"{records}-{sample_cursor}",
+            "records": len(events),
+            "metrics": [[sample.timestamp, sample.cpu_percent, sample.rss_mb] for sample in samples],
+            "max_points": self.max_points,
+        }
+        return message, (records, sample_cursor)
+
+    def wait(self, cursor: Tuple[int, int], timeout: float) -> bool:
+        """
+        Wait until a record or sample is published after a cursor.
+
+        Args:
+            cursor (tuple): The record and sample cursors.
+            timeout (float): The longest time to wait in seconds.
+
+        Returns:
+            bool: True if there are updates.
+        """
+        with self.events.condition:
+            return self.events.condition.wait_for(
+                lambda: self.events.cursor > cursor[0] or self.metrics.cursor > cursor[1], timeout
+            )
+
+    def messages(self, cursor: Tuple[int, int]):
+        """
+        Generate the Server-Sent Events of a client.
+
+        Args:
+            cursor (tuple): The record and sample cursors to start from.
+
+        Yields:
+            str: The events.
+        """
+        yield "retry: 1000\n\n"
+        while True:
+            if not self.wait(cursor, KEEPALIVE_INTERVAL):
+                yield ": keep-alive\n\n"
+                continue
+            time.sleep(FRAME_INTERVAL)
+            message, cursor = self.read(cursor)
+            yield f"id: {message['cursor']}\ndata: {json.dumps(message)}\n\n"
+
+    def register(self, server: Flask):
+        """
+        Add the stream, long-poll and script routes to a Flask app.
+
+        Args:
+            server (Flask): The app serving the dashboard.
+        """
+
+        def stream():
+            cursor = self.parse_cursor(request.headers.get("Last-Event-ID") or request.args.get("cursor"))
+            return Response(
+                self.messages(cursor),
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        def poll():
+            cursor = self.parse_cursor(request.args.get("cursor"))
+            if self.wait(cursor, POLL_TIMEOUT):
+                time.sleep(FRAME_INTERVAL)
+            message, _ = self.read(cursor)
+            return Response(json.dumps(message), mimetype="application/json")
+
+        def script():
+            source = STREAM_SCRIPT % {
+                "stream_url": "/tracebook/stream",
+                "poll_url": "/tracebook/poll",
+            }
+            return Response(source, mimetype="application/javascript")
+
+        server.add_url_rule("/tracebook/stream", "tracebook_stream", stream)
+        server.add_url_rule("/tracebook/poll", "tracebook_poll", poll)
+        server.add_url_rule("/tracebook/stream.js", "tracebook_stream_script", script)
@@ -0,0 +1,209 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import threading
+import time
+from typing import List, Optional
+
+from tracebook.log_store import resume_offset
+
+_IN_MODIFY = 0x2
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+
+_READ_SIZE = 1 << 20
+
+
+def _inotify_watch(directory: str) -> Optional[int]:
+    """
+    Watch a directory with inotify.
+
+    Returns:
+        int: The inotify file descriptor, or None where inotify is not available.
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (AttributeError, OSError):
+        return None
+    if fd < 0:
+        return None
+    mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+    if libc.inotify_add_watch(fd, os.fsencode(directory or "."), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+class LogTail:
+    """
+    Follower of a growing log file.
+
+    New bytes are read in bulk with ``os.read`` and split into complete lines.
+    The file is identified by its inode, so a file that is replaced, e.g. by
+    rotation or by compaction of the ``RingLogStore``, is detected: the rest of
+    the old file is read, and the new file is read after the bytes that
+    compaction copied from the old one, see ``resume_offset``. A file that
+    shrinks in place is re-read from the start.
+
+    ``wait`` sleeps until the file changes, using inotify where available and
+    polling with an interval that grows from ``min_interval`` to
+    ``max_interval`` while the file stays unchanged otherwise.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        from_end: bool = True,
+        min_interval: float = 0.01,
+        max_interval: float = 0.5,
+    ):
+        """
+        Initialize the follower.
+
+        Args:
+            file_path (str): The log file to follow.
+            from_end (bool): Whether to skip the lines already in the file.
+            min_interval (float): The shortest polling interval in seconds.
+            max_interval (float): The longest polling interval in seconds.
+        """
+        self.file_path = file_path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._interval = min_interval
+        self._fd = None
+        self._identity = None
+        self._offset = 0
+        self._partial = b""
+        self._inotify = _inotify_watch(os.path.dirname(os.path.abspath(file_path)))
+        if from_end:
+            self._seek_end()
+
+    def _seek_end(self):
+        if not self._open():
+            return
+        self._offset = os.lseek(self._fd, 0, os.SEEK_END)
+        start = max(0, self._offset - 4096)
+        os.lseek(self._fd, start, os.SEEK_SET)
+        # A line that is still being written is returned once it is complete.
+        self._partial = os.read(self._fd, self._offset - start).rsplit(b"\n", 1)[-1]
+        os.lseek(self._fd, self._offset, os.SEEK_SET)
+
+    def _open(self) -> bool:
+        try:
+            fd = os.open(self.file_path, os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        stat = os.fstat(fd)
+        self._fd = fd
+        self._identity = (stat.st_dev, stat.st_ino)
+        self._offset = 0
+        return True
+
+    def _close_fd(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _read_to_end(self) -> bytes:
+        chunks = []
+        while True:
+            chunk = os.read(self._fd, _READ_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            self._offset += len(chunk)
+        return b"".join(chunks)
+
+    def _split(self, data: bytes) -> List[bytes]:
+        *lines, self._partial = (self._partial + data).split(b"\n")
+        return lines
+
+    def _reopen(self) -> List[bytes]:
+        previous = self._identity
+        self._partial = b""
+        if not self._open():
+            return []
+        self._offset = os.lseek(self._fd, resume_offset(self.file_path, previous, self._identity), os.SEEK_SET)
+        return self._split(self._read_to_end())
+
+    def read_lines(self) -> List[str]:
+        """
+        Read the lines completed since the last call.
+
+        Returns:
+            list: The new lines, without trailing newlines.
+        """
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            stat = None
+
+        if self._fd is None:
+            lines = self._reopen() if stat is not None else []
+        elif stat is None or (stat.st_dev, stat.st_ino) != self._identity:
+            lines = self._split(self._read_to_end())
+            if self._partial:
+                lines.append(self._partial)
+            self._close_fd()
+            lines += self._reopen() if stat is not None else []
+        elif stat.st_size < self._offset:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            self._offset = 0
+            self._partial = b""
+            lines = self._split(self._read_to_end())
+        elif stat.st_size > self._offset:
+            lines = self._split(self._read_to_end())
+        else:
+            lines = []
+
+        if lines:
+            self._interval = self.min_interval
+        return [line.decode(errors="replace").rstrip("\r") for line in lines]
+
+    def wait(self, timeout: float = None):
+        """
+        Wait until the file may have changed.
+
+        Args:
+            timeout (float): The longest time to wait in seconds, by default the polling interval.
+        """
+        if self._inotify is not None:
+            ready, _, _ = select.select([self._inotify], [], [], self.max_interval if timeout is None else timeout)
+            if ready:
+                try:
+                    while os.read(self._inotify, 4096):
+                        pass
+                except BlockingIOError:
+                    pass
+            return
+        time.sleep(self._interval if timeout is None else min(timeout, self._interval))
+        self._interval = min(self._interval * 2, self.max_interval)
+
+    def follow(self, stop: threading.Event = None):
+        """
+        Yield new lines as they are written.
+
+        Args:
+            stop (threading.Event): Ends the iteration when set.
+
+        Yields:
+            list: The lines completed since the previous iteration, never empty.
+        """
+        while stop is None or not stop.is_set():
+            lines = self.read_lines()
+            if lines:
+                yield lines
+            else:
+                self.wait()
+
+    def close(self):
+        """
+        Close the followed file and the inotify watch.
+        """
+        self._close_fd()
+        if self._inotify is not None:
+            os.close(self._inotify)
+            self._inotify = None
@@ -1,7 +1,9 @@
+import importlib
 import time
 import traceback
 import psutil
-import os
+
+from tracebook.resource_probe import get_process
 
 
 def format_stack_trace(exception):
@@ -21,14 +23,127 @@ def format_stack_trace(exception):
     )
 
 
-def current_timestamp():
+def current_timestamp(seconds=None):
     """
     Returns the current timestamp in a readable format.
 
+    Args:
+        seconds (float): Seconds since the epoch to format instead of the current time.
+
     Returns:
         str: The current timestamp.
     """
-    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(seconds))
+
+
+# The longest time in seconds before the clock anchor is taken again.
+ANCHOR_INTERVAL = 60.0
+
+_anchor = (time.time_ns(), time.monotonic_ns())
+
+
+def clock_anchor():
+    """
+    Returns the wall-clock and monotonic readings that record timestamps are relative to.
+
+    Returns:
+        tuple: ``time.time_ns()`` and ``time.monotonic_ns()`` taken at the same moment.
+    """
+    return _anchor
+
+
+def refresh_clock_anchor(max_age: float = ANCHOR_INTERVAL):
+    """
+    Takes the clock anchor again if it is older than ``max_age`` seconds.
+
+    The monotonic clock stops during system suspend and does not follow NTP
+    corrections of the wall clock, so timestamps derived from an old anchor
+    drift from real time.
+
+    Args:
+        max_age (float): The age in seconds after which the anchor is taken again.
+
+    Returns:
+        tuple: The current anchor, as returned by ``clock_anchor``.
+    """
+    global _anchor
+    if time.monotonic_ns() - _anchor[1] >= max_age * 1e9:
+        _anchor = (time.time_ns(), time.monotonic_ns())
+    return _anchor
+
+
+class TimestampFormatter:
+    """
+    Formats record timestamps as ``%Y-%m-%d %H:%M:%S``, optionally followed by
+    milliseconds or microseconds.
+
+    Timestamps are derived from ``time.monotonic_ns()`` readings and the clock
+    anchor, and the formatted date and time are reused until the second changes,
+    so most records are formatted without calling ``time.strftime``. When the
+    second changes, the anchor is also refreshed if it is older than
+    ``ANCHOR_INTERVAL``.
+    """
+
+    PRECISIONS = ("s", "ms", "us")
+
+    def __init__(self, precision: str = "s"):
+        """
+        Initialize the formatter.
+
+        Args:
+            precision (str): "s" for whole seconds, "ms" for milliseconds or "us" for microseconds.
+        """
+        if precision not in self.PRECISIONS:
+            raise ValueError(f"Unknown timestamp precision: {precision}")
+        self.precision = precision
+        self._cached = (None, "")
+
+    def format_wall_ns(self, wall_ns):
+        """
+        Formats a wall-clock time.
+
+        Args:
+            wall_ns (int): Nanoseconds since the epoch.
+
+        Returns:
+            str: The formatted timestamp.
+        """
+        second, fraction = divmod(wall_ns, 1_000_000_000)
+        cached_second, prefix = self._cached
+        if second != cached_second:
+            prefix = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+            self._cached = (second, prefix)
+        if self.precision == "s":
+            return prefix
+        if self.precision == "ms":
+            return f"{prefix}.{fraction // 1_000_000:03d}"
+        return f"{prefix}.{fraction // 1_000:06d}"
+
+    def format(self, monotonic_ns):
+        """
+        Formats a ``time.monotonic_ns()`` reading of this process.
+
+        Args:
+            monotonic_ns (int): The monotonic reading in nanoseconds.
+
+        Returns:
+            str: The formatted timestamp.
+        """
+        wall_ns, anchor_ns = _anchor
+        wall_ns += monotonic_ns - anchor_ns
+        if wall_ns // 1_000_000_000 != self._cached[0]:
+            wall_ns, anchor_ns = refresh_clock_anchor()
+            wall_ns += monotonic_ns - anchor_ns
+        return self.format_wall_ns(wall_ns)
+
+    def now(self):
+        """
+        Formats the current time.
+
+        Returns:
+            str: The formatted timestamp.
+        """
+        return self.format(time.monotonic_ns())
 
 
 def time_execution(func):
@@ -52,8 +167,7 @@ def get_memory_usage() -> str:
     """
     Returns the memory usage of the current process in MB.
     """
-    process = psutil.Process(os.getpid())
-    memory_info = process.memory_info()
+    memory_info = get_process().memory_info()
     return f"{memory_info.rss / 1024 ** 2:.2f} MB"
 
 
@@ -62,3 +176,27 @@ def get_cpu_usage() -> str:
     Returns the CPU usage percentage of the system.
     """
     return f"{psutil.cpu_percent(interval=1):.2f}%"
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported when one of its attributes is first used.
+
+    Modules that take long to import and are only needed by some features are
+    bound to a ``LazyModule``, so that importing tracebook stays fast.
+    """
+
+    def __init__(self, name: str):
+        """
+        Initialize the stand-in.
+
+        Args:
+            name (str): The name of the module.
+        """
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
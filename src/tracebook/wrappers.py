@@ -0,0 +1,137 @@
+import inspect
+from functools import wraps
+from typing import Any, Callable, Optional
+
+Before = Callable[[tuple, dict], Any]
+After = Callable[[Any, Any], None]
+Failed = Callable[[Any, Exception], Any]
+
+
+def is_async(func) -> bool:
+    """
+    Check whether a function runs on an event loop.
+
+    Args:
+        func (callable): The function to check.
+
+    Returns:
+        bool: True for coroutine functions and async generator functions.
+    """
+    return inspect.iscoroutinefunction(func) or inspect.isasyncgenfunction(func)
+
+
+def wrap_call(
+    func,
+    before: Optional[Before] = None,
+    after: Optional[After] = None,
+    failed: Optional[Failed] = None,
+):
+    """
+    Wrap a function with tracing hooks, whatever kind of function it is.
+
+    ``before(args, kwargs)`` runs when the call starts and returns a state that
+    is passed to ``after(state, result)`` when the call completes, or to
+    ``failed(state, exception)`` when it raises. ``failed`` either raises or
+    returns the value the call should return instead.
+
+    For coroutine functions the call starts when the coroutine starts running
+    and completes when it returns, so timings cover the awaited duration.
+    Generators and async generators complete when they are exhausted; the
+    result passed to ``after`` is the generator's return value, or None.
+
+    Args:
+        func (callable): The function to wrap.
+        before (callable): Called when the call starts.
+        after (callable): Called when the call completes.
+        failed (callable): Called when the call raises an exception.
+
+    Returns:
+        callable: The wrapped function, of the same kind as ``func``.
+    """
+    if inspect.iscoroutinefunction(func):
+        wrapper = _wrap_coroutine(func, before, after, failed)
+    elif inspect.isasyncgenfunction(func):
+        wrapper = _wrap_async_generator(func, before, after, failed)
+    elif inspect.isgeneratorfunction(func):
+        wrapper = _wrap_generator(func, before, after, failed)
+    else:
+        wrapper = _wrap_function(func, before, after, failed)
+    return wraps(func)(wrapper)
+
+
+def _wrap_function(func, before, after, failed):
+    def wrapper(*args, **kwargs):
+        state = before(args, kwargs) if before is not None else None
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if failed is None:
+                raise
+            return failed(state, e)
+        if after is not None:
+            after(state, result)
+        return result
+
+    return wrapper
+
+
+def _wrap_coroutine(func, before, after, failed):
+    async def wrapper(*args, **kwargs):
+        state = before(args, kwargs) if before is not None else None
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            if failed is None:
+                raise
+            return failed(state, e)
+        if after is not None:
+            after(state, result)
+        return result
+
+    return wrapper
+
+
+def _wrap_generator(func, before, after, failed):
+    def wrapper(*args, **kwargs):
+        state = before(args, kwargs) if before is not None else None
+        try:
+            result = yield from func(*args, **kwargs)
+        except Exception as e:
+            if failed is None:
+                raise
+            return failed(state, e)
+        if after is not None:
+            after(state, result)
+        return result
+
+    return wrapper
+
+
+def _wrap_async_generator(func, before, after, failed):
+    async def wrapper(*args, **kwargs):
+        state = before(args, kwargs) if before is not None else None
+        generator = func(*args, **kwargs)
+        try:
+            # Forward asend/athrow/aclose so the wrapper behaves like the generator.
+            value = await generator.__anext__()
+            while True:
+                try:
+                    sent = yield value
+                except GeneratorExit:
+                    await generator.aclose()
+                    raise
+                except BaseException as thrown:
+                    value = await generator.athrow(thrown)
+                else:
+                    value = await generator.asend(sent)
+        except StopAsyncIteration:
+            pass
+        except Exception as e:
+            if failed is None:
+                raise
+            failed(state, e)
+            return
+        if after is not None:
+            after(state, None)
+
+    return wrapper